@@ -1,8 +1,59 @@
-from django.contrib import admin
-
-from .models import User, FriendShip
-
-# Register your models here.
-
-admin.site.register(User)
-admin.site.register(FriendShip)
+from django.contrib import admin
+from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
+
+from core.paginator import EstimatedCountPaginator
+
+from .models import Block, FriendShip, Mute, User
+
+
+@admin.register(User)
+class UserAdmin(BaseUserAdmin):
+    fieldsets = BaseUserAdmin.fieldsets + (
+        ("プロフィール", {"fields": ("birth_date", "self_introduction")}),
+    )
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    # Prefix search on username can use the unique index.
+    search_fields = ("^username",)
+
+
+@admin.register(FriendShip)
+class FriendShipAdmin(admin.ModelAdmin):
+    list_display = ("id", "follower_username", "followee_username", "created_at")
+    list_select_related = ("follower", "followee")
+    list_filter = ("created_at",)
+    raw_id_fields = ("follower", "followee")
+    search_fields = ("=follower__username", "=followee__username")
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    ordering = ("-id",)
+
+    @admin.display(description="フォロワー", ordering="follower__username")
+    def follower_username(self, obj):
+        return obj.follower.username
+
+    @admin.display(description="フォロー先", ordering="followee__username")
+    def followee_username(self, obj):
+        return obj.followee.username
+
+
+@admin.register(Block)
+class BlockAdmin(admin.ModelAdmin):
+    list_display = ("id", "blocker", "blocked", "created_at")
+    list_select_related = ("blocker", "blocked")
+    raw_id_fields = ("blocker", "blocked")
+    search_fields = ("=blocker__username", "=blocked__username")
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    ordering = ("-id",)
+
+
+@admin.register(Mute)
+class MuteAdmin(admin.ModelAdmin):
+    list_display = ("id", "muter", "muted", "created_at")
+    list_select_related = ("muter", "muted")
+    raw_id_fields = ("muter", "muted")
+    search_fields = ("=muter__username", "=muted__username")
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    ordering = ("-id",)
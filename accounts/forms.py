@@ -1,3 +1,4 @@
+from django import forms
 from django.contrib.auth.forms import UserCreationForm
 
 from .models import User
@@ -10,3 +11,16 @@ class SignUpForm(UserCreationForm):
             "username",
             "email",
         )
+
+
+class ProfileEditForm(forms.ModelForm):
+    class Meta:
+        model = User
+        fields = (
+            "username",
+            "birth_date",
+            "self_introduction",
+        )
+        widgets = {
+            "birth_date": forms.DateInput(attrs={"type": "date"}),
+        }
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-19 11:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0005_remove_profile_user_user_birth_date_and_more"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="friendship",
+            name="created_at",
+            field=models.DateTimeField(auto_now_add=True, db_index=True),
+        ),
+    ]
@@ -1,42 +1,115 @@
-from django.contrib.auth.models import AbstractUser
-from django.db import models
-
-
-class User(AbstractUser):
-    email = models.EmailField(max_length=254)
-    birth_date = models.DateField(
-        verbose_name="誕生日",
-        null=True,
-        blank=True,
-    )
-    self_introduction = models.TextField(
-        verbose_name="自己紹介",
-        max_length=160,
-        null=True,
-        blank=True,
-        default="未設定",
-    )
-
-
-class FriendShip(models.Model):
-    followee = models.ForeignKey(
-        User,
-        related_name="followee",
-        on_delete=models.CASCADE,
-    )
-    follower = models.ForeignKey(
-        User,
-        related_name="follower",
-        on_delete=models.CASCADE,
-    )
-    created_at = models.DateTimeField(auto_now_add=True)
-
-    class Meta:
-        constraints = [
-            models.UniqueConstraint(
-                fields=["followee", "follower"], name="unique_friendship"
-            )
-        ]
-
-    def __str__(self):
-        return f"{self.follower.username} follows {self.followee.username}"
+from django.contrib.auth.models import AbstractUser
+from django.core.cache import cache
+from django.db import models, transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from core.versioning import bump_version
+
+
+def following_key(user_id):
+    return f"accounts:following:{user_id}"
+
+
+class User(AbstractUser):
+    email = models.EmailField(max_length=254)
+    birth_date = models.DateField(
+        verbose_name="誕生日",
+        null=True,
+        blank=True,
+    )
+    self_introduction = models.TextField(
+        verbose_name="自己紹介",
+        max_length=160,
+        null=True,
+        blank=True,
+        default="未設定",
+    )
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        if kwargs.get("update_fields") != ["last_login"]:
+            # Cached tweet snapshots embed their author; see tweets.cache.
+            # Pages key their ETags on the versions of the authors they show.
+            transaction.on_commit(lambda: bump_version("author", self.pk))
+
+
+class FriendShip(models.Model):
+    followee = models.ForeignKey(
+        User,
+        related_name="followee",
+        on_delete=models.CASCADE,
+    )
+    follower = models.ForeignKey(
+        User,
+        related_name="follower",
+        on_delete=models.CASCADE,
+    )
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["followee", "follower"], name="unique_friendship"
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.follower.username} follows {self.followee.username}"
+
+
+@receiver(post_save, sender=FriendShip)
+@receiver(post_delete, sender=FriendShip)
+def forget_following(sender, instance, **kwargs):
+    """
+    Drop the follower's cached followee ids (see accounts.relationships) now,
+    and again on commit in case another request cached the old set in between.
+    Covers every way a follow changes, including blocks and user deletions.
+    """
+    key = following_key(instance.follower_id)
+    cache.delete(key)
+    transaction.on_commit(lambda: cache.delete(key))
+
+
+class Block(models.Model):
+    blocker = models.ForeignKey(
+        User,
+        related_name="blocking",
+        on_delete=models.CASCADE,
+    )
+    blocked = models.ForeignKey(
+        User,
+        related_name="blocked_by",
+        on_delete=models.CASCADE,
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["blocker", "blocked"], name="unique_block")
+        ]
+
+    def __str__(self):
+        return f"{self.blocker.username} blocks {self.blocked.username}"
+
+
+class Mute(models.Model):
+    muter = models.ForeignKey(
+        User,
+        related_name="muting",
+        on_delete=models.CASCADE,
+    )
+    muted = models.ForeignKey(
+        User,
+        related_name="muted_by",
+        on_delete=models.CASCADE,
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["muter", "muted"], name="unique_mute")
+        ]
+
+    def __str__(self):
+        return f"{self.muter.username} mutes {self.muted.username}"
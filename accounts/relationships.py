@@ -0,0 +1,214 @@
+"""
+Follow-graph lookups answered from a per-user sorted array of followee ids
+held in the cache, so "does A follow B" and bulk checks cost no queries once
+the array is loaded. Blocks and mutes are kept the same way as one array of
+ids hidden from each viewer.
+"""
+
+from array import array
+from bisect import bisect_left
+
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+
+from core.versioning import bump_version
+
+from .models import Block, FriendShip, Mute, following_key
+
+
+def following_ids(user_id):
+    """Sorted array of the ids ``user_id`` follows."""
+    data = cache.get(following_key(user_id))
+    if data is not None:
+        ids = array("q")
+        ids.frombytes(data)
+        return ids
+    ids = array(
+        "q",
+        FriendShip.objects.filter(follower_id=user_id)
+        .order_by("followee_id")
+        .values_list("followee_id", flat=True),
+    )
+    cache.set(following_key(user_id), ids.tobytes(), 60 * 60)
+    return ids
+
+
+def _contains(ids, value):
+    index = bisect_left(ids, value)
+    return index < len(ids) and ids[index] == value
+
+
+def follows(follower_id, followee_id):
+    return _contains(following_ids(follower_id), followee_id)
+
+
+def is_mutual(user_id, other_id):
+    return follows(user_id, other_id) and follows(other_id, user_id)
+
+
+def following_among(follower_id, user_ids):
+    """The subset of ``user_ids`` that ``follower_id`` follows."""
+    ids = following_ids(follower_id)
+    return {user_id for user_id in user_ids if _contains(ids, user_id)}
+
+
+def invalidate(user_id, other_id):
+    # Both profiles show follow counts and state, so both versions change.
+    # The cached followee ids are dropped by FriendShip's signal receivers.
+    bump_version("user", user_id)
+    bump_version("user", other_id)
+
+
+def follow(follower, followee):
+    """Create the relationship; return False if it already existed."""
+    try:
+        with transaction.atomic():
+            FriendShip.objects.create(follower=follower, followee=followee)
+    except IntegrityError:
+        return False
+    invalidate(follower.pk, followee.pk)
+    return True
+
+
+def unfollow(follower, followee):
+    """Delete the relationship; return False if there was none."""
+    deleted = FriendShip.objects.filter(follower=follower, followee=followee).delete()
+    if not deleted[0]:
+        return False
+    invalidate(follower.pk, followee.pk)
+    return True
+
+
+def _hidden_key(user_id):
+    return f"accounts:hidden:{user_id}"
+
+
+def hidden_ids(viewer_id):
+    """
+    Sorted array of the ids whose tweets ``viewer_id`` should not see: users
+    they block or mute and users who block them.
+    """
+    data = cache.get(_hidden_key(viewer_id))
+    if data is not None:
+        ids = array("q")
+        ids.frombytes(data)
+        return ids
+    ids = set(
+        Block.objects.filter(blocker_id=viewer_id).values_list("blocked_id", flat=True)
+    )
+    ids.update(
+        Block.objects.filter(blocked_id=viewer_id).values_list("blocker_id", flat=True)
+    )
+    ids.update(
+        Mute.objects.filter(muter_id=viewer_id).values_list("muted_id", flat=True)
+    )
+    ids = array("q", sorted(ids))
+    cache.set(_hidden_key(viewer_id), ids.tobytes(), 60 * 60)
+    return ids
+
+
+def is_hidden(viewer_id, user_id):
+    return _contains(hidden_ids(viewer_id), user_id)
+
+
+def blocks(blocker_id, blocked_id):
+    return Block.objects.filter(blocker_id=blocker_id, blocked_id=blocked_id).exists()
+
+
+def mutes(muter_id, muted_id):
+    return Mute.objects.filter(muter_id=muter_id, muted_id=muted_id).exists()
+
+
+def blocked_between(user_id, other_id):
+    """True if either user blocks the other."""
+    return Block.objects.filter(
+        Q(blocker_id=user_id, blocked_id=other_id)
+        | Q(blocker_id=other_id, blocked_id=user_id)
+    ).exists()
+
+
+def hidden_q(viewer_id, field):
+    """
+    Q excluding rows whose ``field`` (a user id) is hidden from ``viewer_id``,
+    as NOT IN subqueries the database can run as anti-joins, so viewers with
+    thousands of blocks do not send thousands of ids.
+    """
+    return (
+        ~Q(
+            **{
+                f"{field}__in": Block.objects.filter(blocker_id=viewer_id).values(
+                    "blocked_id"
+                )
+            }
+        )
+        & ~Q(
+            **{
+                f"{field}__in": Block.objects.filter(blocked_id=viewer_id).values(
+                    "blocker_id"
+                )
+            }
+        )
+        & ~Q(
+            **{
+                f"{field}__in": Mute.objects.filter(muter_id=viewer_id).values(
+                    "muted_id"
+                )
+            }
+        )
+    )
+
+
+def _invalidate_hidden(*user_ids):
+    for user_id in user_ids:
+        bump_version("user", user_id)
+        cache.delete(_hidden_key(user_id))
+        transaction.on_commit(
+            lambda user_id=user_id: cache.delete(_hidden_key(user_id))
+        )
+
+
+def block(blocker, blocked):
+    """
+    Create the block and drop follows in both directions; return False if it
+    already existed.
+    """
+    try:
+        with transaction.atomic():
+            Block.objects.create(blocker=blocker, blocked=blocked)
+            FriendShip.objects.filter(
+                Q(follower=blocker, followee=blocked)
+                | Q(follower=blocked, followee=blocker)
+            ).delete()
+    except IntegrityError:
+        return False
+    invalidate(blocker.pk, blocked.pk)
+    invalidate(blocked.pk, blocker.pk)
+    _invalidate_hidden(blocker.pk, blocked.pk)
+    return True
+
+
+def unblock(blocker, blocked):
+    deleted = Block.objects.filter(blocker=blocker, blocked=blocked).delete()
+    if not deleted[0]:
+        return False
+    _invalidate_hidden(blocker.pk, blocked.pk)
+    return True
+
+
+def mute(muter, muted):
+    try:
+        with transaction.atomic():
+            Mute.objects.create(muter=muter, muted=muted)
+    except IntegrityError:
+        return False
+    _invalidate_hidden(muter.pk)
+    return True
+
+
+def unmute(muter, muted):
+    deleted = Mute.objects.filter(muter=muter, muted=muted).delete()
+    if not deleted[0]:
+        return False
+    _invalidate_hidden(muter.pk)
+    return True
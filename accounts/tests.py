@@ -1,538 +1,849 @@
-from django.test import TestCase
-from django.urls import reverse
-from django.contrib.messages import get_messages
-from django.contrib.auth import SESSION_KEY
-
-from mysite import settings
-from tweets.models import Tweet
-from .models import User, FriendShip
-
-
-class TestSignUpView(TestCase):
-    def setUp(self):
-        self.url = reverse("accounts:signup")
-
-    def test_success_get(self):
-        response = self.client.get(self.url)
-        self.assertEquals(response.status_code, 200)
-        self.assertTemplateUsed(response, "accounts/sign_up.html")
-
-    def test_success_post(self):
-        user_data = {
-            "username": "testuser",
-            "email": "testmail@email.com",
-            "password1": "testpassword",
-            "password2": "testpassword",
-        }
-
-        response = self.client.post(self.url, user_data)
-        self.assertRedirects(
-            response,
-            reverse(settings.LOGIN_REDIRECT_URL),
-            status_code=302,
-            target_status_code=200,
-        )
-
-        self.assertTrue(
-            User.objects.filter(
-                username=user_data["username"],
-                email=user_data["email"],
-            ).exists()
-        )
-
-        self.assertIn(SESSION_KEY, self.client.session)
-
-    def test_failure_post_with_empty_form(self):
-        empty_data = {
-            "username": "",
-            "email": "",
-            "password1": "",
-            "password2": "",
-        }
-
-        response = self.client.post(self.url, empty_data)
-        self.assertEquals(response.status_code, 200)
-        self.assertFormError(
-            response,
-            "form",
-            "username",
-            "このフィールドは必須です。",
-        )
-        self.assertFormError(
-            response,
-            "form",
-            "email",
-            "このフィールドは必須です。",
-        )
-        self.assertFormError(
-            response,
-            "form",
-            "password1",
-            "このフィールドは必須です。",
-        )
-        self.assertFormError(
-            response,
-            "form",
-            "password2",
-            "このフィールドは必須です。",
-        )
-        self.assertFalse(User.objects.exists())
-
-    def test_failure_post_with_empty_username(self):
-        username_empty_data = {
-            "username": "",
-            "email": "testmail@email.com",
-            "password1": "testpassword",
-            "password2": "testpassword",
-        }
-
-        response = self.client.post(self.url, username_empty_data)
-        self.assertEquals(response.status_code, 200)
-        self.assertFormError(
-            response,
-            "form",
-            "username",
-            "このフィールドは必須です。",
-        )
-        self.assertFalse(User.objects.exists())
-
-    def test_failure_post_with_empty_email(self):
-        email_empty_data = {
-            "username": "testuser",
-            "email": "",
-            "password1": "testpassword",
-            "password2": "testpassword",
-        }
-
-        response = self.client.post(self.url, email_empty_data)
-        self.assertEquals(response.status_code, 200)
-        self.assertFormError(
-            response,
-            "form",
-            "email",
-            "このフィールドは必須です。",
-        )
-        self.assertFalse(User.objects.exists())
-
-    def test_failure_post_with_empty_password(self):
-        password_empty_data = {
-            "username": "testuser",
-            "email": "testmail@email.com",
-            "password1": "",
-            "password2": "",
-        }
-
-        response = self.client.post(self.url, password_empty_data)
-        self.assertEquals(response.status_code, 200)
-        self.assertFormError(
-            response,
-            "form",
-            "password1",
-            "このフィールドは必須です。",
-        )
-        self.assertFormError(
-            response,
-            "form",
-            "password2",
-            "このフィールドは必須です。",
-        )
-        self.assertFalse(User.objects.exists())
-
-    def test_failure_post_with_duplicated_user(self):
-        duplicated_data = {
-            "username": "testuser",
-            "email": "testmail@email.com",
-            "password1": "testpassword",
-            "password2": "testpassword",
-        }
-
-        User.objects.create_user(
-            username="testuser",
-            email="testemail@email.com",
-            password="testpassword",
-        )
-        response = self.client.post(self.url, duplicated_data)
-        self.assertEquals(response.status_code, 200)
-        self.assertFormError(
-            response,
-            "form",
-            "username",
-            "同じユーザー名が既に登録済みです。",
-        )
-        self.assertTrue(User.objects.count(), 1)
-
-    def test_failure_post_with_invalid_email(self):
-        invalid_email_data = {
-            "username": "testuser",
-            "email": "test",
-            "password1": "testpassword",
-            "password2": "testpassword",
-        }
-
-        response = self.client.post(self.url, invalid_email_data)
-        self.assertEquals(response.status_code, 200)
-        self.assertFormError(
-            response,
-            "form",
-            "email",
-            "有効なメールアドレスを入力してください。",
-        )
-        self.assertFalse(User.objects.exists())
-
-    def test_failure_post_with_too_short_password(self):
-        short_password_data = {
-            "username": "testuser",
-            "email": "testmail@email.com",
-            "password1": "short",
-            "password2": "short",
-        }
-
-        response = self.client.post(self.url, short_password_data)
-        self.assertEquals(response.status_code, 200)
-        self.assertFormError(
-            response,
-            "form",
-            "password2",
-            "このパスワードは短すぎます。最低 8 文字以上必要です。",
-        )
-        self.assertFalse(User.objects.exists())
-
-    def test_failure_post_with_password_similar_to_username(self):
-        password_similar_to_username_data = {
-            "username": "testuser",
-            "email": "testmail@email.com",
-            "password1": "testuserr",
-            "password2": "testuserr",
-        }
-
-        response = self.client.post(self.url, password_similar_to_username_data)
-        self.assertEquals(response.status_code, 200)
-        self.assertFormError(
-            response,
-            "form",
-            "password2",
-            "このパスワードは ユーザー名 と似すぎています。",
-        )
-        self.assertFalse(User.objects.exists())
-
-    def test_failure_post_with_only_numbers_password(self):
-        only_numbers_password_data = {
-            "username": "testuser",
-            "email": "testmail@email.com",
-            "password1": "84927274",
-            "password2": "84927274",
-        }
-
-        response = self.client.post(self.url, only_numbers_password_data)
-        self.assertEquals(response.status_code, 200)
-        self.assertFormError(
-            response,
-            "form",
-            "password2",
-            "このパスワードは数字しか使われていません。",
-        )
-        self.assertFalse(User.objects.exists())
-
-    def test_failure_post_with_mismatch_password(self):
-        mismatch_password_data = {
-            "username": "testuser",
-            "email": "testmail@email.com",
-            "password1": "firstpassword",
-            "password2": "secondpassword",
-        }
-
-        response = self.client.post(self.url, mismatch_password_data)
-        self.assertEquals(response.status_code, 200)
-        self.assertFormError(
-            response,
-            "form",
-            "password2",
-            "確認用パスワードが一致しません。",
-        )
-        self.assertFalse(User.objects.exists())
-
-
-class TestLoginView(TestCase):
-    def setUp(self):
-        self.user = User.objects.create_user(
-            username="testuser",
-            email="testemail@email.com",
-            password="testpassword",
-        )
-        self.url = reverse("accounts:login")
-
-    def test_success_get(self):
-        response = self.client.get(self.url)
-        self.assertEquals(response.status_code, 200)
-        self.assertTemplateUsed(response, "accounts/login.html")
-
-    def test_success_post(self):
-        data = {
-            "username": "testuser",
-            "password": "testpassword",
-        }
-        response = self.client.post(self.url, data)
-        self.assertRedirects(
-            response,
-            reverse(settings.LOGIN_REDIRECT_URL),
-            status_code=302,
-            target_status_code=200,
-        )
-
-        self.assertIn(SESSION_KEY, self.client.session)
-
-    def test_failure_post_with_not_exists_user(self):
-        not_exist_user_data = {
-            "username": "hoge",
-            "password": "hogefugapiyo",
-        }
-        response = self.client.post(self.url, not_exist_user_data)
-        self.assertEquals(response.status_code, 200)
-        self.assertFormError(
-            response,
-            "form",
-            None,
-            "正しいユーザー名とパスワードを入力してください。どちらのフィールドも大文字と小文字は区別されます。",
-        )
-        self.assertNotIn(SESSION_KEY, self.client.session)
-
-    def test_failure_post_with_empty_password(self):
-        empty_password_user_data = {
-            "username": "testuser",
-            "password": "",
-        }
-        response = self.client.post(self.url, empty_password_user_data)
-        self.assertEquals(response.status_code, 200)
-        self.assertFormError(
-            response,
-            "form",
-            "password",
-            "このフィールドは必須です。",
-        )
-        self.assertNotIn(SESSION_KEY, self.client.session)
-
-
-class TestLogoutView(TestCase):
-    def setUp(self):
-        self.user = User.objects.create_user(
-            username="testuser",
-            email="testemail@email.com",
-            password="testpassword",
-        )
-        self.client.login(username="testuser", password="testpassword")
-
-    def test_success_get(self):
-        response = self.client.get(reverse("accounts:logout"))
-        self.assertRedirects(
-            response,
-            reverse(settings.LOGOUT_REDIRECT_URL),
-            status_code=302,
-            target_status_code=200,
-        )
-        self.assertNotIn(SESSION_KEY, self.client.session)
-
-
-class TestUserProfileView(TestCase):
-    def setUp(self):
-        self.user = User.objects.create_user(
-            username="testuser",
-            email="testemail@email.com",
-            password="testpassword",
-        )
-        self.user2 = User.objects.create_user(
-            username="testuser2",
-            email="testemail2@email.com",
-            password="testpassword2",
-        )
-        self.user3 = User.objects.create_user(
-            username="testuser3",
-            email="testemail3@email.com",
-            password="testpassword3",
-        )
-        self.client.login(username="testuser", password="testpassword")
-        Tweet.objects.create(
-            user=self.user,
-            content="test_tweet1",
-        )
-        Tweet.objects.create(
-            user=self.user,
-            content="test_tweet2",
-        )
-        FriendShip.objects.create(followee=self.user2, follower=self.user)
-        FriendShip.objects.create(followee=self.user3, follower=self.user)
-        FriendShip.objects.create(followee=self.user, follower=self.user2)
-
-    def test_success_get(self):
-        response = self.client.get(
-            reverse("accounts:user_profile", kwargs={"username": self.user.username})
-        )
-        self.assertTemplateUsed(response, "accounts/profile.html")
-        self.assertQuerysetEqual(
-            response.context["tweets"],
-            Tweet.objects.filter(user=self.user).order_by("-created_at"),
-        )
-        self.assertEquals(
-            response.context["following_count"],
-            FriendShip.objects.filter(follower=self.user).count(),
-        )
-        self.assertEquals(
-            response.context["follower_count"],
-            FriendShip.objects.filter(followee=self.user).count(),
-        )
-
-
-class TestUserProfileEditView(TestCase):
-    def test_success_get(self):
-        pass
-
-    def test_success_post(self):
-        pass
-
-    def test_failure_post_with_not_exists_user(self):
-        pass
-
-    def test_failure_post_with_incorrect_user(self):
-        pass
-
-
-class TestFollowView(TestCase):
-    def setUp(self):
-        self.user = User.objects.create_user(
-            username="testuser",
-            email="testemail@email.com",
-            password="testpassword",
-        )
-        self.user2 = User.objects.create_user(
-            username="testuser2",
-            email="testemail2@email.com",
-            password="testpassword2",
-        )
-        self.client.login(username="testuser", password="testpassword")
-
-    def test_success_post(self):
-        response = self.client.post(
-            reverse("accounts:follow", kwargs={"username": self.user2.username})
-        )
-        self.assertRedirects(
-            response,
-            reverse("tweets:home"),
-            status_code=302,
-            target_status_code=200,
-        )
-        self.assertTrue(
-            FriendShip.objects.filter(followee=self.user2, follower=self.user).exists()
-        )
-
-    def test_failure_post_with_not_exist_user(self):
-        response = self.client.post(
-            reverse("accounts:follow", kwargs={"username": "hoge"})
-        )
-        self.assertEquals(response.status_code, 404)
-        messages = list(get_messages(response.wsgi_request))
-        message = str(messages[0])
-        self.assertEquals(message, "指定されたユーザーは存在しません。")
-        self.assertFalse(
-            FriendShip.objects.filter(
-                followee__username="hoge", follower=self.user
-            ).exists()
-        )
-
-    def test_failure_post_with_self(self):
-        response = self.client.post(
-            reverse("accounts:follow", kwargs={"username": self.user.username})
-        )
-        self.assertEquals(response.status_code, 200)
-        messages = list(get_messages(response.wsgi_request))
-        message = str(messages[0])
-        self.assertEquals(message, "自分自身はフォローできません。")
-        self.assertFalse(
-            FriendShip.objects.filter(followee=self.user, follower=self.user).exists()
-        )
-
-
-class TestUnfollowView(TestCase):
-    def setUp(self):
-        self.user = User.objects.create_user(
-            username="testuser",
-            email="testemail@email.com",
-            password="testpassword",
-        )
-        self.user2 = User.objects.create_user(
-            username="testuser2",
-            email="testemail2@email.com",
-            password="testpassword2",
-        )
-        self.client.login(username="testuser", password="testpassword")
-        FriendShip.objects.create(followee=self.user2, follower=self.user)
-
-    def test_success_post(self):
-        response = self.client.post(
-            reverse("accounts:unfollow", kwargs={"username": self.user2.username})
-        )
-        self.assertRedirects(
-            response,
-            reverse("tweets:home"),
-            status_code=302,
-            target_status_code=200,
-        )
-        self.assertFalse(
-            FriendShip.objects.filter(followee=self.user2, follower=self.user).exists()
-        )
-
-    def test_failure_post_with_not_exist_user(self):
-        response = self.client.post(
-            reverse("accounts:unfollow", kwargs={"username": "hoge"})
-        )
-        self.assertEquals(response.status_code, 404)
-        messages = list(get_messages(response.wsgi_request))
-        message = str(messages[0])
-        self.assertEquals(message, "指定されたユーザーは存在しません。")
-        self.assertTrue(
-            FriendShip.objects.filter(followee=self.user2, follower=self.user).exists()
-        )
-
-    def test_failure_post_with_incorrect_user(self):
-        response = self.client.post(
-            reverse("accounts:unfollow", kwargs={"username": self.user.username})
-        )
-        self.assertEquals(response.status_code, 200)
-        messages = list(get_messages(response.wsgi_request))
-        message = str(messages[0])
-        self.assertEquals(message, "自分自身のフォローを外すことはできません。")
-        self.assertTrue(
-            FriendShip.objects.filter(followee=self.user2, follower=self.user).exists()
-        )
-
-
-class TestFollowingListView(TestCase):
-    def setUp(self):
-        self.user = User.objects.create_user(
-            username="testuser",
-            email="testemail@email.com",
-            password="testpassword",
-        )
-        self.client.login(username="testuser", password="testpassword")
-
-    def test_success_get(self):
-        response = self.client.get(
-            reverse("accounts:following_list", kwargs={"username": self.user.username})
-        )
-        self.assertEquals(response.status_code, 200)
-        self.assertTemplateUsed(response, "accounts/following_list.html")
-
-
-class TestFollowerListView(TestCase):
-    def setUp(self):
-        self.user = User.objects.create_user(
-            username="testuser",
-            email="testemail@email.com",
-            password="testpassword",
-        )
-        self.client.login(username="testuser", password="testpassword")
-
-    def test_success_get(self):
-        response = self.client.get(
-            reverse("accounts:follower_list", kwargs={"username": self.user.username})
-        )
-        self.assertEquals(response.status_code, 200)
-        self.assertTemplateUsed(response, "accounts/follower_list.html")
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from django.contrib.messages import get_messages
+from django.contrib.auth import SESSION_KEY
+
+from mysite import settings
+from tweets.models import Retweet, Tweet
+from . import relationships
+from .models import Block, FriendShip, Mute, User
+
+
+class TestSignUpView(TestCase):
+    def setUp(self):
+        self.url = reverse("accounts:signup")
+
+    def test_success_get(self):
+        response = self.client.get(self.url)
+        self.assertEquals(response.status_code, 200)
+        self.assertTemplateUsed(response, "accounts/sign_up.html")
+
+    def test_success_post(self):
+        user_data = {
+            "username": "testuser",
+            "email": "testmail@email.com",
+            "password1": "testpassword",
+            "password2": "testpassword",
+        }
+
+        response = self.client.post(self.url, user_data)
+        self.assertRedirects(
+            response,
+            reverse(settings.LOGIN_REDIRECT_URL),
+            status_code=302,
+            target_status_code=200,
+        )
+
+        self.assertTrue(
+            User.objects.filter(
+                username=user_data["username"],
+                email=user_data["email"],
+            ).exists()
+        )
+
+        self.assertIn(SESSION_KEY, self.client.session)
+
+    def test_failure_post_with_empty_form(self):
+        empty_data = {
+            "username": "",
+            "email": "",
+            "password1": "",
+            "password2": "",
+        }
+
+        response = self.client.post(self.url, empty_data)
+        self.assertEquals(response.status_code, 200)
+        self.assertFormError(
+            response,
+            "form",
+            "username",
+            "このフィールドは必須です。",
+        )
+        self.assertFormError(
+            response,
+            "form",
+            "email",
+            "このフィールドは必須です。",
+        )
+        self.assertFormError(
+            response,
+            "form",
+            "password1",
+            "このフィールドは必須です。",
+        )
+        self.assertFormError(
+            response,
+            "form",
+            "password2",
+            "このフィールドは必須です。",
+        )
+        self.assertFalse(User.objects.exists())
+
+    def test_failure_post_with_empty_username(self):
+        username_empty_data = {
+            "username": "",
+            "email": "testmail@email.com",
+            "password1": "testpassword",
+            "password2": "testpassword",
+        }
+
+        response = self.client.post(self.url, username_empty_data)
+        self.assertEquals(response.status_code, 200)
+        self.assertFormError(
+            response,
+            "form",
+            "username",
+            "このフィールドは必須です。",
+        )
+        self.assertFalse(User.objects.exists())
+
+    def test_failure_post_with_empty_email(self):
+        email_empty_data = {
+            "username": "testuser",
+            "email": "",
+            "password1": "testpassword",
+            "password2": "testpassword",
+        }
+
+        response = self.client.post(self.url, email_empty_data)
+        self.assertEquals(response.status_code, 200)
+        self.assertFormError(
+            response,
+            "form",
+            "email",
+            "このフィールドは必須です。",
+        )
+        self.assertFalse(User.objects.exists())
+
+    def test_failure_post_with_empty_password(self):
+        password_empty_data = {
+            "username": "testuser",
+            "email": "testmail@email.com",
+            "password1": "",
+            "password2": "",
+        }
+
+        response = self.client.post(self.url, password_empty_data)
+        self.assertEquals(response.status_code, 200)
+        self.assertFormError(
+            response,
+            "form",
+            "password1",
+            "このフィールドは必須です。",
+        )
+        self.assertFormError(
+            response,
+            "form",
+            "password2",
+            "このフィールドは必須です。",
+        )
+        self.assertFalse(User.objects.exists())
+
+    def test_failure_post_with_duplicated_user(self):
+        duplicated_data = {
+            "username": "testuser",
+            "email": "testmail@email.com",
+            "password1": "testpassword",
+            "password2": "testpassword",
+        }
+
+        User.objects.create_user(
+            username="testuser",
+            email="testemail@email.com",
+            password="testpassword",
+        )
+        response = self.client.post(self.url, duplicated_data)
+        self.assertEquals(response.status_code, 200)
+        self.assertFormError(
+            response,
+            "form",
+            "username",
+            "同じユーザー名が既に登録済みです。",
+        )
+        self.assertTrue(User.objects.count(), 1)
+
+    def test_failure_post_with_invalid_email(self):
+        invalid_email_data = {
+            "username": "testuser",
+            "email": "test",
+            "password1": "testpassword",
+            "password2": "testpassword",
+        }
+
+        response = self.client.post(self.url, invalid_email_data)
+        self.assertEquals(response.status_code, 200)
+        self.assertFormError(
+            response,
+            "form",
+            "email",
+            "有効なメールアドレスを入力してください。",
+        )
+        self.assertFalse(User.objects.exists())
+
+    def test_failure_post_with_too_short_password(self):
+        short_password_data = {
+            "username": "testuser",
+            "email": "testmail@email.com",
+            "password1": "short",
+            "password2": "short",
+        }
+
+        response = self.client.post(self.url, short_password_data)
+        self.assertEquals(response.status_code, 200)
+        self.assertFormError(
+            response,
+            "form",
+            "password2",
+            "このパスワードは短すぎます。最低 8 文字以上必要です。",
+        )
+        self.assertFalse(User.objects.exists())
+
+    def test_failure_post_with_password_similar_to_username(self):
+        password_similar_to_username_data = {
+            "username": "testuser",
+            "email": "testmail@email.com",
+            "password1": "testuserr",
+            "password2": "testuserr",
+        }
+
+        response = self.client.post(self.url, password_similar_to_username_data)
+        self.assertEquals(response.status_code, 200)
+        self.assertFormError(
+            response,
+            "form",
+            "password2",
+            "このパスワードは ユーザー名 と似すぎています。",
+        )
+        self.assertFalse(User.objects.exists())
+
+    def test_failure_post_with_only_numbers_password(self):
+        only_numbers_password_data = {
+            "username": "testuser",
+            "email": "testmail@email.com",
+            "password1": "84927274",
+            "password2": "84927274",
+        }
+
+        response = self.client.post(self.url, only_numbers_password_data)
+        self.assertEquals(response.status_code, 200)
+        self.assertFormError(
+            response,
+            "form",
+            "password2",
+            "このパスワードは数字しか使われていません。",
+        )
+        self.assertFalse(User.objects.exists())
+
+    def test_failure_post_with_mismatch_password(self):
+        mismatch_password_data = {
+            "username": "testuser",
+            "email": "testmail@email.com",
+            "password1": "firstpassword",
+            "password2": "secondpassword",
+        }
+
+        response = self.client.post(self.url, mismatch_password_data)
+        self.assertEquals(response.status_code, 200)
+        self.assertFormError(
+            response,
+            "form",
+            "password2",
+            "確認用パスワードが一致しません。",
+        )
+        self.assertFalse(User.objects.exists())
+
+
+class TestLoginView(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="testuser",
+            email="testemail@email.com",
+            password="testpassword",
+        )
+        self.url = reverse("accounts:login")
+
+    def test_success_get(self):
+        response = self.client.get(self.url)
+        self.assertEquals(response.status_code, 200)
+        self.assertTemplateUsed(response, "accounts/login.html")
+
+    def test_success_post(self):
+        data = {
+            "username": "testuser",
+            "password": "testpassword",
+        }
+        response = self.client.post(self.url, data)
+        self.assertRedirects(
+            response,
+            reverse(settings.LOGIN_REDIRECT_URL),
+            status_code=302,
+            target_status_code=200,
+        )
+
+        self.assertIn(SESSION_KEY, self.client.session)
+
+    def test_failure_post_with_not_exists_user(self):
+        not_exist_user_data = {
+            "username": "hoge",
+            "password": "hogefugapiyo",
+        }
+        response = self.client.post(self.url, not_exist_user_data)
+        self.assertEquals(response.status_code, 200)
+        self.assertFormError(
+            response,
+            "form",
+            None,
+            "正しいユーザー名とパスワードを入力してください。どちらのフィールドも大文字と小文字は区別されます。",
+        )
+        self.assertNotIn(SESSION_KEY, self.client.session)
+
+    def test_failure_post_with_empty_password(self):
+        empty_password_user_data = {
+            "username": "testuser",
+            "password": "",
+        }
+        response = self.client.post(self.url, empty_password_user_data)
+        self.assertEquals(response.status_code, 200)
+        self.assertFormError(
+            response,
+            "form",
+            "password",
+            "このフィールドは必須です。",
+        )
+        self.assertNotIn(SESSION_KEY, self.client.session)
+
+
+class TestLogoutView(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="testuser",
+            email="testemail@email.com",
+            password="testpassword",
+        )
+        self.client.login(username="testuser", password="testpassword")
+
+    def test_success_get(self):
+        response = self.client.get(reverse("accounts:logout"))
+        self.assertRedirects(
+            response,
+            reverse(settings.LOGOUT_REDIRECT_URL),
+            status_code=302,
+            target_status_code=200,
+        )
+        self.assertNotIn(SESSION_KEY, self.client.session)
+
+
+class TestUserProfileView(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username="testuser",
+            email="testemail@email.com",
+            password="testpassword",
+        )
+        self.user2 = User.objects.create_user(
+            username="testuser2",
+            email="testemail2@email.com",
+            password="testpassword2",
+        )
+        self.user3 = User.objects.create_user(
+            username="testuser3",
+            email="testemail3@email.com",
+            password="testpassword3",
+        )
+        self.client.login(username="testuser", password="testpassword")
+        Tweet.objects.create(
+            user=self.user,
+            content="test_tweet1",
+        )
+        Tweet.objects.create(
+            user=self.user,
+            content="test_tweet2",
+        )
+        FriendShip.objects.create(followee=self.user2, follower=self.user)
+        FriendShip.objects.create(followee=self.user3, follower=self.user)
+        FriendShip.objects.create(followee=self.user, follower=self.user2)
+
+    def test_success_get(self):
+        response = self.client.get(
+            reverse("accounts:user_profile", kwargs={"username": self.user.username})
+        )
+        self.assertTemplateUsed(response, "accounts/profile.html")
+        self.assertQuerysetEqual(
+            response.context["tweets"],
+            Tweet.objects.filter(user=self.user).order_by("-created_at"),
+        )
+        self.assertEquals(
+            response.context["following_count"],
+            FriendShip.objects.filter(follower=self.user).count(),
+        )
+        self.assertEquals(
+            response.context["follower_count"],
+            FriendShip.objects.filter(followee=self.user).count(),
+        )
+
+    def test_success_get_other_user(self):
+        response = self.client.get(
+            reverse("accounts:user_profile", kwargs={"username": self.user2.username})
+        )
+        self.assertTrue(response.context["connection_exists"])
+        self.assertTrue(response.context["followed_by"])
+
+    def test_success_get_modified_after_retweeted_author_renamed(self):
+        tweet = Tweet.objects.create(user=self.user2, content="retweeted")
+        Retweet.objects.set_state(self.user, tweet.pk, True)
+        url = reverse("accounts:user_profile", kwargs={"username": self.user.username})
+        self.client.get(url)
+        etag = self.client.get(url)["ETag"]
+        # Users not shown on the page leave it unmodified.
+        with self.captureOnCommitCallbacks(execute=True):
+            User.objects.create(username="newcomer")
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEquals(response.status_code, 304)
+        self.user2.username = "renamed"
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user2.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEquals(response.status_code, 200)
+        self.assertContains(response, "renamed")
+
+
+class TestUserProfileEditView(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username="testuser",
+            email="testemail@email.com",
+            password="testpassword",
+        )
+        self.user2 = User.objects.create_user(
+            username="testuser2",
+            email="testemail2@email.com",
+            password="testpassword2",
+        )
+        self.client.login(username="testuser", password="testpassword")
+        self.url = reverse(
+            "accounts:user_profile_edit", kwargs={"username": self.user.username}
+        )
+        self.data = {
+            "username": "renamed",
+            "birth_date": "2000-01-01",
+            "self_introduction": "hello",
+        }
+
+    def test_success_get(self):
+        response = self.client.get(self.url)
+        self.assertEquals(response.status_code, 200)
+        self.assertTemplateUsed(response, "accounts/profile_edit.html")
+
+    def test_success_post(self):
+        tweet = Tweet.objects.create(user=self.user, content="test_tweet")
+        detail_url = reverse("tweets:detail", kwargs={"pk": tweet.pk})
+        self.client.get(detail_url)
+        etag = self.client.get(detail_url)["ETag"]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(self.url, self.data)
+        self.assertRedirects(
+            response,
+            reverse("accounts:user_profile", kwargs={"username": "renamed"}),
+            status_code=302,
+            target_status_code=200,
+        )
+        self.user.refresh_from_db()
+        self.assertEquals(self.user.username, "renamed")
+        self.assertEquals(str(self.user.birth_date), "2000-01-01")
+        self.assertEquals(self.user.self_introduction, "hello")
+
+        response = self.client.get(detail_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEquals(response.status_code, 200)
+        self.assertEquals(response.context["tweet"].user.username, "renamed")
+
+    def test_success_post_with_non_slug_username(self):
+        self.data["username"] = "テスト.user@example+1"
+        response = self.client.post(self.url, self.data)
+        self.assertRedirects(
+            response,
+            reverse(
+                "accounts:user_profile", kwargs={"username": self.data["username"]}
+            ),
+            status_code=302,
+            target_status_code=200,
+        )
+
+    def test_failure_post_with_not_exists_user(self):
+        url = reverse("accounts:user_profile_edit", kwargs={"username": "hoge"})
+        response = self.client.post(url, self.data)
+        self.assertEquals(response.status_code, 404)
+
+    def test_failure_post_with_incorrect_user(self):
+        url = reverse(
+            "accounts:user_profile_edit", kwargs={"username": self.user2.username}
+        )
+        response = self.client.post(url, self.data)
+        self.assertEquals(response.status_code, 403)
+        self.user2.refresh_from_db()
+        self.assertEquals(self.user2.username, "testuser2")
+
+
+class TestFollowView(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username="testuser",
+            email="testemail@email.com",
+            password="testpassword",
+        )
+        self.user2 = User.objects.create_user(
+            username="testuser2",
+            email="testemail2@email.com",
+            password="testpassword2",
+        )
+        self.client.login(username="testuser", password="testpassword")
+
+    def test_success_post(self):
+        response = self.client.post(
+            reverse("accounts:follow", kwargs={"username": self.user2.username})
+        )
+        self.assertRedirects(
+            response,
+            reverse("tweets:home"),
+            status_code=302,
+            target_status_code=200,
+        )
+        self.assertTrue(
+            FriendShip.objects.filter(followee=self.user2, follower=self.user).exists()
+        )
+
+    def test_failure_post_with_not_exist_user(self):
+        response = self.client.post(
+            reverse("accounts:follow", kwargs={"username": "hoge"})
+        )
+        self.assertEquals(response.status_code, 404)
+        messages = list(get_messages(response.wsgi_request))
+        message = str(messages[0])
+        self.assertEquals(message, "指定されたユーザーは存在しません。")
+        self.assertFalse(
+            FriendShip.objects.filter(
+                followee__username="hoge", follower=self.user
+            ).exists()
+        )
+
+    def test_failure_post_with_self(self):
+        response = self.client.post(
+            reverse("accounts:follow", kwargs={"username": self.user.username})
+        )
+        self.assertEquals(response.status_code, 200)
+        messages = list(get_messages(response.wsgi_request))
+        message = str(messages[0])
+        self.assertEquals(message, "自分自身はフォローできません。")
+        self.assertFalse(
+            FriendShip.objects.filter(followee=self.user, follower=self.user).exists()
+        )
+
+
+class TestUnfollowView(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username="testuser",
+            email="testemail@email.com",
+            password="testpassword",
+        )
+        self.user2 = User.objects.create_user(
+            username="testuser2",
+            email="testemail2@email.com",
+            password="testpassword2",
+        )
+        self.client.login(username="testuser", password="testpassword")
+        FriendShip.objects.create(followee=self.user2, follower=self.user)
+
+    def test_success_post(self):
+        response = self.client.post(
+            reverse("accounts:unfollow", kwargs={"username": self.user2.username})
+        )
+        self.assertRedirects(
+            response,
+            reverse("tweets:home"),
+            status_code=302,
+            target_status_code=200,
+        )
+        self.assertFalse(
+            FriendShip.objects.filter(followee=self.user2, follower=self.user).exists()
+        )
+
+    def test_failure_post_with_not_exist_user(self):
+        response = self.client.post(
+            reverse("accounts:unfollow", kwargs={"username": "hoge"})
+        )
+        self.assertEquals(response.status_code, 404)
+        messages = list(get_messages(response.wsgi_request))
+        message = str(messages[0])
+        self.assertEquals(message, "指定されたユーザーは存在しません。")
+        self.assertTrue(
+            FriendShip.objects.filter(followee=self.user2, follower=self.user).exists()
+        )
+
+    def test_failure_post_with_incorrect_user(self):
+        response = self.client.post(
+            reverse("accounts:unfollow", kwargs={"username": self.user.username})
+        )
+        self.assertEquals(response.status_code, 200)
+        messages = list(get_messages(response.wsgi_request))
+        message = str(messages[0])
+        self.assertEquals(message, "自分自身のフォローを外すことはできません。")
+        self.assertTrue(
+            FriendShip.objects.filter(followee=self.user2, follower=self.user).exists()
+        )
+
+
+class TestFollowingListView(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="testuser",
+            email="testemail@email.com",
+            password="testpassword",
+        )
+        self.client.login(username="testuser", password="testpassword")
+
+    def test_success_get(self):
+        response = self.client.get(
+            reverse("accounts:following_list", kwargs={"username": self.user.username})
+        )
+        self.assertEquals(response.status_code, 200)
+        self.assertTemplateUsed(response, "accounts/following_list.html")
+
+
+class TestFollowerListView(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="testuser",
+            email="testemail@email.com",
+            password="testpassword",
+        )
+        self.client.login(username="testuser", password="testpassword")
+
+    def test_success_get(self):
+        response = self.client.get(
+            reverse("accounts:follower_list", kwargs={"username": self.user.username})
+        )
+        self.assertEquals(response.status_code, 200)
+        self.assertTemplateUsed(response, "accounts/follower_list.html")
+
+
+class TestFriendShipAdmin(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_superuser(
+            username="admin",
+            email="admin@email.com",
+            password="adminpassword",
+        )
+        self.user2 = User.objects.create_user(
+            username="testuser2",
+            email="testemail2@email.com",
+            password="testpassword2",
+        )
+        self.client.login(username="admin", password="adminpassword")
+        FriendShip.objects.create(followee=self.user2, follower=self.user)
+
+    def test_success_get_changelist(self):
+        response = self.client.get(reverse("admin:accounts_friendship_changelist"))
+        self.assertEquals(response.status_code, 200)
+        self.assertContains(response, "testuser2")
+
+    def test_success_get_user_autocomplete(self):
+        response = self.client.get(
+            reverse("admin:autocomplete"),
+            {
+                "term": "test",
+                "app_label": "tweets",
+                "model_name": "tweet",
+                "field_name": "user",
+            },
+        )
+        self.assertEquals(response.status_code, 200)
+        self.assertContains(response, "testuser2")
+
+
+class TestRelationships(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(username="testuser")
+        self.user2 = User.objects.create(username="testuser2")
+        self.user3 = User.objects.create(username="testuser3")
+        FriendShip.objects.create(followee=self.user2, follower=self.user)
+        FriendShip.objects.create(followee=self.user, follower=self.user2)
+        FriendShip.objects.create(followee=self.user3, follower=self.user)
+
+    def test_follows(self):
+        self.assertTrue(relationships.follows(self.user.pk, self.user2.pk))
+        self.assertFalse(relationships.follows(self.user3.pk, self.user.pk))
+        with self.assertNumQueries(0):
+            self.assertTrue(relationships.follows(self.user.pk, self.user3.pk))
+
+    def test_is_mutual(self):
+        self.assertTrue(relationships.is_mutual(self.user.pk, self.user2.pk))
+        self.assertFalse(relationships.is_mutual(self.user.pk, self.user3.pk))
+
+    def test_following_among(self):
+        ids = [self.user2.pk, self.user3.pk, 7274]
+        self.assertEquals(
+            relationships.following_among(self.user.pk, ids),
+            {self.user2.pk, self.user3.pk},
+        )
+
+    def test_follow_and_unfollow_keep_cache_in_sync(self):
+        self.assertFalse(relationships.follows(self.user3.pk, self.user.pk))
+        self.assertTrue(relationships.follow(self.user3, self.user))
+        self.assertFalse(relationships.follow(self.user3, self.user))
+        self.assertTrue(relationships.follows(self.user3.pk, self.user.pk))
+        self.assertTrue(relationships.unfollow(self.user3, self.user))
+        self.assertFalse(relationships.unfollow(self.user3, self.user))
+        self.assertFalse(relationships.follows(self.user3.pk, self.user.pk))
+
+    def test_cache_follows_rows_changed_directly(self):
+        self.assertFalse(relationships.follows(self.user3.pk, self.user.pk))
+        friendship = FriendShip.objects.create(followee=self.user, follower=self.user3)
+        self.assertTrue(relationships.follows(self.user3.pk, self.user.pk))
+        friendship.delete()
+        self.assertFalse(relationships.follows(self.user3.pk, self.user.pk))
+        self.assertTrue(relationships.follows(self.user.pk, self.user2.pk))
+        self.user2.delete()
+        self.assertEquals(
+            list(relationships.following_ids(self.user.pk)), [self.user3.pk]
+        )
+
+
+class TestUserProfileConditionalGet(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username="testuser",
+            email="testemail@email.com",
+            password="testpassword",
+        )
+        self.user2 = User.objects.create(username="testuser2")
+        self.client.login(username="testuser", password="testpassword")
+        self.url = reverse(
+            "accounts:user_profile", kwargs={"username": self.user2.username}
+        )
+
+    def test_success_get_not_modified(self):
+        # The first response sets the CSRF cookie, which is part of the ETag.
+        self.client.get(self.url)
+        etag = self.client.get(self.url)["ETag"]
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEquals(response.status_code, 304)
+
+    def test_success_get_modified_after_follow(self):
+        etag = self.client.get(self.url)["ETag"]
+        self.client.post(
+            reverse("accounts:follow", kwargs={"username": self.user2.username})
+        )
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEquals(response.status_code, 200)
+        self.assertTrue(response.context["connection_exists"])
+
+    def test_success_get_modified_after_new_tweet(self):
+        etag = self.client.get(self.url)["ETag"]
+        self.client.force_login(self.user2)
+        self.client.post(reverse("tweets:create"), {"content": "new_tweet"})
+        self.client.force_login(self.user)
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEquals(response.status_code, 200)
+
+
+class TestBlockAndMute(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username="testuser",
+            email="testemail@email.com",
+            password="testpassword",
+        )
+        self.user2 = User.objects.create(username="testuser2")
+        self.user3 = User.objects.create(username="testuser3")
+        self.client.login(username="testuser", password="testpassword")
+        self.tweet2 = Tweet.objects.create(user=self.user2, content="tweet2")
+        self.tweet3 = Tweet.objects.create(user=self.user3, content="tweet3")
+
+    def home_tweets(self):
+        return list(self.client.get(reverse("tweets:home")).context["tweets"])
+
+    def test_success_block(self):
+        relationships.follow(self.user, self.user2)
+        relationships.follow(self.user2, self.user)
+        self.assertEquals(self.home_tweets(), [self.tweet3, self.tweet2])
+
+        response = self.client.post(
+            reverse("accounts:block", kwargs={"username": self.user2.username})
+        )
+        self.assertRedirects(response, reverse("tweets:home"))
+        self.assertTrue(Block.objects.filter(blocker=self.user, blocked=self.user2))
+        self.assertFalse(FriendShip.objects.exists())
+        self.assertEquals(self.home_tweets(), [self.tweet3])
+
+        response = self.client.get(
+            reverse("accounts:user_profile", kwargs={"username": self.user2.username})
+        )
+        self.assertEquals(response.context["tweets"], [])
+        self.assertTrue(response.context["blocking"])
+
+        self.client.post(
+            reverse("accounts:unblock", kwargs={"username": self.user2.username})
+        )
+        self.assertEquals(self.home_tweets(), [self.tweet3, self.tweet2])
+
+    def test_blocked_user_cannot_follow_or_like(self):
+        relationships.block(self.user2, self.user)
+        self.assertEquals(self.home_tweets(), [self.tweet3])
+        self.client.post(
+            reverse("accounts:follow", kwargs={"username": self.user2.username})
+        )
+        self.assertFalse(FriendShip.objects.exists())
+        response = self.client.post(
+            reverse("tweets:like", kwargs={"pk": self.tweet2.pk})
+        )
+        self.assertEquals(response.status_code, 403)
+
+    def test_success_mute(self):
+        response = self.client.post(
+            reverse("accounts:mute", kwargs={"username": self.user3.username})
+        )
+        self.assertRedirects(response, reverse("tweets:home"))
+        self.assertTrue(Mute.objects.filter(muter=self.user, muted=self.user3))
+        self.assertEquals(self.home_tweets(), [self.tweet2])
+        # Muted users' own profiles stay readable.
+        response = self.client.get(
+            reverse("accounts:user_profile", kwargs={"username": self.user3.username})
+        )
+        self.assertEquals(list(response.context["tweets"]), [self.tweet3])
+
+        self.client.post(
+            reverse("accounts:unmute", kwargs={"username": self.user3.username})
+        )
+        self.assertEquals(self.home_tweets(), [self.tweet3, self.tweet2])
+
+    def test_follower_list_excludes_hidden(self):
+        relationships.follow(self.user2, self.user3)
+        relationships.follow(self.user, self.user3)
+        relationships.mute(self.user, self.user2)
+        response = self.client.get(
+            reverse("accounts:follower_list", kwargs={"username": self.user3.username})
+        )
+        self.assertEquals(
+            [f.follower for f in response.context["follower_list"]], [self.user]
+        )
+
+    def test_failure_block_self(self):
+        self.client.post(
+            reverse("accounts:block", kwargs={"username": self.user.username})
+        )
+        self.assertFalse(Block.objects.exists())
+
+    def test_failure_block_not_exists_user(self):
+        response = self.client.post(
+            reverse("accounts:block", kwargs={"username": "hoge"})
+        )
+        self.assertEquals(response.status_code, 404)
@@ -1,28 +1,37 @@
-from django.contrib.auth import views as auth_views
-from django.urls import path
-
-from . import views
-
-app_name = "accounts"
-urlpatterns = [
-    path("signup/", views.SignUpView.as_view(), name="signup"),
-    path(
-        "login/",
-        auth_views.LoginView.as_view(template_name="accounts/login.html"),
-        name="login",
-    ),
-    path("logout/", auth_views.LogoutView.as_view(), name="logout"),
-    path("<slug:username>/", views.UserProfileView.as_view(), name="user_profile"),
-    path("<str:username>/follow/", views.FollowView.as_view(), name="follow"),
-    path("<str:username>/unfollow/", views.UnFollowView.as_view(), name="unfollow"),
-    path(
-        "<str:username>/following_list/",
-        views.FollowingListView.as_view(),
-        name="following_list",
-    ),
-    path(
-        "<str:username>/follower_list/",
-        views.FollowerListView.as_view(),
-        name="follower_list",
-    ),
-]
+from django.contrib.auth import views as auth_views
+from django.urls import path
+
+from . import views
+
+app_name = "accounts"
+urlpatterns = [
+    path("signup/", views.SignUpView.as_view(), name="signup"),
+    path(
+        "login/",
+        auth_views.LoginView.as_view(template_name="accounts/login.html"),
+        name="login",
+    ),
+    path("logout/", auth_views.LogoutView.as_view(), name="logout"),
+    path("<str:username>/", views.UserProfileView.as_view(), name="user_profile"),
+    path(
+        "<str:username>/edit/",
+        views.UserProfileEditView.as_view(),
+        name="user_profile_edit",
+    ),
+    path("<str:username>/follow/", views.FollowView.as_view(), name="follow"),
+    path("<str:username>/unfollow/", views.UnFollowView.as_view(), name="unfollow"),
+    path("<str:username>/block/", views.BlockView.as_view(), name="block"),
+    path("<str:username>/unblock/", views.UnblockView.as_view(), name="unblock"),
+    path("<str:username>/mute/", views.MuteView.as_view(), name="mute"),
+    path("<str:username>/unmute/", views.UnmuteView.as_view(), name="unmute"),
+    path(
+        "<str:username>/following_list/",
+        views.FollowingListView.as_view(),
+        name="following_list",
+    ),
+    path(
+        "<str:username>/follower_list/",
+        views.FollowerListView.as_view(),
+        name="follower_list",
+    ),
+]
@@ -1,130 +1,286 @@
-from django.contrib import messages
-from django.contrib.auth import authenticate, login
-from django.contrib.auth.mixins import LoginRequiredMixin
-from django.http import Http404, HttpResponseRedirect
-from django.shortcuts import get_object_or_404, render
-from django.urls import reverse, reverse_lazy
-from django.views.generic import CreateView, DetailView, ListView, View
-
-from tweets.models import Like, Tweet
-
-from .forms import SignUpForm
-from .models import FriendShip, User
-
-# Create your views here.
-
-
-class SignUpView(CreateView):
-    template_name = "accounts/sign_up.html"
-    form_class = SignUpForm
-    success_url = reverse_lazy("tweets:home")
-
-    def form_valid(self, form):
-        result = super().form_valid(form)
-        username = form.cleaned_data.get("username")
-        password = form.cleaned_data.get("password1")
-        user = authenticate(username=username, password=password)
-        login(self.request, user)
-        return result
-
-
-class UserProfileView(LoginRequiredMixin, DetailView):
-    model = User
-    template_name = "accounts/profile.html"
-    context_object_name = "user"
-    slug_field = "username"
-    slug_url_kwarg = "username"
-
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        user = self.object
-        context["tweets"] = (
-            Tweet.objects.select_related("user")
-            .filter(user=user)
-            .order_by("-created_at")
-        )
-        context["following_count"] = FriendShip.objects.filter(follower=user).count()
-        context["follower_count"] = FriendShip.objects.filter(followee=user).count()
-        context["connection_exists"] = FriendShip.objects.filter(
-            follower=self.request.user, followee=user
-        ).exists()
-        context["liked_list"] = Like.objects.filter(user=self.request.user).values_list(
-            "tweet", flat=True
-        )
-        return context
-
-
-class FollowView(LoginRequiredMixin, View):
-    def post(self, request, *args, **kwargs):
-        follower = self.request.user
-        try:
-            followee = User.objects.get(username=self.kwargs["username"])
-        except User.DoesNotExist:
-            messages.warning(request, "指定されたユーザーは存在しません。")
-            raise Http404
-
-        if follower == followee:
-            messages.warning(request, "自分自身はフォローできません。")
-            return render(request, "tweets/home.html")
-        elif FriendShip.objects.filter(follower=follower, followee=followee).exists():
-            messages.warning(request, f"あなたは{ followee.username }をすでにフォローしています。")
-            return render(request, "tweets/home.html")
-        else:
-            FriendShip.objects.create(follower=follower, followee=followee)
-            messages.success(request, f"{ followee.username }をフォローしました。")
-            return HttpResponseRedirect(reverse("tweets:home"))
-
-
-class UnFollowView(LoginRequiredMixin, View):
-    def post(self, request, *args, **kwargs):
-        follower = self.request.user
-        try:
-            followee = User.objects.get(username=self.kwargs["username"])
-        except User.DoesNotExist:
-            messages.warning(request, "指定されたユーザーは存在しません。")
-            raise Http404
-
-        if follower == followee:
-            messages.warning(request, "自分自身のフォローを外すことはできません。")
-            return render(request, "tweets/home.html")
-        elif FriendShip.objects.filter(follower=follower, followee=followee).exists():
-            FriendShip.objects.filter(follower=follower, followee=followee).delete()
-            messages.success(request, f"{ followee.username }のフォローを解除しました。")
-            return HttpResponseRedirect(reverse("tweets:home"))
-        else:
-            messages.warning(request, f"{followee.username}はフォローしていません")
-            return render(request, "tweets/home.html")
-
-
-class FollowingListView(LoginRequiredMixin, ListView):
-    template_name = "accounts/following_list.html"
-    model = FriendShip
-
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        username = self.kwargs["username"]
-        follower = get_object_or_404(User, username=username)
-        context["username"] = username
-        context["following_list"] = (
-            FriendShip.objects.select_related("follower")
-            .filter(follower=follower)
-            .order_by("-created_at")
-        )
-        return context
-
-
-class FollowerListView(LoginRequiredMixin, ListView):
-    template_name = "accounts/follower_list.html"
-    model = FriendShip
-
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        username = self.kwargs["username"]
-        followee = get_object_or_404(User, username=username)
-        context["username"] = username
-        context["follower_list"] = (
-            FriendShip.objects.select_related("followee")
-            .filter(followee=followee)
-            .order_by("-created_at")
-        )
-        return context
+from django.contrib import messages
+from django.contrib.auth import authenticate, login
+from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
+from django.http import Http404, HttpResponseRedirect
+from django.shortcuts import get_object_or_404, render
+from django.urls import reverse, reverse_lazy
+from django.utils.decorators import method_decorator
+from django.views.generic import CreateView, DetailView, ListView, UpdateView, View
+
+from core.conditional import conditional_page, viewer_etag
+from core.paginator import InvalidCursor
+from core.ratelimit import ratelimit
+from core.versioning import bump_version, get_version, get_versions
+from notifications.models import Notification, NotificationCounter
+from notifications.tasks import record_notification
+from tweets.models import Like
+from tweets.timelines import author_ids, user_timeline
+
+from . import relationships
+from .forms import ProfileEditForm, SignUpForm
+from .models import FriendShip, User
+
+# Create your views here.
+
+
+class SignUpView(CreateView):
+    template_name = "accounts/sign_up.html"
+    form_class = SignUpForm
+    success_url = reverse_lazy("tweets:home")
+
+    def form_valid(self, form):
+        result = super().form_valid(form)
+        username = form.cleaned_data.get("username")
+        password = form.cleaned_data.get("password1")
+        user = authenticate(username=username, password=password)
+        login(self.request, user)
+        return result
+
+
+def _profile_page(request, user):
+    """
+    The profile's timeline page, read once per request: the ETag covers its
+    authors and the view renders it. Raises InvalidCursor.
+    """
+    if not hasattr(request, "_profile_page"):
+        request._profile_page = user_timeline(
+            user, request.GET.get("cursor"), viewer=request.user
+        )
+    return request._profile_page
+
+
+def user_profile_etag(request, username):
+    user = User.objects.filter(username=username).first()
+    if user is None:
+        return None
+    try:
+        page = _profile_page(request, user)
+    except InvalidCursor:
+        return None
+    # Retweeted and quoted tweets show other authors.
+    authors = get_versions("author", author_ids(page.object_list) | {user.pk})
+    return viewer_etag(
+        request,
+        "profile",
+        user.pk,
+        get_version("user", user.pk),
+        sorted(authors.items()),
+        NotificationCounter.unread_for(request.user.pk),
+        request.GET.get("cursor", ""),
+    )
+
+
+@method_decorator(conditional_page(user_profile_etag), name="get")
+class UserProfileView(LoginRequiredMixin, DetailView):
+    model = User
+    template_name = "accounts/profile.html"
+    context_object_name = "user"
+    slug_field = "username"
+    slug_url_kwarg = "username"
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        user = self.object
+        viewer = self.request.user
+        context["blocking"] = relationships.blocks(viewer.pk, user.pk)
+        context["muting"] = relationships.mutes(viewer.pk, user.pk)
+        if context["blocking"] or relationships.blocks(user.pk, viewer.pk):
+            context["tweets"] = []
+            context["next_cursor"] = None
+        else:
+            try:
+                page = _profile_page(self.request, user)
+            except InvalidCursor:
+                raise Http404
+            context["tweets"] = page.object_list
+            context["next_cursor"] = page.next_cursor
+        context["following_count"] = len(relationships.following_ids(user.pk))
+        context["follower_count"] = FriendShip.objects.filter(followee=user).count()
+        context["connection_exists"] = relationships.follows(
+            self.request.user.pk, user.pk
+        )
+        context["followed_by"] = relationships.follows(user.pk, self.request.user.pk)
+        context["liked_list"] = Like.objects.filter(user=self.request.user).values_list(
+            "tweet", flat=True
+        )
+        return context
+
+
+class UserProfileEditView(LoginRequiredMixin, UserPassesTestMixin, UpdateView):
+    model = User
+    template_name = "accounts/profile_edit.html"
+    form_class = ProfileEditForm
+    slug_field = "username"
+    slug_url_kwarg = "username"
+
+    def get_object(self, queryset=None):
+        if not hasattr(self, "_user"):
+            self._user = super().get_object(queryset)
+        return self._user
+
+    def test_func(self):
+        return self.request.user.pk == self.get_object().pk
+
+    def form_valid(self, form):
+        response = super().form_valid(form)
+        # User.save() bumps the "author" version that cached tweet snapshots
+        # check; the profile page's ETag follows the "user" version.
+        bump_version("user", self.object.pk)
+        return response
+
+    def get_success_url(self):
+        return reverse(
+            "accounts:user_profile", kwargs={"username": self.object.username}
+        )
+
+
+@method_decorator(ratelimit("accounts:follow"), name="post")
+class FollowView(LoginRequiredMixin, View):
+    def post(self, request, *args, **kwargs):
+        follower = self.request.user
+        try:
+            followee = User.objects.get(username=self.kwargs["username"])
+        except User.DoesNotExist:
+            messages.warning(request, "指定されたユーザーは存在しません。")
+            raise Http404
+
+        if follower == followee:
+            messages.warning(request, "自分自身はフォローできません。")
+            return render(request, "tweets/home.html")
+        elif relationships.blocked_between(follower.pk, followee.pk):
+            messages.warning(request, f"{ followee.username }はフォローできません。")
+            return render(request, "tweets/home.html")
+        elif not relationships.follow(follower, followee):
+            messages.warning(
+                request, f"あなたは{ followee.username }をすでにフォローしています。"
+            )
+            return render(request, "tweets/home.html")
+        else:
+            record_notification.delay(followee.pk, follower.pk, Notification.FOLLOW)
+            messages.success(request, f"{ followee.username }をフォローしました。")
+            return HttpResponseRedirect(reverse("tweets:home"))
+
+
+@method_decorator(ratelimit("accounts:follow"), name="post")
+class UnFollowView(LoginRequiredMixin, View):
+    def post(self, request, *args, **kwargs):
+        follower = self.request.user
+        try:
+            followee = User.objects.get(username=self.kwargs["username"])
+        except User.DoesNotExist:
+            messages.warning(request, "指定されたユーザーは存在しません。")
+            raise Http404
+
+        if follower == followee:
+            messages.warning(request, "自分自身のフォローを外すことはできません。")
+            return render(request, "tweets/home.html")
+        elif relationships.unfollow(follower, followee):
+            messages.success(
+                request, f"{ followee.username }のフォローを解除しました。"
+            )
+            return HttpResponseRedirect(reverse("tweets:home"))
+        else:
+            messages.warning(request, f"{followee.username}はフォローしていません")
+            return render(request, "tweets/home.html")
+
+
+@method_decorator(ratelimit("accounts:follow"), name="post")
+class RelationshipView(LoginRequiredMixin, View):
+    """
+    POST-only view that applies ``action`` (a function in
+    accounts.relationships) from the viewer to the user in the URL.
+    """
+
+    action = None
+    success_message = ""
+    failure_message = ""
+    self_message = ""
+
+    def post(self, request, *args, **kwargs):
+        try:
+            other = User.objects.get(username=self.kwargs["username"])
+        except User.DoesNotExist:
+            messages.warning(request, "指定されたユーザーは存在しません。")
+            raise Http404
+
+        if request.user == other:
+            messages.warning(request, self.self_message)
+            return render(request, "tweets/home.html")
+        elif not self.action(request.user, other):
+            messages.warning(request, self.failure_message.format(other.username))
+            return render(request, "tweets/home.html")
+        else:
+            messages.success(request, self.success_message.format(other.username))
+            return HttpResponseRedirect(reverse("tweets:home"))
+
+
+class BlockView(RelationshipView):
+    action = staticmethod(relationships.block)
+    success_message = "{}をブロックしました。"
+    failure_message = "{}はすでにブロックしています。"
+    self_message = "自分自身はブロックできません。"
+
+
+class UnblockView(RelationshipView):
+    action = staticmethod(relationships.unblock)
+    success_message = "{}のブロックを解除しました。"
+    failure_message = "{}はブロックしていません。"
+    self_message = "自分自身のブロックを解除することはできません。"
+
+
+class MuteView(RelationshipView):
+    action = staticmethod(relationships.mute)
+    success_message = "{}をミュートしました。"
+    failure_message = "{}はすでにミュートしています。"
+    self_message = "自分自身はミュートできません。"
+
+
+class UnmuteView(RelationshipView):
+    action = staticmethod(relationships.unmute)
+    success_message = "{}のミュートを解除しました。"
+    failure_message = "{}はミュートしていません。"
+    self_message = "自分自身のミュートを解除することはできません。"
+
+
+class FollowingListView(LoginRequiredMixin, ListView):
+    template_name = "accounts/following_list.html"
+    model = FriendShip
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        username = self.kwargs["username"]
+        follower = get_object_or_404(User, username=username)
+        context["username"] = username
+        context["following_list"] = (
+            FriendShip.objects.select_related("followee")
+            .filter(follower=follower)
+            .filter(relationships.hidden_q(self.request.user.pk, "followee_id"))
+            .order_by("-created_at")
+        )
+        context["viewer_following"] = relationships.following_among(
+            self.request.user.pk,
+            [following.followee_id for following in context["following_list"]],
+        )
+        return context
+
+
+class FollowerListView(LoginRequiredMixin, ListView):
+    template_name = "accounts/follower_list.html"
+    model = FriendShip
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        username = self.kwargs["username"]
+        followee = get_object_or_404(User, username=username)
+        context["username"] = username
+        context["follower_list"] = (
+            FriendShip.objects.select_related("follower")
+            .filter(followee=followee)
+            .filter(relationships.hidden_q(self.request.user.pk, "follower_id"))
+            .order_by("-created_at")
+        )
+        context["viewer_following"] = relationships.following_among(
+            self.request.user.pk,
+            [follower.follower_id for follower in context["follower_list"]],
+        )
+        return context
@@ -0,0 +1,8 @@
+from django.contrib import admin
+
+from .models import Watermark
+
+
+@admin.register(Watermark)
+class WatermarkAdmin(admin.ModelAdmin):
+    list_display = ("name", "last_id")
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from analytics.rollups import roll_up_follows, roll_up_likes
+
+
+class Command(BaseCommand):
+    help = (
+        "Fold likes and follows created since the last run into the hourly "
+        "and daily analytics rollups. Run periodically, e.g. from cron."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        totals = []
+        for roll_up in (roll_up_likes, roll_up_follows):
+            total = 0
+            while True:
+                done = roll_up(batch_size=options["batch_size"])
+                if not done:
+                    break
+                total += done
+            totals.append(total)
+        self.stdout.write("Rolled up {} like(s) and {} follow(s).".format(*totals))
@@ -0,0 +1,56 @@
+# Generated by Django 4.2.30 on 2026-10-19 13:27
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("analytics", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="watermark",
+            name="scanned_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name="RolledUpRow",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("row_id", models.BigIntegerField()),
+                ("created_at", models.DateTimeField()),
+                (
+                    "watermark",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="rows",
+                        to="analytics.watermark",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["watermark", "created_at"], name="rolled_up_row_created"
+                    )
+                ],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="rolleduprow",
+            constraint=models.UniqueConstraint(
+                fields=("watermark", "row_id"), name="rolled_up_row_unique"
+            ),
+        ),
+    ]
@@ -0,0 +1,86 @@
+from django.db import models
+
+from accounts.models import User
+
+
+class Watermark(models.Model):
+    """
+    The highest source row id already folded into a rollup, and when the
+    source was last read up to date.
+    """
+
+    name = models.CharField(max_length=50, primary_key=True)
+    last_id = models.BigIntegerField(default=0)
+    scanned_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.name}: {self.last_id}"
+
+
+class RolledUpRow(models.Model):
+    """
+    A recent source row already folded into a rollup, so the re-scan of rows
+    committed late does not count it twice. Pruned once past the lag window.
+    """
+
+    watermark = models.ForeignKey(
+        Watermark, related_name="rows", on_delete=models.CASCADE
+    )
+    row_id = models.BigIntegerField()
+    created_at = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["watermark", "row_id"], name="rolled_up_row_unique"
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=["watermark", "created_at"], name="rolled_up_row_created"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.watermark_id}: {self.row_id}"
+
+
+class LikeRollup(models.Model):
+    """Likes a tweet received per hour, keyed by author for per-user stats."""
+
+    # A plain id rather than a foreign key so rollups outlive archiving.
+    tweet_id = models.BigIntegerField()
+    author = models.ForeignKey(User, related_name="+", on_delete=models.CASCADE)
+    hour = models.DateTimeField()
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["tweet_id", "hour"], name="like_rollup_unique"
+            )
+        ]
+        indexes = [
+            models.Index(fields=["author", "hour"], name="like_rollup_author"),
+        ]
+
+    def __str__(self):
+        return f"{self.tweet_id} {self.hour}: {self.count}"
+
+
+class FollowerRollup(models.Model):
+    """New followers a user gained per day."""
+
+    user = models.ForeignKey(User, related_name="+", on_delete=models.CASCADE)
+    day = models.DateField()
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "day"], name="follower_rollup_unique"
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} {self.day}: {self.count}"
@@ -0,0 +1,135 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import TruncDate, TruncHour
+from django.utils import timezone
+
+from accounts.models import FriendShip
+from tweets.models import Like
+
+from .models import FollowerRollup, LikeRollup, RolledUpRow, Watermark
+
+
+def _roll_up(name, source, group_by, rollup, batch_size):
+    """
+    Fold the next ``batch_size`` rows of ``source`` past the ``name``
+    watermark into ``rollup`` and advance the watermark, in one transaction.
+    Only the new slice is grouped, by the ``group_by`` expressions, whose
+    first two keys are the rollup's unique fields. Existing rollup rows are
+    incremented, the rest bulk-created. Return the number of rows consumed.
+    """
+    # Ids are allocated at insert but rows only show up at commit, so on
+    # databases with concurrent writers a row can appear below the watermark
+    # after it has moved past. Rows created within ROLLUP_LAG seconds of the
+    # last up-to-date scan are read again, less those already counted.
+    lag = timedelta(seconds=getattr(settings, "ROLLUP_LAG", 600))
+    now = timezone.now()
+    with transaction.atomic():
+        watermark, _ = Watermark.objects.select_for_update().get_or_create(name=name)
+        new = Q(pk__gt=watermark.last_id)
+        # Later scans never reach back past now minus the lag.
+        window = now - lag
+        if watermark.scanned_at is not None:
+            window = watermark.scanned_at - lag
+            new |= Q(created_at__gte=window)
+        rows = list(
+            source.filter(new)
+            .exclude(pk__in=watermark.rows.values("row_id"))
+            .order_by("pk")
+            .values_list("pk", "created_at")[:batch_size]
+        )
+        if len(rows) < batch_size:
+            watermark.scanned_at = now
+        if rows:
+            ids = [pk for pk, _ in rows]
+            # Aliased so rollup field names may shadow the source's own fields.
+            groups = (
+                source.filter(pk__in=ids)
+                .values(
+                    **{f"rollup_{f}": expression for f, expression in group_by.items()}
+                )
+                .annotate(rollup_count=Count("pk"))
+                .order_by()
+            )
+            groups = [
+                {f.removeprefix("rollup_"): value for f, value in group.items()}
+                for group in groups
+            ]
+            key_fields = list(group_by)[:2]
+            counts = {tuple(group[f] for f in key_fields): group for group in groups}
+            existing = rollup.objects.filter(
+                **{
+                    f"{f}__in": {key[i] for key in counts}
+                    for i, f in enumerate(key_fields)
+                }
+            )
+            updated = []
+            for row in existing:
+                group = counts.pop(tuple(getattr(row, f) for f in key_fields), None)
+                if group is not None:
+                    row.count += group["count"]
+                    updated.append(row)
+            rollup.objects.bulk_update(updated, ["count"])
+            rollup.objects.bulk_create(rollup(**group) for group in counts.values())
+            # Every row inside the window is recorded, so the next batch of
+            # an unfinished scan skips it rather than counting it again.
+            RolledUpRow.objects.bulk_create(
+                RolledUpRow(watermark=watermark, row_id=pk, created_at=created_at)
+                for pk, created_at in rows
+                if created_at >= window
+            )
+            watermark.last_id = max(watermark.last_id, ids[-1])
+        if watermark.scanned_at is not None:
+            watermark.rows.filter(created_at__lt=watermark.scanned_at - lag).delete()
+        watermark.save(update_fields=["last_id", "scanned_at"])
+    return len(rows)
+
+
+def roll_up_likes(batch_size=1000):
+    """Fold new Like rows into per-tweet hourly LikeRollup counts."""
+    return _roll_up(
+        "likes",
+        Like.objects.all(),
+        {
+            "tweet_id": F("tweet"),
+            "hour": TruncHour("created_at"),
+            "author_id": F("tweet__user"),
+        },
+        LikeRollup,
+        batch_size,
+    )
+
+
+def roll_up_follows(batch_size=1000):
+    """Fold new FriendShip rows into per-user daily FollowerRollup counts."""
+    return _roll_up(
+        "follows",
+        FriendShip.objects.all(),
+        {"user_id": F("followee"), "day": TruncDate("created_at")},
+        FollowerRollup,
+        batch_size,
+    )
+
+
+def likes_per_hour(author, since, tweet_id=None):
+    """(hour, likes) pairs for ``author``'s tweets, oldest first."""
+    rows = LikeRollup.objects.filter(author=author, hour__gte=since)
+    if tweet_id is not None:
+        rows = rows.filter(tweet_id=tweet_id)
+    return list(
+        rows.values("hour")
+        .annotate(total=Sum("count"))
+        .values_list("hour", "total")
+        .order_by("hour")
+    )
+
+
+def followers_per_day(user, since):
+    """(day, new followers) pairs for ``user``, oldest first."""
+    return list(
+        FollowerRollup.objects.filter(user=user, day__gte=since)
+        .order_by("day")
+        .values_list("day", "count")
+    )
@@ -0,0 +1,144 @@
+from datetime import datetime, timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts.models import FriendShip, User
+from tweets.models import Like, Tweet
+
+from .models import FollowerRollup, LikeRollup, Watermark
+from .rollups import roll_up_follows, roll_up_likes
+
+
+class TestRollups(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="testuser",
+            email="testemail@email.com",
+            password="testpassword",
+        )
+        self.fans = [User.objects.create(username=f"fan{i}") for i in range(3)]
+        self.tweet = Tweet.objects.create(user=self.user, content="test_tweet")
+        self.hour = timezone.make_aware(datetime(2026, 1, 1, 10))
+
+    def like(self, fan, minutes):
+        like = Like.objects.create(tweet=self.tweet, user=fan)
+        Like.objects.filter(pk=like.pk).update(
+            created_at=self.hour + timedelta(minutes=minutes)
+        )
+
+    def test_likes_are_rolled_up_incrementally(self):
+        self.like(self.fans[0], 5)
+        self.like(self.fans[1], 50)
+        self.assertEquals(roll_up_likes(), 2)
+        self.like(self.fans[2], 55)
+        with self.assertNumQueries(9):
+            self.assertEquals(roll_up_likes(), 1)
+        self.assertEquals(roll_up_likes(), 0)
+
+        rollup = LikeRollup.objects.get()
+        self.assertEquals(rollup.tweet_id, self.tweet.pk)
+        self.assertEquals(rollup.author, self.user)
+        self.assertEquals(rollup.hour, self.hour)
+        self.assertEquals(rollup.count, 3)
+        self.assertEquals(
+            Watermark.objects.get(name="likes").last_id, Like.objects.latest("pk").pk
+        )
+
+    def test_late_committed_likes_are_rolled_up_once(self):
+        likes = [Like.objects.create(tweet=self.tweet, user=fan) for fan in self.fans]
+        late_id = likes[1].pk
+        likes[1].delete()
+        self.assertEquals(roll_up_likes(), 2)
+        # Stands in for a row whose transaction committed after the roll-up.
+        Like.objects.create(pk=late_id, tweet=self.tweet, user=self.fans[1])
+        self.assertEquals(roll_up_likes(), 1)
+        self.assertEquals(roll_up_likes(), 0)
+        self.assertEquals(LikeRollup.objects.get().count, 3)
+        self.assertEquals(Watermark.objects.get(name="likes").last_id, likes[-1].pk)
+
+    def test_rescan_window_larger_than_batch(self):
+        Watermark.objects.create(
+            name="likes", scanned_at=timezone.now() - timedelta(hours=1)
+        )
+        fans = self.fans + [User.objects.create(username=f"fan{i}") for i in (3, 4)]
+        for fan in fans:
+            Like.objects.create(tweet=self.tweet, user=fan)
+        # Inside the re-scan window, but older than the lag.
+        Like.objects.update(created_at=timezone.now() - timedelta(minutes=30))
+        self.assertEquals([roll_up_likes(batch_size=2) for _ in range(4)], [2, 2, 1, 0])
+        self.assertEquals(LikeRollup.objects.get().count, 5)
+
+    def test_follows_are_rolled_up_by_day(self):
+        for fan in self.fans:
+            FriendShip.objects.create(followee=self.user, follower=fan)
+        FriendShip.objects.filter(follower=self.fans[0]).update(
+            created_at=timezone.now() - timedelta(days=1)
+        )
+        self.assertEquals(roll_up_follows(batch_size=2), 2)
+        self.assertEquals(roll_up_follows(batch_size=2), 1)
+        self.assertEquals(
+            list(
+                FollowerRollup.objects.order_by("day").values_list("count", flat=True)
+            ),
+            [1, 2],
+        )
+
+    def test_command(self):
+        self.like(self.fans[0], 0)
+        FriendShip.objects.create(followee=self.user, follower=self.fans[0])
+        out = StringIO()
+        call_command("roll_up_analytics", batch_size=1, stdout=out)
+        self.assertIn("Rolled up 1 like(s) and 1 follow(s).", out.getvalue())
+
+
+class TestAnalyticsViews(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="testuser",
+            email="testemail@email.com",
+            password="testpassword",
+        )
+        self.client.login(username="testuser", password="testpassword")
+        fan = User.objects.create(username="fan")
+        self.tweet = Tweet.objects.create(user=self.user, content="test_tweet")
+        Like.objects.create(tweet=self.tweet, user=fan)
+        FriendShip.objects.create(followee=self.user, follower=fan)
+        roll_up_likes()
+        roll_up_follows()
+
+    def test_success_get_dashboard(self):
+        response = self.client.get(reverse("analytics:dashboard"))
+        self.assertEquals(response.status_code, 200)
+        self.assertTemplateUsed(response, "analytics/dashboard.html")
+        self.assertEquals(
+            [count for _, count in response.context["likes_per_hour"]], [1]
+        )
+        self.assertEquals(
+            [count for _, count in response.context["followers_per_day"]], [1]
+        )
+
+    def test_success_get_user_stats(self):
+        response = self.client.get(reverse("analytics:user_stats"), {"days": "x"})
+        self.assertEquals(response.status_code, 200)
+        data = response.json()
+        self.assertEquals(data["likes_per_hour"][0]["count"], 1)
+        self.assertEquals(data["followers_per_day"][0]["count"], 1)
+
+    def test_success_get_tweet_stats(self):
+        response = self.client.get(
+            reverse("analytics:tweet_stats", kwargs={"pk": self.tweet.pk})
+        )
+        self.assertEquals(response.status_code, 200)
+        self.assertEquals(response.json()["likes_per_hour"][0]["count"], 1)
+        self.assertNotIn("followers_per_day", response.json())
+
+    def test_other_users_tweet_stats_are_empty(self):
+        self.client.force_login(User.objects.create(username="other"))
+        response = self.client.get(
+            reverse("analytics:tweet_stats", kwargs={"pk": self.tweet.pk})
+        )
+        self.assertEquals(response.json()["likes_per_hour"], [])
@@ -0,0 +1,14 @@
+from django.urls import path
+
+from core.urls import lazy_view
+
+app_name = "analytics"
+urlpatterns = [
+    path("", lazy_view("analytics.views.DashboardView"), name="dashboard"),
+    path("api/", lazy_view("analytics.views.UserStatsView"), name="user_stats"),
+    path(
+        "api/tweets/<int:pk>/",
+        lazy_view("analytics.views.TweetStatsView"),
+        name="tweet_stats",
+    ),
+]
@@ -0,0 +1,72 @@
+from datetime import timedelta
+
+from django.contrib.auth.mixins import LoginRequiredMixin
+from django.http import JsonResponse
+from django.utils import timezone
+from django.views.generic import TemplateView, View
+
+from .rollups import followers_per_day, likes_per_hour
+
+
+class StatsMixin:
+    """Read the requested window, clamped to the rollups worth scanning."""
+
+    default_days = 30
+    max_days = 365
+    default_hours = 48
+    max_hours = 14 * 24
+
+    def get_window(self, name, default, maximum):
+        try:
+            value = int(self.request.GET.get(name, default))
+        except ValueError:
+            value = default
+        return min(max(value, 1), maximum)
+
+    def get_stats(self, tweet_id=None):
+        now = timezone.now()
+        days = self.get_window("days", self.default_days, self.max_days)
+        hours = self.get_window("hours", self.default_hours, self.max_hours)
+        since_hour = (now - timedelta(hours=hours - 1)).replace(
+            minute=0, second=0, microsecond=0
+        )
+        stats = {
+            "likes_per_hour": likes_per_hour(self.request.user, since_hour, tweet_id)
+        }
+        if tweet_id is None:
+            since_day = timezone.localdate(now) - timedelta(days=days - 1)
+            stats["followers_per_day"] = followers_per_day(self.request.user, since_day)
+        return stats
+
+
+class DashboardView(LoginRequiredMixin, StatsMixin, TemplateView):
+    template_name = "analytics/dashboard.html"
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context.update(self.get_stats())
+        return context
+
+
+class UserStatsView(LoginRequiredMixin, StatsMixin, View):
+    """Engagement on the viewer's own tweets and follower growth, as JSON."""
+
+    def get(self, request, **kwargs):
+        return JsonResponse(_serialize(self.get_stats()))
+
+
+class TweetStatsView(LoginRequiredMixin, StatsMixin, View):
+    """
+    Likes per hour for one of the viewer's tweets, as JSON. Other users'
+    tweets have no rollups under the viewer and come back empty.
+    """
+
+    def get(self, request, **kwargs):
+        return JsonResponse(_serialize(self.get_stats(self.kwargs["pk"])))
+
+
+def _serialize(stats):
+    return {
+        name: [{"at": at.isoformat(), "count": count} for at, count in rows]
+        for name, rows in stats.items()
+    }
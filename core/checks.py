@@ -0,0 +1,25 @@
+from django.conf import settings
+from django.core.checks import Error, Tags, register
+
+# Backends whose entries live in one process only.
+PROCESS_LOCAL_CACHES = {
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+}
+
+
+@register(Tags.caches, deploy=True)
+def check_shared_cache(app_configs, **kwargs):
+    """
+    Cache versions bumped by run_tasks and the other commands must reach the
+    web workers, so deployments need a cache every process shares.
+    """
+    if settings.CACHES["default"]["BACKEND"] in PROCESS_LOCAL_CACHES:
+        return [
+            Error(
+                "The default cache is not shared between processes.",
+                hint="Set REDIS_URL to a Redis server.",
+                id="core.E001",
+            )
+        ]
+    return []
@@ -0,0 +1,38 @@
+import functools
+import hashlib
+
+from django.conf import settings
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.views.decorators.http import condition
+
+
+def viewer_etag(request, *parts):
+    """
+    Weak ETag for a page rendered for ``request.user``. Besides ``parts`` it
+    covers the viewer and the CSRF cookie the page's forms are bound to.
+    """
+    csrf_cookie = request.COOKIES.get(settings.CSRF_COOKIE_NAME, "")
+    values = [request.user.pk, csrf_cookie, *parts]
+    digest = hashlib.sha1("|".join(str(value) for value in values).encode()).hexdigest()
+    return f'W/"{digest[:20]}"'
+
+
+def conditional_page(etag_func):
+    """
+    condition() for authenticated pages: answer 304 when the ETag matches and
+    mark responses private so shared caches never store them.
+    """
+
+    def decorator(view_func):
+        conditional_view = condition(etag_func=etag_func)(view_func)
+
+        @functools.wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            response = conditional_view(request, *args, **kwargs)
+            patch_cache_control(response, private=True, no_cache=True)
+            patch_vary_headers(response, ("Cookie",))
+            return response
+
+        return wrapper
+
+    return decorator
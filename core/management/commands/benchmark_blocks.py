@@ -0,0 +1,89 @@
+import time
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.urls import reverse
+
+from accounts.models import Block, Mute, User
+from tweets.models import Tweet
+
+
+class Command(BaseCommand):
+    help = (
+        "Report home, profile and follower list latency for a viewer with no "
+        "blocks and with thousands of blocks and mutes. Runs against a "
+        "throwaway test database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--blocks", type=int, default=5000)
+        parser.add_argument("--tweets", type=int, default=200)
+        parser.add_argument("--requests", type=int, default=20)
+
+    def handle(self, *args, **options):
+        old_name = connection.settings_dict["NAME"]
+        setup_test_environment()
+        connection.creation.create_test_db(verbosity=0)
+        try:
+            self.benchmark(options["blocks"], options["tweets"], options["requests"])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+    def benchmark(self, block_count, tweet_count, request_count):
+        users = User.objects.bulk_create(
+            User(username=f"benchmark{i}") for i in range(block_count + 10)
+        )
+        viewer, author = users[0], users[1]
+        Tweet.objects.bulk_create(
+            Tweet(user=users[1 + i % 10], content="ベンチマーク用のツイートです。")
+            for i in range(tweet_count)
+        )
+        client = Client()
+        client.force_login(viewer)
+        urls = {
+            "home": reverse("tweets:home"),
+            "profile": reverse(
+                "accounts:user_profile", kwargs={"username": author.username}
+            ),
+            "followers": reverse(
+                "accounts:follower_list", kwargs={"username": author.username}
+            ),
+        }
+        hidden = users[11:]
+        setups = [
+            ("none", lambda: None),
+            (
+                f"{len(hidden)} blocks",
+                lambda: Block.objects.bulk_create(
+                    Block(blocker=viewer, blocked=user) for user in hidden
+                ),
+            ),
+            (
+                f"+{len(hidden)} mutes",
+                lambda: Mute.objects.bulk_create(
+                    Mute(muter=viewer, muted=user) for user in hidden
+                ),
+            ),
+        ]
+
+        self.stdout.write(f"{'hidden':<16}" + "".join(f"{name:>12}" for name in urls))
+        for label, setup in setups:
+            setup()
+            cache.clear()
+            timings = [
+                self.measure(client, url, request_count) for url in urls.values()
+            ]
+            self.stdout.write(
+                f"{label:<16}" + "".join(f"{ms:>10.2f}ms" for ms in timings)
+            )
+
+    def measure(self, client, url, request_count):
+        client.get(url)
+        start = time.perf_counter()
+        for _ in range(request_count):
+            client.get(url)
+        return (time.perf_counter() - start) / request_count * 1000
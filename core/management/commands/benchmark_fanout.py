@@ -0,0 +1,76 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from accounts.models import FriendShip, User
+from taskqueue.worker import Worker
+from tweets.fanout import fan_out_latency
+from tweets.management.commands.fan_out_stats import write_latency_table
+from tweets.models import FeedEntry, Tweet
+from tweets.tasks import fan_out_tweets
+
+
+class Command(BaseCommand):
+    help = (
+        "Report fan-out latency percentiles for authors with different "
+        "follower counts, draining the queue with one in-process worker. "
+        "Runs against a throwaway test database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--followers",
+            default="10,1000,10000,100000",
+            help="Comma-separated follower counts, one author each.",
+        )
+        parser.add_argument("--tweets", type=int, default=3)
+
+    def handle(self, *args, **options):
+        old_name = connection.settings_dict["NAME"]
+        setup_test_environment()
+        connection.creation.create_test_db(verbosity=0)
+        try:
+            self.benchmark(
+                [int(count) for count in options["followers"].split(",")],
+                options["tweets"],
+            )
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+    def benchmark(self, follower_counts, tweet_count):
+        followers = User.objects.bulk_create(
+            (User(username=f"follower{i}") for i in range(max(follower_counts))),
+            batch_size=1000,
+        )
+        authors = User.objects.bulk_create(
+            User(username=f"author{count}") for count in follower_counts
+        )
+        for author, count in zip(authors, follower_counts):
+            FriendShip.objects.bulk_create(
+                (
+                    FriendShip(followee=author, follower=user)
+                    for user in followers[:count]
+                ),
+                batch_size=1000,
+            )
+
+        # One thread: SQLite's shared in-memory test database locks tables
+        # across connections. Deployments run several run_tasks processes.
+        worker = Worker(concurrency=1, batch_size=20)
+        start = time.perf_counter()
+        for _ in range(tweet_count):
+            for author in authors:
+                tweet = Tweet.objects.create(user=author, content="ベンチマーク")
+                fan_out_tweets.delay([tweet.pk])
+            while worker.run_once():
+                pass
+        elapsed = time.perf_counter() - start
+        entries = FeedEntry.objects.count()
+        self.stdout.write(
+            f"Delivered {entries} feed entries in {elapsed:.2f}s "
+            f"({entries / elapsed:,.0f} per second)."
+        )
+        self.stdout.write(write_latency_table(fan_out_latency()))
@@ -0,0 +1,46 @@
+import time
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand
+from django.http import HttpResponse
+from django.test import RequestFactory, override_settings
+
+from core.ratelimit import LocalMemoryBackend, parse_rate, ratelimit
+
+
+class Command(BaseCommand):
+    help = "Measure the per-request overhead of the rate limiter."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=100000)
+        parser.add_argument("--keys", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        iterations = options["iterations"]
+        keys = options["keys"]
+
+        backend = LocalMemoryBackend()
+        capacity, refill_rate = parse_rate("1000000/s")
+        start = time.perf_counter()
+        for i in range(iterations):
+            backend.consume(f"bench:{i % keys}", capacity, refill_rate)
+        elapsed = time.perf_counter() - start
+        self.stdout.write(f"backend.consume: {elapsed / iterations * 1e6:.2f} us/call")
+
+        def view(request):
+            return HttpResponse()
+
+        request = RequestFactory().post("/")
+        request.user = AnonymousUser()
+        plain = self._time(view, request, iterations)
+        with override_settings(RATELIMITS={"benchmark": "1000000/s"}):
+            limited = self._time(ratelimit("benchmark")(view), request, iterations)
+        self.stdout.write(f"plain view: {plain * 1e6:.2f} us/call")
+        self.stdout.write(f"rate limited view: {limited * 1e6:.2f} us/call")
+        self.stdout.write(f"overhead: {(limited - plain) * 1e6:.2f} us/request")
+
+    def _time(self, view, request, iterations):
+        start = time.perf_counter()
+        for _ in range(iterations):
+            view(request)
+        return (time.perf_counter() - start) / iterations
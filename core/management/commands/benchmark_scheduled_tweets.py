@@ -0,0 +1,63 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.utils import timezone
+
+from accounts.models import User
+from tweets.models import ScheduledTweet, Tweet
+from tweets.scheduling import publish_due
+
+
+class Command(BaseCommand):
+    help = (
+        "Report how many due scheduled tweets per minute publish_due() "
+        "publishes. Runs against a throwaway test database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--count", type=int, default=30000)
+        parser.add_argument("--users", type=int, default=100)
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        old_name = connection.settings_dict["NAME"]
+        setup_test_environment()
+        connection.creation.create_test_db(verbosity=0)
+        try:
+            self.benchmark(options["count"], options["users"], options["batch_size"])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+    def benchmark(self, count, user_count, batch_size):
+        users = User.objects.bulk_create(
+            User(username=f"benchmark{i}") for i in range(user_count)
+        )
+        now = timezone.now()
+        ScheduledTweet.objects.bulk_create(
+            (
+                ScheduledTweet(
+                    user=users[i % user_count],
+                    content=f"予約投稿 #bench{i % 10} @{users[(i + 1) % user_count]}",
+                    publish_at=now - timedelta(seconds=i),
+                )
+                for i in range(count)
+            ),
+            batch_size=1000,
+        )
+        start = time.perf_counter()
+        published = 0
+        while True:
+            batch = len(publish_due(batch_size=batch_size))
+            if not batch:
+                break
+            published += batch
+        elapsed = time.perf_counter() - start
+        assert published == count == Tweet.objects.count()
+        self.stdout.write(
+            f"Published {published} tweet(s) in {elapsed:.2f}s "
+            f"({published / elapsed * 60:,.0f} per minute, batch size {batch_size})."
+        )
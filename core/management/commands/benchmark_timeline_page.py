@@ -0,0 +1,65 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.template import engines
+from django.test import Client, override_settings
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.urls import reverse
+
+from accounts.models import User
+from core.middleware import brotli
+from tweets.models import Tweet
+
+
+class Command(BaseCommand):
+    help = (
+        "Report bytes on the wire and CPU time per response for a home page "
+        "with 50 tweets, with and without template minifying and compression. "
+        "Runs against a throwaway test database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--tweets", type=int, default=50)
+        parser.add_argument("--requests", type=int, default=50)
+
+    def handle(self, *args, **options):
+        old_name = connection.settings_dict["NAME"]
+        setup_test_environment()
+        connection.creation.create_test_db(verbosity=0)
+        try:
+            self.benchmark(options["tweets"], options["requests"])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+    def benchmark(self, tweet_count, request_count):
+        user = User.objects.create(username="benchmark")
+        Tweet.objects.bulk_create(
+            Tweet(user=user, content="ベンチマーク用のツイートです。" * 4)
+            for _ in range(tweet_count)
+        )
+        client = Client()
+        client.force_login(user)
+        url = reverse("tweets:home")
+        encodings = ["identity", "gzip"] + (["br"] if brotli is not None else [])
+
+        self.stdout.write(f"{'minify':<8}{'encoding':<10}{'bytes':>10}{'cpu ms':>10}")
+        for minify in (False, True):
+            with override_settings(MINIFY_TEMPLATES=minify):
+                for loader in engines["django"].engine.template_loaders:
+                    loader.reset()
+                for encoding in encodings:
+                    with override_settings(COMPRESS_RESPONSES=encoding != "identity"):
+                        size, cpu = self.measure(client, url, encoding, request_count)
+                    self.stdout.write(
+                        f"{str(minify):<8}{encoding:<10}{size:>10}{cpu * 1000:>10.2f}"
+                    )
+
+    def measure(self, client, url, encoding, request_count):
+        response = client.get(url, HTTP_ACCEPT_ENCODING=encoding)
+        start = time.process_time()
+        for _ in range(request_count):
+            client.get(url, HTTP_ACCEPT_ENCODING=encoding)
+        cpu = (time.process_time() - start) / request_count
+        return len(response.content), cpu
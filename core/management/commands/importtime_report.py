@@ -0,0 +1,115 @@
+import os
+import re
+import subprocess
+import sys
+
+from django.apps import apps
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+re_importtime = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)$")
+re_dynamic = re.compile(r"^dynamic import:\s+(\d+)\s+(\S+)$")
+
+# -X importtime does not see importlib.import_module(), which is how
+# django.setup() loads apps, models and admin modules, so time those calls too.
+SCRIPT = """
+import importlib, sys, time
+_import_module = importlib.import_module
+def import_module(name, package=None):
+    start = time.perf_counter_ns()
+    try:
+        return _import_module(name, package)
+    finally:
+        elapsed = (time.perf_counter_ns() - start) // 1000
+        print(f"dynamic import: {elapsed} {name}", file=sys.stderr)
+importlib.import_module = import_module
+import %s
+"""
+
+
+def measure_imports(module, env=None):
+    """
+    Import ``module`` in a fresh interpreter under ``python -X importtime``.
+    Return (static, dynamic): a list of (module, self_us, cumulative_us) for
+    import statements and a list of (module, cumulative_us) for
+    importlib.import_module() calls.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", SCRIPT % module],
+        capture_output=True,
+        text=True,
+        env={**os.environ, **(env or {})},
+        cwd=settings.BASE_DIR,
+        check=True,
+    )
+    static = []
+    dynamic = []
+    for line in result.stderr.splitlines():
+        match = re_importtime.match(line)
+        if match:
+            self_us, cumulative_us, _, name = match.groups()
+            static.append((name, int(self_us), int(cumulative_us)))
+            continue
+        match = re_dynamic.match(line)
+        if match:
+            dynamic.append((match[2], int(match[1])))
+    return static, dynamic
+
+
+class Command(BaseCommand):
+    help = (
+        "Report the slowest imports on the path from a module (mysite.wsgi by "
+        "default), based on python -X importtime."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--module", default="mysite.wsgi")
+        parser.add_argument("--limit", type=int, default=20)
+        parser.add_argument(
+            "--threshold",
+            type=float,
+            default=5.0,
+            help="Flag imports whose own time exceeds this many milliseconds.",
+        )
+        parser.add_argument(
+            "--fast-boot", action="store_true", help="Measure with DJANGO_FAST_BOOT=1."
+        )
+
+    def handle(self, *args, **options):
+        env = {"DJANGO_FAST_BOOT": "1"} if options["fast_boot"] else {}
+        static, dynamic = measure_imports(options["module"], env)
+        if not static:
+            self.stdout.write("No import timings captured.")
+            return
+        local_packages = {"mysite"} | {
+            config.name.split(".")[0]
+            for config in apps.get_app_configs()
+            if not config.name.startswith("django.")
+        }
+        limit = options["limit"]
+        threshold_us = options["threshold"] * 1000
+
+        def flag(us):
+            return " <-- slow" if us > threshold_us else ""
+
+        total = max(row[2] for row in static)
+        self.stdout.write(
+            f"Total import time of {options['module']}: {total / 1000:.1f}ms"
+        )
+
+        self.stdout.write(f"\nTop {limit} import statements by cumulative time:")
+        for name, _, cumulative_us in sorted(static, key=lambda row: -row[2])[:limit]:
+            self.stdout.write(f"  {cumulative_us / 1000:8.1f}ms  {name}")
+
+        self.stdout.write(f"\nTop {limit} import statements by own time:")
+        for name, self_us, _ in sorted(static, key=lambda row: -row[1])[:limit]:
+            self.stdout.write(f"  {self_us / 1000:8.1f}ms  {name}{flag(self_us)}")
+
+        self.stdout.write(
+            f"\nTop {limit} dynamic imports (apps, models, admin, tasks):"
+        )
+        for name, cumulative_us in sorted(dynamic, key=lambda row: -row[1])[:limit]:
+            project = " [project]" if name.split(".")[0] in local_packages else ""
+            self.stdout.write(
+                f"  {cumulative_us / 1000:8.1f}ms  {name}{project}{flag(cumulative_us)}"
+            )
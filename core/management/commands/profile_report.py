@@ -0,0 +1,58 @@
+import pstats
+from collections import defaultdict
+from io import StringIO
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.profiling import make_token, parse_profile_name
+
+
+class Command(BaseCommand):
+    help = "Aggregate the hottest functions across captured request profiles."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dir", default=settings.PROFILING_DIR)
+        parser.add_argument("--view", help="Only include profiles of this view.")
+        parser.add_argument("--limit", type=int, default=20)
+        parser.add_argument(
+            "--sort", default="cumulative", choices=["cumulative", "tottime", "ncalls"]
+        )
+        parser.add_argument(
+            "--token",
+            action="store_true",
+            help="Print a signed X-Profile header value and exit.",
+        )
+
+    def handle(self, *args, **options):
+        if options["token"]:
+            self.stdout.write(make_token())
+            return
+
+        timings = defaultdict(list)
+        paths = []
+        for path in sorted(Path(options["dir"]).glob("*.prof")):
+            view, ms = parse_profile_name(path)
+            if options["view"] and view != options["view"].replace(":", "."):
+                continue
+            timings[view].append(ms)
+            paths.append(str(path))
+        if not paths:
+            self.stdout.write("No profiles found.")
+            return
+
+        self.stdout.write(f"{len(paths)} profile(s)")
+        for view, values in sorted(timings.items()):
+            values = sorted(v for v in values if v is not None)
+            if values:
+                median = values[len(values) // 2]
+                self.stdout.write(
+                    f"  {view}: {len(values)} request(s), median {median}ms, "
+                    f"max {values[-1]}ms"
+                )
+
+        out = StringIO()
+        stats = pstats.Stats(*paths, stream=out)
+        stats.sort_stats(options["sort"]).print_stats(options["limit"])
+        self.stdout.write(out.getvalue())
@@ -0,0 +1,49 @@
+import re
+
+from django.conf import settings
+from django.middleware.gzip import GZipMiddleware
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - brotli is optional
+    brotli = None
+
+re_accepts_br = re.compile(r"\bbr\b")
+
+
+class CompressionMiddleware(GZipMiddleware):
+    """
+    Opt-in response compression (settings.COMPRESS_RESPONSES). Gzip is left
+    to Django's GZipMiddleware, which pads each response's gzip header with
+    random bytes against BREACH; brotli is used instead when the package is
+    installed and the client accepts it. Brotli output has no such padding;
+    it relies on Django masking the CSRF token per response. Streaming
+    responses (files) and responses smaller than COMPRESSION_MIN_SIZE bytes
+    are sent as is.
+    """
+
+    def process_response(self, request, response):
+        if not getattr(settings, "COMPRESS_RESPONSES", False):
+            return response
+        if response.streaming:
+            return response
+        if len(response.content) < getattr(settings, "COMPRESSION_MIN_SIZE", 1024):
+            return response
+        accept_encoding = request.META.get("HTTP_ACCEPT_ENCODING", "")
+        if brotli is None or not re_accepts_br.search(accept_encoding):
+            return super().process_response(request, response)
+        if response.has_header("Content-Encoding"):
+            return response
+
+        patch_vary_headers(response, ("Accept-Encoding",))
+        content = brotli.compress(response.content, quality=5)
+        if len(content) >= len(response.content):
+            return response
+        response.content = content
+        response.headers["Content-Length"] = str(len(content))
+        response.headers["Content-Encoding"] = "br"
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            response.headers["ETag"] = "W/" + etag
+        return response
@@ -0,0 +1,182 @@
+import json
+
+from django.core.exceptions import ValidationError
+from django.core.paginator import InvalidPage, Paginator
+from django.db import DatabaseError, connections
+from django.db.models import Q
+from django.utils.functional import cached_property
+from django.utils.http import urlsafe_base64_decode, urlsafe_base64_encode
+
+
+def estimate_row_count(model, using="default"):
+    """Return the planner's row estimate for ``model``'s table, or None."""
+    connection = connections[using]
+    table = model._meta.db_table
+    if connection.vendor == "postgresql":
+        sql = "SELECT reltuples::bigint FROM pg_class WHERE relname = %s"
+    elif connection.vendor == "mysql":
+        sql = "SELECT table_rows FROM information_schema.tables WHERE table_name = %s"
+    elif connection.vendor == "sqlite":
+        # sqlite_stat1 only exists once ANALYZE has been run.
+        sql = "SELECT stat FROM sqlite_stat1 WHERE tbl = %s LIMIT 1"
+    else:
+        return None
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [table])
+            row = cursor.fetchone()
+    except DatabaseError:
+        return None
+    if row is None or row[0] is None:
+        return None
+    try:
+        return int(str(row[0]).split()[0])
+    except ValueError:
+        return None
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator that avoids COUNT(*) on large unfiltered tables by using the
+    database's own row estimate. Filtered querysets and small tables still get
+    an exact count.
+    """
+
+    threshold = 10000
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        query = getattr(queryset, "query", None)
+        if query is not None and not query.where:
+            estimate = estimate_row_count(queryset.model, using=queryset.db)
+            if estimate is not None and estimate > self.threshold:
+                return estimate
+        return super().count
+
+
+class InvalidCursor(InvalidPage):
+    pass
+
+
+class CursorPage:
+    def __init__(self, object_list, next_cursor):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+
+class CursorPaginator:
+    """
+    Keyset paginator: each page continues from the ordering values of the last
+    row instead of an OFFSET, so deep pages cost the same as the first one when
+    ``ordering`` is backed by an index. The last ordering field must be unique.
+    """
+
+    def __init__(self, queryset, per_page, ordering=("-created_at", "-pk")):
+        self.queryset = queryset
+        self.per_page = per_page
+        self.ordering = ordering
+        self.fields = [
+            queryset.model._meta.get_field(
+                name.lstrip("-") if name.lstrip("-") != "pk" else "id"
+            )
+            for name in ordering
+        ]
+
+    def encode_cursor(self, obj):
+        values = [field.value_to_string(obj) for field in self.fields]
+        return urlsafe_base64_encode(json.dumps(values).encode())
+
+    def decode_cursor(self, cursor):
+        try:
+            values = json.loads(urlsafe_base64_decode(cursor))
+            if len(values) != len(self.fields):
+                raise ValueError
+            return [field.to_python(value) for field, value in zip(self.fields, values)]
+        except (ValueError, TypeError, ValidationError):
+            raise InvalidCursor("Invalid cursor")
+
+    def filter_after(self, queryset, values):
+        condition = Q()
+        for i, name in enumerate(self.ordering):
+            lookup = "lt" if name.startswith("-") else "gt"
+            equal = {
+                field.name: value for field, value in zip(self.fields[:i], values[:i])
+            }
+            condition |= Q(**equal, **{f"{self.fields[i].name}__{lookup}": values[i]})
+        return queryset.filter(condition)
+
+    def page(self, cursor=None):
+        queryset = self.queryset.order_by(*self.ordering)
+        if cursor:
+            queryset = self.filter_after(queryset, self.decode_cursor(cursor))
+        object_list = list(queryset[: self.per_page + 1])
+        next_cursor = None
+        if len(object_list) > self.per_page:
+            object_list = object_list[: self.per_page]
+            next_cursor = self.encode_cursor(object_list[-1])
+        return CursorPage(object_list, next_cursor)
+
+
+class MergedCursorPaginator:
+    """
+    Keyset pagination over several CursorPaginators at once, merged newest
+    first by ``key``. Each source should page ``per_page`` rows. The cursor
+    holds one cursor per source, and a source only advances past the rows that
+    made it onto the page.
+    """
+
+    def __init__(self, paginators, key=lambda obj: obj.created_at):
+        self.paginators = paginators
+        self.per_page = paginators[0].per_page
+        self.key = key
+
+    def decode_cursor(self, cursor):
+        if not cursor:
+            return [None] * len(self.paginators)
+        try:
+            cursors = json.loads(urlsafe_base64_decode(cursor))
+        except ValueError:
+            raise InvalidCursor("Invalid cursor")
+        if not isinstance(cursors, list) or len(cursors) != len(self.paginators):
+            raise InvalidCursor("Invalid cursor")
+        # None starts a source, False marks it exhausted.
+        if not all(c is None or c is False or isinstance(c, str) for c in cursors):
+            raise InvalidCursor("Invalid cursor")
+        return cursors
+
+    def page(self, cursor=None):
+        """Return a CursorPage of (obj, source index) pairs."""
+        cursors = self.decode_cursor(cursor)
+        rows = []
+        has_next = {}
+        for i, (paginator, source_cursor) in enumerate(zip(self.paginators, cursors)):
+            if source_cursor is False:
+                continue
+            page = paginator.page(source_cursor)
+            rows += [(obj, i) for obj in page.object_list]
+            has_next[i] = page.has_next()
+        rows.sort(key=lambda row: self.key(row[0]), reverse=True)
+        object_list = rows[: self.per_page]
+
+        next_cursors = list(cursors)
+        for i in has_next:
+            taken = [obj for obj, source in object_list if source == i]
+            fetched = sum(1 for _, source in rows if source == i)
+            if len(taken) == fetched and not has_next[i]:
+                next_cursors[i] = False
+            elif taken:
+                next_cursors[i] = self.paginators[i].encode_cursor(taken[-1])
+        next_cursor = None
+        if any(source_cursor is not False for source_cursor in next_cursors):
+            next_cursor = urlsafe_base64_encode(json.dumps(next_cursors).encode())
+        return CursorPage(object_list, next_cursor)
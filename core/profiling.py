@@ -0,0 +1,84 @@
+import cProfile
+import random
+import re
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core import signing
+
+PROFILE_HEADER = "X-Profile"
+SIGNING_SALT = "core.profiling"
+
+re_unsafe = re.compile(r"[^A-Za-z0-9_.-]+")
+
+
+def make_token():
+    """Value for the X-Profile header that forces profiling of a request."""
+    return signing.TimestampSigner(salt=SIGNING_SALT).sign("profile")
+
+
+def has_valid_token(request):
+    token = request.headers.get(PROFILE_HEADER)
+    if not token:
+        return False
+    try:
+        signing.TimestampSigner(salt=SIGNING_SALT).unsign(
+            token, max_age=getattr(settings, "PROFILING_TOKEN_MAX_AGE", 60 * 60)
+        )
+    except signing.BadSignature:
+        return False
+    return True
+
+
+def parse_profile_name(path):
+    """Return (view name, milliseconds) encoded in a profile file name."""
+    match = re.match(r"\d+_(?P<view>.+)_(?P<ms>\d+)ms$", Path(path).stem)
+    if match is None:
+        return None, None
+    return match["view"], int(match["ms"])
+
+
+class ProfilingMiddleware:
+    """
+    Record cProfile stats for a sampled fraction of requests
+    (PROFILING_SAMPLE_RATE) and for requests carrying a signed X-Profile
+    header. Each profile is written to PROFILING_DIR as
+    <timestamp>_<view name>_<milliseconds>ms.prof.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not self.should_profile(request):
+            return self.get_response(request)
+        profiler = cProfile.Profile()
+        start = time.perf_counter()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Another profiler is already active in this process.
+            return self.get_response(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            profiler.disable()
+        elapsed_ms = int((time.perf_counter() - start) * 1000)
+        self.save(profiler, request, elapsed_ms)
+        return response
+
+    def should_profile(self, request):
+        rate = getattr(settings, "PROFILING_SAMPLE_RATE", 0)
+        if rate and random.random() < rate:
+            return True
+        return has_valid_token(request)
+
+    def save(self, profiler, request, elapsed_ms):
+        directory = Path(settings.PROFILING_DIR)
+        directory.mkdir(parents=True, exist_ok=True)
+        match = getattr(request, "resolver_match", None)
+        view_name = match.view_name if match and match.view_name else "unresolved"
+        view_name = re_unsafe.sub(".", view_name.replace(":", "."))
+        filename = f"{time.time_ns()}_{view_name}_{elapsed_ms}ms.prof"
+        profiler.dump_stats(directory / filename)
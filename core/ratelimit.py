@@ -0,0 +1,150 @@
+import functools
+import math
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse
+from django.utils.module_loading import import_string
+
+_PERIODS = {"s": 1, "m": 60, "h": 60 * 60, "d": 24 * 60 * 60}
+
+
+@functools.lru_cache(maxsize=None)
+def parse_rate(rate):
+    """Parse "30/m" into (capacity, tokens refilled per second)."""
+    count, period = rate.split("/")
+    count = int(count)
+    return count, count / _PERIODS[period]
+
+
+class BaseBackend:
+    def consume(self, key, capacity, refill_rate):
+        """
+        Take one token from the bucket at ``key``. Return (allowed, retry_after)
+        where retry_after is the number of seconds until a token is available.
+        """
+        raise NotImplementedError
+
+    def reset(self):
+        pass
+
+
+class LocalMemoryBackend(BaseBackend):
+    """Per-process token buckets. Least recently used keys are evicted."""
+
+    def __init__(self, max_keys=100000):
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def consume(self, key, capacity, refill_rate):
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.pop(key, None)
+            if bucket is None:
+                tokens = capacity
+            else:
+                tokens, updated = bucket
+                tokens = min(capacity, tokens + (now - updated) * refill_rate)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            self._buckets[key] = (tokens, now)
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        if allowed:
+            return True, 0
+        return False, (1 - tokens) / refill_rate
+
+    def reset(self):
+        with self._lock:
+            self._buckets.clear()
+
+
+class CacheBackend(BaseBackend):
+    """
+    Buckets stored in a Django cache so several processes share one limit.
+    Read-modify-write is not atomic, so concurrent bursts may overshoot
+    slightly; use a backend with server-side scripting for strict limits.
+    """
+
+    def __init__(self, alias="default"):
+        self.cache = caches[alias]
+
+    def consume(self, key, capacity, refill_rate):
+        now = time.time()
+        cache_key = f"ratelimit:{key}"
+        bucket = self.cache.get(cache_key)
+        if bucket is None:
+            tokens = capacity
+        else:
+            tokens, updated = bucket
+            tokens = min(capacity, tokens + (now - updated) * refill_rate)
+        allowed = tokens >= 1
+        if allowed:
+            tokens -= 1
+        timeout = math.ceil(capacity / refill_rate)
+        self.cache.set(cache_key, (tokens, now), timeout)
+        if allowed:
+            return True, 0
+        return False, (1 - tokens) / refill_rate
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                path = getattr(
+                    settings, "RATELIMIT_BACKEND", "core.ratelimit.LocalMemoryBackend"
+                )
+                _backend = import_string(path)()
+    return _backend
+
+
+def get_rate(scope):
+    rates = getattr(settings, "RATELIMITS", {})
+    return rates.get(scope, getattr(settings, "RATELIMIT_DEFAULT_RATE", "60/m"))
+
+
+def too_many_requests(retry_after):
+    response = HttpResponse(
+        "リクエストが多すぎます。しばらくしてから再度お試しください。", status=429
+    )
+    response["Retry-After"] = str(max(1, math.ceil(retry_after)))
+    return response
+
+
+def ratelimit(scope):
+    """
+    Limit a view per user (or per client address when anonymous) with a token
+    bucket whose rate is ``settings.RATELIMITS[scope]``, e.g. "30/m".
+    """
+
+    def decorator(view_func):
+        @functools.wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            if not getattr(settings, "RATELIMIT_ENABLED", True):
+                return view_func(request, *args, **kwargs)
+            if request.user.is_authenticated:
+                ident = f"user:{request.user.pk}"
+            else:
+                ident = f"ip:{request.META.get('REMOTE_ADDR')}"
+            capacity, refill_rate = parse_rate(get_rate(scope))
+            allowed, retry_after = get_backend().consume(
+                f"{scope}:{ident}", capacity, refill_rate
+            )
+            if not allowed:
+                return too_many_requests(retry_after)
+            return view_func(request, *args, **kwargs)
+
+        return wrapper
+
+    return decorator
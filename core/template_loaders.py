@@ -0,0 +1,41 @@
+"""
+Template loaders that strip indentation from template source before it is
+compiled, when settings.MINIFY_TEMPLATES is on. Every run of whitespace that
+contains a line break becomes a single newline, so inline spacing and
+JavaScript line breaks are preserved. <pre> and <textarea> are left as is.
+"""
+
+import re
+
+from django.conf import settings
+from django.template.loaders import app_directories, filesystem
+
+re_preserved = re.compile(r"(<(pre|textarea)\b.*?</\2>)", re.DOTALL | re.IGNORECASE)
+re_line_break_space = re.compile(r"[ \t\r]*\n\s*")
+
+
+def minify(source):
+    parts = re_preserved.split(source)
+    result = []
+    # re.split() with two groups yields [text, block, tag name, text, ...].
+    for i in range(0, len(parts), 3):
+        result.append(re_line_break_space.sub("\n", parts[i]))
+        if i + 1 < len(parts):
+            result.append(parts[i + 1])
+    return "".join(result).strip() + "\n"
+
+
+class MinifyMixin:
+    def get_contents(self, origin):
+        contents = super().get_contents(origin)
+        if getattr(settings, "MINIFY_TEMPLATES", False):
+            return minify(contents)
+        return contents
+
+
+class FilesystemLoader(MinifyMixin, filesystem.Loader):
+    pass
+
+
+class AppDirectoriesLoader(MinifyMixin, app_directories.Loader):
+    pass
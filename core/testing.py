@@ -0,0 +1,30 @@
+from django.conf import settings
+from django.test import override_settings
+from django.test.runner import DiscoverRunner
+
+
+class TestRunner(DiscoverRunner):
+    """
+    Run tests in a throwaway in-memory cache, so runs never see keys left in
+    a shared Redis, and with rate limiting off, since the in-process buckets
+    outlive each test. Tests of rate limiting turn it back on with
+    override_settings.
+    """
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.test_settings = override_settings(
+            CACHES={
+                "default": {
+                    "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+                    "LOCATION": "tests",
+                    "OPTIONS": {"MAX_ENTRIES": settings.CACHE_MAX_ENTRIES},
+                }
+            },
+            RATELIMIT_ENABLED=False,
+        )
+        self.test_settings.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self.test_settings.disable()
+        super().teardown_test_environment(**kwargs)
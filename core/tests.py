@@ -0,0 +1,266 @@
+import gzip
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from io import StringIO
+from pathlib import Path
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import resolve, reverse
+from django.utils.http import urlsafe_base64_encode
+
+from accounts.models import User
+from tweets.models import Tweet
+
+from .checks import check_shared_cache
+from .management.commands.importtime_report import measure_imports
+from .paginator import (
+    CursorPaginator,
+    EstimatedCountPaginator,
+    InvalidCursor,
+    MergedCursorPaginator,
+)
+from .profiling import make_token, parse_profile_name
+from .ratelimit import LocalMemoryBackend, get_backend, parse_rate
+from .template_loaders import minify
+from .versioning import bump_version, get_version
+
+
+class TestEstimatedCountPaginator(TestCase):
+    def setUp(self):
+        for i in range(3):
+            User.objects.create_user(username=f"user{i}", password="testpassword")
+
+    def test_small_table_uses_exact_count(self):
+        paginator = EstimatedCountPaginator(User.objects.order_by("pk"), 2)
+        self.assertEquals(paginator.count, 3)
+        self.assertEquals(paginator.num_pages, 2)
+
+    def test_filtered_queryset_uses_exact_count(self):
+        paginator = EstimatedCountPaginator(
+            User.objects.filter(username="user1").order_by("pk"), 2
+        )
+        self.assertEquals(paginator.count, 1)
+
+
+class TestCursorPaginator(TestCase):
+    def setUp(self):
+        for i in range(5):
+            User.objects.create(username=f"user{i}")
+
+    def test_pages(self):
+        paginator = CursorPaginator(User.objects.all(), 2, ordering=("-pk",))
+        page = paginator.page()
+        usernames = [user.username for user in page]
+        while page.has_next():
+            page = paginator.page(page.next_cursor)
+            usernames += [user.username for user in page]
+        self.assertEquals(usernames, [f"user{i}" for i in reversed(range(5))])
+
+    def test_invalid_cursor(self):
+        paginator = CursorPaginator(User.objects.all(), 2, ordering=("-pk",))
+        with self.assertRaises(InvalidCursor):
+            paginator.page("hoge")
+
+    def test_merged_invalid_cursor(self):
+        paginator = MergedCursorPaginator(
+            [CursorPaginator(User.objects.all(), 2, ordering=("-pk",))] * 3
+        )
+        for values in ([1, 2, 3], [None, True, None]):
+            cursor = urlsafe_base64_encode(json.dumps(values).encode())
+            with self.assertRaises(InvalidCursor):
+                paginator.page(cursor)
+
+
+class TestLocalMemoryBackend(TestCase):
+    def test_consume(self):
+        backend = LocalMemoryBackend()
+        capacity, refill_rate = parse_rate("2/m")
+        self.assertEquals(backend.consume("key", capacity, refill_rate), (True, 0))
+        self.assertEquals(backend.consume("key", capacity, refill_rate), (True, 0))
+        allowed, retry_after = backend.consume("key", capacity, refill_rate)
+        self.assertFalse(allowed)
+        self.assertGreater(retry_after, 0)
+        self.assertLessEqual(retry_after, 30)
+        self.assertTrue(backend.consume("other", capacity, refill_rate)[0])
+
+    def test_evicts_old_keys(self):
+        backend = LocalMemoryBackend(max_keys=2)
+        for key in ("a", "b", "c"):
+            backend.consume(key, 1, 1)
+        self.assertEquals(list(backend._buckets), ["b", "c"])
+
+
+@override_settings(RATELIMIT_ENABLED=True, RATELIMITS={"tweets:like": "2/m"})
+class TestRateLimit(TestCase):
+    def setUp(self):
+        get_backend().reset()
+        self.user = User.objects.create_user(
+            username="testuser",
+            email="testemail@email.com",
+            password="testpassword",
+        )
+        self.client.login(username="testuser", password="testpassword")
+        self.tweet = Tweet.objects.create(user=self.user, content="test_tweet")
+        self.url = reverse("tweets:like", kwargs={"pk": self.tweet.pk})
+
+    def tearDown(self):
+        get_backend().reset()
+
+    def test_failure_post_over_limit(self):
+        self.assertEquals(self.client.post(self.url).status_code, 200)
+        self.assertEquals(self.client.post(self.url).status_code, 200)
+        response = self.client.post(self.url)
+        self.assertEquals(response.status_code, 429)
+        self.assertEquals(response["Retry-After"], "30")
+
+
+class TestVersioning(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    @override_settings(VERSION_CACHE_TIMEOUT=1)
+    def test_expired_version_moves_forward(self):
+        version = bump_version("test", 1)
+        self.assertEquals(get_version("test", 1), version)
+        time.sleep(1.1)
+        self.assertGreater(get_version("test", 1), version)
+
+
+class TestSharedCacheCheck(TestCase):
+    def test_process_local_cache_is_an_error(self):
+        self.assertEquals(
+            [error.id for error in check_shared_cache(None)], ["core.E001"]
+        )
+
+    @override_settings(
+        CACHES={
+            "default": {
+                "BACKEND": "django.core.cache.backends.redis.RedisCache",
+                "LOCATION": "redis://localhost:6379",
+            }
+        }
+    )
+    def test_redis_passes(self):
+        self.assertEquals(check_shared_cache(None), [])
+
+
+class TestMinify(TestCase):
+    def test_minify(self):
+        source = "<div>\n    <p>{{ a }} {{ b }}</p>\n\n    <pre>\n  x\n</pre>\n</div>\n"
+        self.assertEquals(
+            minify(source),
+            "<div>\n<p>{{ a }} {{ b }}</p>\n<pre>\n  x\n</pre>\n</div>\n",
+        )
+
+
+class TestCompressionMiddleware(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username="testuser")
+        self.client.force_login(self.user)
+        for i in range(20):
+            Tweet.objects.create(user=self.user, content=f"test_tweet{i}")
+
+    @override_settings(COMPRESS_RESPONSES=True)
+    def test_success_get_gzip(self):
+        response = self.client.get(reverse("tweets:home"), HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEquals(response["Content-Encoding"], "gzip")
+        self.assertIn("Accept-Encoding", response["Vary"])
+        self.assertIn("test_tweet19", gzip.decompress(response.content).decode())
+        # GZipMiddleware's BREACH mitigation: a random-length FNAME field.
+        self.assertTrue(response.content[3] & gzip.FNAME)
+
+    @override_settings(COMPRESS_RESPONSES=True, COMPRESSION_MIN_SIZE=10**6)
+    def test_success_get_below_threshold(self):
+        response = self.client.get(reverse("tweets:home"), HTTP_ACCEPT_ENCODING="gzip")
+        self.assertFalse(response.has_header("Content-Encoding"))
+
+    def test_success_get_disabled(self):
+        response = self.client.get(reverse("tweets:home"), HTTP_ACCEPT_ENCODING="gzip")
+        self.assertFalse(response.has_header("Content-Encoding"))
+
+
+class TestProfilingMiddleware(TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.user = User.objects.create(username="testuser")
+        self.client.force_login(self.user)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def profiles(self):
+        return list(Path(self.directory.name).glob("*.prof"))
+
+    def test_success_get_sampled(self):
+        with override_settings(
+            PROFILING_SAMPLE_RATE=1.0, PROFILING_DIR=self.directory.name
+        ):
+            self.client.get(reverse("tweets:home"))
+        profiles = self.profiles()
+        self.assertEquals(len(profiles), 1)
+        self.assertEquals(parse_profile_name(profiles[0])[0], "tweets.home")
+
+        out = StringIO()
+        call_command("profile_report", dir=self.directory.name, stdout=out)
+        self.assertIn("tweets.home: 1 request(s)", out.getvalue())
+        self.assertIn("function calls", out.getvalue())
+
+    def test_success_get_with_token(self):
+        with override_settings(PROFILING_DIR=self.directory.name):
+            self.client.get(reverse("tweets:home"), HTTP_X_PROFILE=make_token())
+        self.assertEquals(len(self.profiles()), 1)
+
+    def test_success_get_with_invalid_token(self):
+        with override_settings(PROFILING_DIR=self.directory.name):
+            self.client.get(reverse("tweets:home"), HTTP_X_PROFILE="hoge")
+        self.assertEquals(self.profiles(), [])
+
+
+class TestBoot(TestCase):
+    def boot(self, **env):
+        result = subprocess.run(
+            [sys.executable, "-c", "import mysite.wsgi"],
+            env={**os.environ, **env},
+            capture_output=True,
+            text=True,
+        )
+        self.assertEquals(result.returncode, 0, result.stderr)
+
+    def test_success_boot(self):
+        self.boot()
+
+    def test_success_fast_boot(self):
+        self.boot(DJANGO_FAST_BOOT="1")
+
+    def test_boot_within_budget(self):
+        for env in ({}, {"DJANGO_FAST_BOOT": "1"}):
+            with self.subTest(env=env):
+                static, _ = measure_imports("mysite.wsgi", env)
+                seconds = max(row[2] for row in static) / 1_000_000
+                self.assertLess(
+                    seconds,
+                    settings.BOOT_TIME_BUDGET,
+                    "over budget; run manage.py importtime_report to find out why",
+                )
+
+    def test_success_lazy_view(self):
+        self.assertEquals(
+            resolve(reverse("notifications:inbox")).func.lazy_view_path,
+            "notifications.views.NotificationListView",
+        )
+        self.client.force_login(User.objects.create(username="testuser"))
+        response = self.client.get(reverse("notifications:inbox"))
+        self.assertEquals(response.status_code, 200)
+
+    def test_success_importtime_report(self):
+        out = StringIO()
+        call_command("importtime_report", "--limit", "3", stdout=out)
+        self.assertIn("Total import time of mysite.wsgi", out.getvalue())
+        self.assertIn("dynamic imports", out.getvalue())
@@ -0,0 +1,19 @@
+from django.utils.module_loading import import_string
+
+
+def lazy_view(path, **initkwargs):
+    """
+    URLconf entry for a class-based view that is imported on its first
+    request, so rarely used view modules (and the forms and models they pull
+    in) stay out of the URLconf import.
+    """
+    view = None
+
+    def wrapper(request, *args, **kwargs):
+        nonlocal view
+        if view is None:
+            view = import_string(path).as_view(**initkwargs)
+        return view(request, *args, **kwargs)
+
+    wrapper.lazy_view_path = path
+    return wrapper
@@ -0,0 +1,46 @@
+"""
+Cache-held version numbers for invalidating derived data (ETags, cached
+fragments) without tracking every key that depends on an object. A missing
+version starts from the current time in nanoseconds, so an evicted or expired
+counter never repeats a value that was handed out before; versions therefore
+expire after VERSION_CACHE_TIMEOUT seconds rather than piling up forever.
+"""
+
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+
+def _key(scope, key):
+    return f"version:{scope}:{key}"
+
+
+def _timeout():
+    return getattr(settings, "VERSION_CACHE_TIMEOUT", 24 * 60 * 60)
+
+
+def get_versions(scope, keys):
+    cache_keys = {_key(scope, key): key for key in keys}
+    found = cache.get_many(cache_keys)
+    versions = {cache_keys[cache_key]: value for cache_key, value in found.items()}
+    missing = {
+        cache_key: time.time_ns() for cache_key in cache_keys if cache_key not in found
+    }
+    if missing:
+        cache.set_many(missing, _timeout())
+        versions.update({cache_keys[cache_key]: v for cache_key, v in missing.items()})
+    return versions
+
+
+def get_version(scope, key):
+    return get_versions(scope, [key])[key]
+
+
+def bump_version(scope, key):
+    try:
+        return cache.incr(_key(scope, key))
+    except ValueError:
+        version = time.time_ns()
+        cache.set(_key(scope, key), version, _timeout())
+        return version
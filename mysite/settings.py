@@ -1,133 +1,274 @@
-"""
-Django settings for mysite project.
-
-Generated by 'django-admin startproject' using Django 4.0.3.
-
-For more information on this file, see
-https://docs.djangoproject.com/en/4.0/topics/settings/
-
-For the full list of settings and their values, see
-https://docs.djangoproject.com/en/4.0/ref/settings/
-"""
-
-
-from pathlib import Path
-
-# Build paths inside the project like this: BASE_DIR / 'subdir'.
-BASE_DIR = Path(__file__).resolve().parent.parent
-
-
-# Quick-start development settings - unsuitable for production
-# See https://docs.djangoproject.com/en/4.0/howto/deployment/checklist/
-
-# SECURITY WARNING: keep the secret key used in production secret!
-SECRET_KEY = "django-insecure-x+hlabr82)0gfep+bo%6nsehz_n%5_w4*9u*pd9tllw10dj1s1"
-
-# SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
-
-ALLOWED_HOSTS = []
-
-
-# Application definition
-
-INSTALLED_APPS = [
-    "django.contrib.admin",
-    "django.contrib.auth",
-    "django.contrib.contenttypes",
-    "django.contrib.sessions",
-    "django.contrib.messages",
-    "django.contrib.staticfiles",
-    "accounts.apps.AccountsConfig",
-    "tweets.apps.TweetsConfig",
-    "welcome.apps.WelcomeConfig",
-]
-
-MIDDLEWARE = [
-    "django.middleware.security.SecurityMiddleware",
-    "django.contrib.sessions.middleware.SessionMiddleware",
-    "django.middleware.common.CommonMiddleware",
-    "django.middleware.csrf.CsrfViewMiddleware",
-    "django.contrib.auth.middleware.AuthenticationMiddleware",
-    "django.contrib.messages.middleware.MessageMiddleware",
-    "django.middleware.clickjacking.XFrameOptionsMiddleware",
-]
-
-ROOT_URLCONF = "mysite.urls"
-
-TEMPLATES = [
-    {
-        "BACKEND": "django.template.backends.django.DjangoTemplates",
-        "DIRS": [BASE_DIR / "templates"],
-        "APP_DIRS": True,
-        "OPTIONS": {
-            "context_processors": [
-                "django.template.context_processors.debug",
-                "django.template.context_processors.request",
-                "django.contrib.auth.context_processors.auth",
-                "django.contrib.messages.context_processors.messages",
-            ],
-        },
-    },
-]
-
-WSGI_APPLICATION = "mysite.wsgi.application"
-
-
-# Database
-# https://docs.djangoproject.com/en/4.0/ref/settings/#databases
-
-DATABASES = {
-    "default": {
-        "ENGINE": "django.db.backends.sqlite3",
-        "NAME": BASE_DIR / "db.sqlite3",
-    }
-}
-
-
-# Password validation
-# https://docs.djangoproject.com/en/4.0/ref/settings/#auth-password-validators
-
-AUTH_PASSWORD_VALIDATORS = [
-    {
-        "NAME": "django.contrib.auth.password_validation.UserAttributeSimilarityValidator",
-    },
-    {
-        "NAME": "django.contrib.auth.password_validation.MinimumLengthValidator",
-    },
-    {
-        "NAME": "django.contrib.auth.password_validation.CommonPasswordValidator",
-    },
-    {
-        "NAME": "django.contrib.auth.password_validation.NumericPasswordValidator",
-    },
-]
-
-
-# Internationalization
-# https://docs.djangoproject.com/en/4.0/topics/i18n/
-
-LANGUAGE_CODE = "ja"
-
-TIME_ZONE = "Asia/Tokyo"
-
-USE_I18N = True
-
-USE_TZ = True
-
-
-# Static files (CSS, JavaScript, Images)
-# https://docs.djangoproject.com/en/4.0/howto/static-files/
-
-STATIC_URL = "static/"
-
-LOGIN_REDIRECT_URL = "tweets:home"
-LOGIN_URL = "accounts:login"
-LOGOUT_REDIRECT_URL = "accounts:login"
-
-# Default primary key field type
-# https://docs.djangoproject.com/en/4.0/ref/settings/#default-auto-field
-
-DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
-
-AUTH_USER_MODEL = "accounts.User"
+"""
+Django settings for mysite project.
+
+Generated by 'django-admin startproject' using Django 4.0.3.
+
+For more information on this file, see
+https://docs.djangoproject.com/en/4.0/topics/settings/
+
+For the full list of settings and their values, see
+https://docs.djangoproject.com/en/4.0/ref/settings/
+"""
+
+
+import os
+from pathlib import Path
+
+# Build paths inside the project like this: BASE_DIR / 'subdir'.
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+
+# Quick-start development settings - unsuitable for production
+# See https://docs.djangoproject.com/en/4.0/howto/deployment/checklist/
+
+# SECURITY WARNING: keep the secret key used in production secret!
+SECRET_KEY = "django-insecure-x+hlabr82)0gfep+bo%6nsehz_n%5_w4*9u*pd9tllw10dj1s1"
+
+# SECURITY WARNING: don't run with debug turned on in production!
+DEBUG = True
+
+ALLOWED_HOSTS = []
+
+
+# Application definition
+
+# Fast boot defers importing every app's admin module from django.setup() to
+# the first URLconf load (see mysite/urls.py). Enable with DJANGO_FAST_BOOT=1.
+FAST_BOOT = os.environ.get("DJANGO_FAST_BOOT") == "1"
+ADMIN_APP = (
+    "django.contrib.admin.apps.SimpleAdminConfig"
+    if FAST_BOOT
+    else "django.contrib.admin"
+)
+
+# Seconds importing mysite.wsgi may take, checked by core.tests.TestBoot.
+# About four times a typical boot, so only real regressions fail; raise it
+# with DJANGO_BOOT_TIME_BUDGET on slow machines.
+BOOT_TIME_BUDGET = float(os.environ.get("DJANGO_BOOT_TIME_BUDGET", 1.0))
+
+INSTALLED_APPS = [
+    ADMIN_APP,
+    "django.contrib.auth",
+    "django.contrib.contenttypes",
+    "django.contrib.sessions",
+    "django.contrib.messages",
+    "django.contrib.staticfiles",
+    "core.apps.CoreConfig",
+    "taskqueue.apps.TaskqueueConfig",
+    "accounts.apps.AccountsConfig",
+    "tweets.apps.TweetsConfig",
+    "notifications.apps.NotificationsConfig",
+    "analytics.apps.AnalyticsConfig",
+    "welcome.apps.WelcomeConfig",
+]
+
+MIDDLEWARE = [
+    "core.profiling.ProfilingMiddleware",
+    "django.middleware.security.SecurityMiddleware",
+    "core.middleware.CompressionMiddleware",
+    "django.contrib.sessions.middleware.SessionMiddleware",
+    "django.middleware.common.CommonMiddleware",
+    "django.middleware.csrf.CsrfViewMiddleware",
+    "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "django.contrib.messages.middleware.MessageMiddleware",
+    "django.middleware.clickjacking.XFrameOptionsMiddleware",
+]
+
+# Opt-in gzip/brotli compression of responses (see core.middleware).
+COMPRESS_RESPONSES = False
+COMPRESSION_MIN_SIZE = 1024
+
+# Sampled request profiling (see core.profiling and the profile_report command).
+PROFILING_SAMPLE_RATE = 0.0
+PROFILING_DIR = BASE_DIR / "profiles"
+PROFILING_TOKEN_MAX_AGE = 60 * 60
+
+ROOT_URLCONF = "mysite.urls"
+
+TEMPLATES = [
+    {
+        "BACKEND": "django.template.backends.django.DjangoTemplates",
+        "DIRS": [BASE_DIR / "templates"],
+        "OPTIONS": {
+            "loaders": [
+                (
+                    "django.template.loaders.cached.Loader",
+                    [
+                        "core.template_loaders.FilesystemLoader",
+                        "core.template_loaders.AppDirectoriesLoader",
+                    ],
+                ),
+            ],
+            "context_processors": [
+                "django.template.context_processors.debug",
+                "django.template.context_processors.request",
+                "django.contrib.auth.context_processors.auth",
+                "django.contrib.messages.context_processors.messages",
+                "notifications.context_processors.unread_notifications",
+            ],
+        },
+    },
+]
+
+# Strip template indentation at compile time (see core.template_loaders).
+MINIFY_TEMPLATES = False
+
+WSGI_APPLICATION = "mysite.wsgi.application"
+
+
+# Database
+# https://docs.djangoproject.com/en/4.0/ref/settings/#databases
+
+DATABASES = {
+    "default": {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": BASE_DIR / "db.sqlite3",
+    }
+}
+
+
+# Password validation
+# https://docs.djangoproject.com/en/4.0/ref/settings/#auth-password-validators
+
+AUTH_PASSWORD_VALIDATORS = [
+    {
+        "NAME": "django.contrib.auth.password_validation.UserAttributeSimilarityValidator",
+    },
+    {
+        "NAME": "django.contrib.auth.password_validation.MinimumLengthValidator",
+    },
+    {
+        "NAME": "django.contrib.auth.password_validation.CommonPasswordValidator",
+    },
+    {
+        "NAME": "django.contrib.auth.password_validation.NumericPasswordValidator",
+    },
+]
+
+
+# Internationalization
+# https://docs.djangoproject.com/en/4.0/topics/i18n/
+
+LANGUAGE_CODE = "ja"
+
+TIME_ZONE = "Asia/Tokyo"
+
+USE_I18N = True
+
+USE_TZ = True
+
+
+# Static files (CSS, JavaScript, Images)
+# https://docs.djangoproject.com/en/4.0/howto/static-files/
+
+STATIC_URL = "static/"
+
+# Uploaded media (tweet attachments) is stored through the default storage
+# under MEDIA_ROOT and served by tweets.views.AttachmentView, not MEDIA_URL.
+MEDIA_ROOT = BASE_DIR / "media"
+MEDIA_URL = "media/"
+
+# Uploads above this size are streamed to a temporary file in chunks instead
+# of being held in memory; the storage then moves that file into place.
+FILE_UPLOAD_MAX_MEMORY_SIZE = 256 * 1024
+
+# Largest accepted image attachment in bytes, and the thumbnail bounding box.
+# Thumbnails are generated by a background task when Pillow is installed.
+ATTACHMENT_MAX_SIZE = 5 * 1024 * 1024
+ATTACHMENT_THUMBNAIL_SIZE = (400, 400)
+
+# Let the front-end server send attachment files: "X-Sendfile" (Apache,
+# lighttpd) sends the file's path, "X-Accel-Redirect" (nginx) sends
+# SENDFILE_URL_PREFIX plus the storage name. None streams them from Django.
+SENDFILE_HEADER = None
+SENDFILE_URL_PREFIX = "/protected-media/"
+
+# Tweets older than this are moved to the archive table by archive_tweets.
+TWEET_ARCHIVE_AFTER_DAYS = 365
+
+# Seconds a tweet's like count may be served from cache by the batch endpoint.
+LIKE_COUNT_CACHE_TIMEOUT = 5
+
+# Home timelines cache the ids of this many newest tweets per user; tweet rows
+# are cached individually for TWEET_CACHE_TIMEOUT seconds.
+HOME_TIMELINE_LENGTH = 200
+HOME_TIMELINE_CACHE_TIMEOUT = 24 * 60 * 60
+TWEET_CACHE_TIMEOUT = 300
+# Cache versions (core.versioning) restart from the clock when they expire.
+VERSION_CACHE_TIMEOUT = 24 * 60 * 60
+
+# Cached versions (core.versioning), tweet snapshots, like counts and home
+# timelines must be shared by every process: web workers, run_tasks,
+# publish_scheduled_tweets and archive_tweets bump versions that the others
+# read. Deployments must set REDIS_URL (needs the redis package); check
+# --deploy reports a per-process cache as an error. Development falls back to
+# an in-memory cache sized for a version, a snapshot and a like count per home
+# timeline tweet for each of CACHE_ACTIVE_USERS users.
+CACHE_ACTIVE_USERS = 10
+CACHE_MAX_ENTRIES = HOME_TIMELINE_LENGTH * 3 * CACHE_ACTIVE_USERS
+if os.environ.get("REDIS_URL"):
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": os.environ["REDIS_URL"],
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "OPTIONS": {"MAX_ENTRIES": CACHE_MAX_ENTRIES},
+        }
+    }
+
+# Tests get a throwaway cache; see core.testing.
+TEST_RUNNER = "core.testing.TestRunner"
+
+# Posting the same or nearly the same text again within SPAM_WINDOW seconds is
+# refused, as is text that SPAM_DUPLICATE_USERS other users just posted. Texts
+# shorter than SPAM_MIN_LENGTH characters only count exact repeats by the same
+# user.
+SPAM_WINDOW = 60 * 60
+SPAM_DUPLICATE_USERS = 5
+SPAM_MIN_LENGTH = 20
+
+# New tweets are delivered to followers' feeds by background tasks, one per
+# FANOUT_SHARD_SIZE followers, so run_tasks processes can share large fan-outs.
+FANOUT_SHARD_SIZE = 5000
+
+# Analytics rollups re-scan rows created up to ROLLUP_LAG seconds before their
+# previous run, for likes and follows whose transactions committed after it.
+ROLLUP_LAG = 10 * 60
+
+LOGIN_REDIRECT_URL = "tweets:home"
+LOGIN_URL = "accounts:login"
+LOGOUT_REDIRECT_URL = "accounts:login"
+
+# Default primary key field type
+# https://docs.djangoproject.com/en/4.0/ref/settings/#default-auto-field
+
+DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
+
+AUTH_USER_MODEL = "accounts.User"
+
+# Background tasks
+# Set TASKQUEUE_ALWAYS_EAGER to run tasks in-process, once the enqueuing
+# transaction commits, instead of through run_tasks.
+
+TASKQUEUE_ALWAYS_EAGER = False
+TASKQUEUE_RETRY_BACKOFF = 2
+TASKQUEUE_VISIBILITY_TIMEOUT = 300
+TASKQUEUE_KEEP_FINISHED = 24 * 60 * 60
+
+# Rate limiting
+# Token bucket rates per view scope; see core.ratelimit.
+
+RATELIMIT_ENABLED = True
+RATELIMIT_BACKEND = "core.ratelimit.LocalMemoryBackend"
+RATELIMIT_DEFAULT_RATE = "60/m"
+RATELIMITS = {
+    "tweets:create": "30/m",
+    "tweets:like": "120/m",
+    "tweets:retweet": "60/m",
+    "accounts:follow": "30/m",
+}
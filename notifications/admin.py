@@ -0,0 +1,17 @@
+from django.contrib import admin
+
+from core.paginator import EstimatedCountPaginator
+
+from .models import Notification
+
+
+@admin.register(Notification)
+class NotificationAdmin(admin.ModelAdmin):
+    list_display = ("id", "recipient", "verb", "actor_count", "is_read", "updated_at")
+    list_select_related = ("recipient",)
+    list_filter = ("verb", "is_read")
+    raw_id_fields = ("recipient", "last_actor", "tweet")
+    search_fields = ("=recipient__username",)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    ordering = ("-id",)
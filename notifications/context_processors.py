@@ -0,0 +1,14 @@
+from django.utils.functional import SimpleLazyObject
+
+from .models import NotificationCounter
+
+
+def unread_notifications(request):
+    user = getattr(request, "user", None)
+    if user is None or not user.is_authenticated:
+        return {}
+    return {
+        "unread_notification_count": SimpleLazyObject(
+            lambda: NotificationCounter.unread_for(user.pk)
+        )
+    }
@@ -0,0 +1,186 @@
+from django.db import IntegrityError, models, transaction
+from django.db.models import F, Q
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from accounts.models import User
+from tweets.models import Tweet
+
+
+class NotificationManager(models.Manager):
+    def record(self, recipient_id, actor_id, verb, tweet_id=None):
+        """
+        Fold a new like/follow into the recipient's notification for the same
+        target, so a viral tweet keeps a single row updated in place. Each
+        actor counts once: a like or follow undone and redone is ignored.
+        """
+        if recipient_id == actor_id:
+            return
+        now = timezone.now()
+        with transaction.atomic():
+            notification = (
+                self.select_for_update()
+                .filter(recipient_id=recipient_id, verb=verb, tweet_id=tweet_id)
+                .first()
+            )
+            if notification is None:
+                try:
+                    with transaction.atomic():
+                        notification = self.create(
+                            recipient_id=recipient_id,
+                            verb=verb,
+                            tweet_id=tweet_id,
+                            last_actor_id=actor_id,
+                            updated_at=now,
+                        )
+                except IntegrityError:
+                    # Lost a race with a concurrent writer; fold into its row.
+                    return self.record(recipient_id, actor_id, verb, tweet_id)
+                NotificationActor.objects.create(
+                    notification=notification, actor_id=actor_id
+                )
+                NotificationCounter.add(recipient_id, 1)
+                return
+            try:
+                with transaction.atomic():
+                    NotificationActor.objects.create(
+                        notification=notification, actor_id=actor_id
+                    )
+            except IntegrityError:
+                return
+            if notification.is_read:
+                self.filter(pk=notification.pk).update(
+                    is_read=False, actor_count=1, last_actor_id=actor_id, updated_at=now
+                )
+                NotificationCounter.add(recipient_id, 1)
+            else:
+                self.filter(pk=notification.pk).update(
+                    actor_count=F("actor_count") + 1,
+                    last_actor_id=actor_id,
+                    updated_at=now,
+                )
+
+    def mark_read(self, user, ids=None):
+        with transaction.atomic():
+            queryset = self.filter(recipient=user, is_read=False)
+            if ids is not None:
+                queryset = queryset.filter(pk__in=ids)
+            updated = queryset.update(is_read=True)
+            if updated:
+                NotificationCounter.add(user.pk, -updated)
+        return updated
+
+
+class Notification(models.Model):
+    LIKE = "like"
+    FOLLOW = "follow"
+    VERB_CHOICES = [
+        (LIKE, "いいね"),
+        (FOLLOW, "フォロー"),
+    ]
+
+    recipient = models.ForeignKey(
+        User, related_name="notifications", on_delete=models.CASCADE
+    )
+    verb = models.CharField(max_length=10, choices=VERB_CHOICES)
+    # Kept when the tweet is archived (it keeps its id); see
+    # tweets.models.ArchivedTweetManager.archive_before().
+    tweet = models.ForeignKey(
+        Tweet,
+        null=True,
+        blank=True,
+        db_constraint=False,
+        on_delete=models.DO_NOTHING,
+    )
+    last_actor = models.ForeignKey(User, related_name="+", on_delete=models.CASCADE)
+    actor_count = models.PositiveIntegerField(default=1)
+    is_read = models.BooleanField(default=False)
+    updated_at = models.DateTimeField()
+
+    objects = NotificationManager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["recipient", "verb", "tweet"],
+                name="notification_unique_target",
+            ),
+            models.UniqueConstraint(
+                fields=["recipient", "verb"],
+                condition=Q(tweet__isnull=True),
+                name="notification_unique_untargeted",
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=["recipient", "-updated_at", "-id"],
+                name="notification_inbox",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.recipient_id} {self.verb} x{self.actor_count}"
+
+    @property
+    def others_count(self):
+        return self.actor_count - 1
+
+
+class NotificationActor(models.Model):
+    """
+    A user already counted in a notification's actor_count, so repeated
+    events from the same user do not count again, even after it is read.
+    """
+
+    notification = models.ForeignKey(
+        Notification, related_name="actors", on_delete=models.CASCADE
+    )
+    actor = models.ForeignKey(User, related_name="+", on_delete=models.CASCADE)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["notification", "actor"], name="notification_actor_unique"
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.notification_id}: {self.actor_id}"
+
+
+class NotificationCounter(models.Model):
+    user = models.OneToOneField(User, primary_key=True, on_delete=models.CASCADE)
+    unread = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.user_id}: {self.unread}"
+
+    @classmethod
+    def add(cls, user_id, delta):
+        if not cls.objects.filter(user_id=user_id).update(unread=F("unread") + delta):
+            try:
+                with transaction.atomic():
+                    cls.objects.create(user_id=user_id, unread=max(delta, 0))
+            except IntegrityError:
+                cls.objects.filter(user_id=user_id).update(unread=F("unread") + delta)
+
+    @classmethod
+    def unread_for(cls, user_id):
+        return (
+            cls.objects.filter(user_id=user_id).values_list("unread", flat=True).first()
+            or 0
+        )
+
+
+@receiver(post_delete, sender=Notification)
+def uncount_deleted_notification(sender, instance, **kwargs):
+    """
+    Keep the unread counter in step when unread rows are deleted along with
+    their tweet or actor (purges, user deletions). Only an existing counter
+    is decremented; one deleted with its user is not recreated.
+    """
+    if not instance.is_read:
+        NotificationCounter.objects.filter(user_id=instance.recipient_id).update(
+            unread=F("unread") - 1
+        )
@@ -0,0 +1,8 @@
+from taskqueue.registry import task
+
+from .models import Notification
+
+
+@task
+def record_notification(recipient_id, actor_id, verb, tweet_id=None):
+    Notification.objects.record(recipient_id, actor_id, verb, tweet_id)
@@ -0,0 +1,162 @@
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from accounts.models import FriendShip, User
+from tweets.models import Tweet
+
+from .models import Notification, NotificationCounter
+
+
+@override_settings(TASKQUEUE_ALWAYS_EAGER=True)
+class TestNotificationRecording(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="testuser",
+            email="testemail@email.com",
+            password="testpassword",
+        )
+        self.fans = [User.objects.create(username=f"fan{i}") for i in range(3)]
+        self.tweet = Tweet.objects.create(user=self.user, content="test_tweet")
+
+    def test_likes_are_aggregated(self):
+        for fan in self.fans:
+            self.client.force_login(fan)
+            with self.captureOnCommitCallbacks(execute=True):
+                self.client.post(reverse("tweets:like", kwargs={"pk": self.tweet.pk}))
+        notification = Notification.objects.get()
+        self.assertEquals(notification.verb, Notification.LIKE)
+        self.assertEquals(notification.actor_count, 3)
+        self.assertEquals(notification.last_actor, self.fans[-1])
+        self.assertEquals(NotificationCounter.unread_for(self.user.pk), 1)
+
+    def test_follow_is_recorded(self):
+        self.client.force_login(self.fans[0])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(
+                reverse("accounts:follow", kwargs={"username": self.user.username})
+            )
+        self.assertTrue(
+            Notification.objects.filter(
+                recipient=self.user, verb=Notification.FOLLOW, tweet=None
+            ).exists()
+        )
+
+    def test_own_like_is_ignored(self):
+        self.client.force_login(self.user)
+        self.client.post(reverse("tweets:like", kwargs={"pk": self.tweet.pk}))
+        self.assertFalse(Notification.objects.exists())
+
+    def test_read_notification_is_reopened(self):
+        Notification.objects.record(
+            self.user.pk, self.fans[0].pk, Notification.LIKE, self.tweet.pk
+        )
+        Notification.objects.mark_read(self.user)
+        Notification.objects.record(
+            self.user.pk, self.fans[1].pk, Notification.LIKE, self.tweet.pk
+        )
+        notification = Notification.objects.get()
+        self.assertFalse(notification.is_read)
+        self.assertEquals(notification.actor_count, 1)
+        self.assertEquals(NotificationCounter.unread_for(self.user.pk), 1)
+
+    def test_repeated_actor_counts_once(self):
+        for fan in (self.fans[0], self.fans[0], self.fans[1]):
+            Notification.objects.record(
+                self.user.pk, fan.pk, Notification.LIKE, self.tweet.pk
+            )
+        self.assertEquals(Notification.objects.get().actor_count, 2)
+        Notification.objects.mark_read(self.user)
+        Notification.objects.record(
+            self.user.pk, self.fans[0].pk, Notification.LIKE, self.tweet.pk
+        )
+        self.assertTrue(Notification.objects.get().is_read)
+        self.assertEquals(NotificationCounter.unread_for(self.user.pk), 0)
+
+    def test_purge_uncounts_unread_notification(self):
+        Notification.objects.record(
+            self.user.pk, self.fans[0].pk, Notification.LIKE, self.tweet.pk
+        )
+        self.tweet.soft_delete()
+        self.tweet.purge()
+        self.assertFalse(Notification.objects.exists())
+        self.assertEquals(NotificationCounter.unread_for(self.user.pk), 0)
+
+
+class TestNotificationListView(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="testuser",
+            email="testemail@email.com",
+            password="testpassword",
+        )
+        self.client.login(username="testuser", password="testpassword")
+        for i in range(25):
+            fan = User.objects.create(username=f"fan{i}")
+            FriendShip.objects.create(followee=self.user, follower=fan)
+            tweet = Tweet.objects.create(user=self.user, content=f"tweet{i}")
+            Notification.objects.record(
+                self.user.pk, fan.pk, Notification.LIKE, tweet.pk
+            )
+
+    def test_success_get(self):
+        response = self.client.get(reverse("notifications:inbox"))
+        self.assertEquals(response.status_code, 200)
+        self.assertTemplateUsed(response, "notifications/inbox.html")
+        self.assertEquals(len(response.context["notifications"]), 20)
+        self.assertIsNotNone(response.context["next_cursor"])
+
+        response = self.client.get(
+            reverse("notifications:inbox"),
+            {"cursor": response.context["next_cursor"]},
+        )
+        self.assertEquals(len(response.context["notifications"]), 5)
+        self.assertIsNone(response.context["next_cursor"])
+
+    def test_success_get_with_deleted_tweet(self):
+        Notification.objects.mark_read(self.user)
+        tweet = Tweet.objects.create(user=self.user, content="deleted")
+        Notification.objects.record(
+            self.user.pk,
+            User.objects.get(username="fan0").pk,
+            Notification.LIKE,
+            tweet.pk,
+        )
+        tweet.soft_delete()
+        response = self.client.get(reverse("notifications:inbox"))
+        # Unread rows stay listed, so the badge's count can be cleared.
+        self.assertEquals(response.context["notifications"][0].tweet, tweet)
+        self.assertContains(response, "削除されたあなたのツイート")
+        self.assertNotContains(response, tweet.get_absolute_url())
+        self.assertEquals(NotificationCounter.unread_for(self.user.pk), 1)
+
+    def test_failure_get_with_invalid_cursor(self):
+        response = self.client.get(reverse("notifications:inbox"), {"cursor": "hoge"})
+        self.assertEquals(response.status_code, 404)
+
+
+class TestMarkReadView(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="testuser",
+            email="testemail@email.com",
+            password="testpassword",
+        )
+        self.client.login(username="testuser", password="testpassword")
+        for i in range(3):
+            fan = User.objects.create(username=f"fan{i}")
+            tweet = Tweet.objects.create(user=self.user, content=f"tweet{i}")
+            Notification.objects.record(
+                self.user.pk, fan.pk, Notification.LIKE, tweet.pk
+            )
+
+    def test_success_post_with_ids(self):
+        ids = list(Notification.objects.values_list("pk", flat=True)[:2])
+        response = self.client.post(reverse("notifications:mark_read"), {"ids": ids})
+        self.assertRedirects(response, reverse("notifications:inbox"))
+        self.assertEquals(Notification.objects.filter(is_read=True).count(), 2)
+        self.assertEquals(NotificationCounter.unread_for(self.user.pk), 1)
+
+    def test_success_post_all(self):
+        self.client.post(reverse("notifications:mark_read"))
+        self.assertFalse(Notification.objects.filter(is_read=False).exists())
+        self.assertEquals(NotificationCounter.unread_for(self.user.pk), 0)
@@ -0,0 +1,9 @@
+from django.urls import path
+
+from core.urls import lazy_view
+
+app_name = "notifications"
+urlpatterns = [
+    path("", lazy_view("notifications.views.NotificationListView"), name="inbox"),
+    path("read/", lazy_view("notifications.views.MarkReadView"), name="mark_read"),
+]
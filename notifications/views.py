@@ -0,0 +1,46 @@
+from django.contrib.auth.mixins import LoginRequiredMixin
+from django.http import Http404, HttpResponseRedirect
+from django.urls import reverse
+from django.views.generic import ListView, View
+
+from core.paginator import CursorPaginator, InvalidCursor
+
+from .models import Notification
+
+
+class NotificationListView(LoginRequiredMixin, ListView):
+    template_name = "notifications/inbox.html"
+    context_object_name = "notifications"
+    page_size = 20
+
+    def get_queryset(self):
+        queryset = Notification.objects.select_related("last_actor", "tweet").filter(
+            recipient=self.request.user
+        )
+        paginator = CursorPaginator(
+            queryset, self.page_size, ordering=("-updated_at", "-pk")
+        )
+        try:
+            self.page = paginator.page(self.request.GET.get("cursor"))
+        except InvalidCursor:
+            raise Http404
+        return self.page.object_list
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["next_cursor"] = self.page.next_cursor
+        return context
+
+
+class MarkReadView(LoginRequiredMixin, View):
+    def post(self, request, *args, **kwargs):
+        ids = request.POST.getlist("ids")
+        if ids:
+            try:
+                ids = [int(pk) for pk in ids]
+            except ValueError:
+                ids = []
+            Notification.objects.mark_read(request.user, ids)
+        else:
+            Notification.objects.mark_read(request.user)
+        return HttpResponseRedirect(reverse("notifications:inbox"))
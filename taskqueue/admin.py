@@ -0,0 +1,15 @@
+from django.contrib import admin
+
+from core.paginator import EstimatedCountPaginator
+
+from .models import Task
+
+
+@admin.register(Task)
+class TaskAdmin(admin.ModelAdmin):
+    list_display = ("id", "name", "status", "attempts", "run_at", "finished_at")
+    list_filter = ("status",)
+    search_fields = ("=name",)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    ordering = ("-id",)
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+
+from taskqueue.worker import Worker
+
+
+class Command(BaseCommand):
+    help = "Run queued background tasks."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--concurrency", type=int, default=4)
+        parser.add_argument("--batch-size", type=int, default=20)
+        parser.add_argument("--poll-interval", type=float, default=1.0)
+        parser.add_argument(
+            "--once", action="store_true", help="Run due tasks once and exit."
+        )
+
+    def handle(self, *args, **options):
+        worker = Worker(
+            concurrency=options["concurrency"],
+            batch_size=options["batch_size"],
+            poll_interval=options["poll_interval"],
+        )
+        if options["once"]:
+            processed = 0
+            while True:
+                count = worker.run_once()
+                if not count:
+                    break
+                processed += count
+            self.stdout.write(f"Processed {processed} task(s).")
+        else:
+            worker.run()
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from taskqueue.metrics import queue_depth, task_latency
+
+
+class Command(BaseCommand):
+    help = "Show task queue depth and latency."
+
+    def handle(self, *args, **options):
+        for status, count in queue_depth().items():
+            self.stdout.write(f"{status}: {count}")
+        for key, value in task_latency().items():
+            if value is None:
+                value = "-"
+            elif isinstance(value, float):
+                value = f"{value:.3f}s"
+            self.stdout.write(f"{key}: {value}")
@@ -0,0 +1,40 @@
+from django.db.models import Count
+
+from .models import Task
+
+
+def queue_depth():
+    counts = dict(
+        Task.objects.filter(status__in=[Task.PENDING, Task.RUNNING])
+        .values_list("status")
+        .annotate(Count("pk"))
+    )
+    return {status: counts.get(status, 0) for status in (Task.PENDING, Task.RUNNING)}
+
+
+def _percentile(values, fraction):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def task_latency(limit=1000):
+    """Queue wait and run time percentiles (seconds) of recently finished tasks."""
+    rows = (
+        Task.objects.filter(status=Task.DONE, finished_at__isnull=False)
+        .order_by("-finished_at")
+        .values_list("run_at", "started_at", "finished_at")[:limit]
+    )
+    waits = []
+    runs = []
+    for run_at, started_at, finished_at in rows:
+        waits.append(max((started_at - run_at).total_seconds(), 0))
+        runs.append((finished_at - started_at).total_seconds())
+    return {
+        "count": len(runs),
+        "wait_p50": _percentile(waits, 0.5),
+        "wait_p95": _percentile(waits, 0.95),
+        "run_p50": _percentile(runs, 0.5),
+        "run_p95": _percentile(runs, 0.95),
+    }
@@ -0,0 +1,64 @@
+import functools
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Task
+
+_registry = {}
+
+
+class TaskFunction:
+    def __init__(self, func, name, max_attempts):
+        self.func = func
+        self.name = name
+        self.max_attempts = max_attempts
+        functools.update_wrapper(self, func)
+
+    def __call__(self, *args, **kwargs):
+        return self.func(*args, **kwargs)
+
+    def delay(self, *args, **kwargs):
+        return self.enqueue(args=args, kwargs=kwargs)
+
+    def enqueue(self, args=(), kwargs=None, countdown=0):
+        """
+        Queue the task for a worker. Inside a transaction the row is committed
+        together with the change that triggered it. In eager mode the task runs
+        in-process instead, once that transaction commits, as a worker would
+        see it; it is dropped if the transaction rolls back.
+        """
+        kwargs = kwargs or {}
+        if getattr(settings, "TASKQUEUE_ALWAYS_EAGER", False):
+            transaction.on_commit(lambda: self.func(*args, **kwargs))
+            return None
+        return Task.objects.create(
+            name=self.name,
+            args=list(args),
+            kwargs=kwargs,
+            max_attempts=self.max_attempts,
+            run_at=timezone.now() + timedelta(seconds=countdown),
+        )
+
+
+def task(func=None, *, name=None, max_attempts=3):
+    def decorator(func):
+        task_name = name or f"{func.__module__}.{func.__qualname__}"
+        task_function = TaskFunction(func, task_name, max_attempts)
+        _registry[task_name] = task_function
+        return task_function
+
+    if func is not None:
+        return decorator(func)
+    return decorator
+
+
+def get_task(name):
+    return _registry[name]
+
+
+def retry_delay(attempts):
+    base = getattr(settings, "TASKQUEUE_RETRY_BACKOFF", 2)
+    return timedelta(seconds=base**attempts)
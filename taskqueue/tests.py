@@ -0,0 +1,128 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from .metrics import queue_depth, task_latency
+from .models import Task
+from .registry import task
+from .worker import Worker
+
+calls = []
+
+
+@task(name="tests.record")
+def record(value):
+    calls.append(value)
+
+
+@task(name="tests.explode", max_attempts=2)
+def explode():
+    raise ValueError("boom")
+
+
+class TestTaskQueue(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_delay_creates_pending_task(self):
+        record.delay("hello")
+        task = Task.objects.get()
+        self.assertEquals(task.name, "tests.record")
+        self.assertEquals(task.args, ["hello"])
+        self.assertEquals(task.status, Task.PENDING)
+        self.assertEquals(calls, [])
+
+    @override_settings(TASKQUEUE_ALWAYS_EAGER=True)
+    def test_eager_mode_runs_on_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            record.delay("hello")
+            self.assertEquals(calls, [])
+        self.assertEquals(calls, ["hello"])
+        self.assertFalse(Task.objects.exists())
+
+    def test_worker_runs_due_tasks(self):
+        record.delay("first")
+        record.enqueue(args=("later",), countdown=60)
+        self.assertEquals(Worker(concurrency=1).run_once(), 1)
+        self.assertEquals(calls, ["first"])
+        self.assertEquals(Task.objects.filter(status=Task.DONE).count(), 1)
+        self.assertEquals(queue_depth(), {Task.PENDING: 1, Task.RUNNING: 0})
+        self.assertEquals(task_latency()["count"], 1)
+
+    def test_worker_retries_with_backoff(self):
+        explode.delay()
+        worker = Worker(concurrency=1)
+        worker.run_once()
+        task = Task.objects.get()
+        self.assertEquals(task.status, Task.PENDING)
+        self.assertEquals(task.attempts, 1)
+        self.assertGreater(task.run_at, timezone.now())
+        self.assertIn("boom", task.last_error)
+
+        Task.objects.update(run_at=timezone.now())
+        worker.run_once()
+        task.refresh_from_db()
+        self.assertEquals(task.status, Task.FAILED)
+        self.assertEquals(task.attempts, 2)
+
+    def test_unknown_task_fails(self):
+        Task.objects.create(name="tests.missing", run_at=timezone.now())
+        Worker(concurrency=1).run_once()
+        self.assertEquals(Task.objects.get().status, Task.FAILED)
+
+    def test_requeue_stale(self):
+        Task.objects.create(
+            name="tests.record",
+            args=["stale"],
+            status=Task.RUNNING,
+            run_at=timezone.now(),
+            started_at=timezone.now() - timedelta(hours=1),
+        )
+        self.assertEquals(Worker(concurrency=1).requeue_stale(), 1)
+        self.assertEquals(Task.objects.get().status, Task.PENDING)
+
+    def test_requeue_stale_fails_last_attempt(self):
+        Task.objects.create(
+            name="tests.record",
+            status=Task.RUNNING,
+            attempts=3,
+            run_at=timezone.now(),
+            started_at=timezone.now() - timedelta(hours=1),
+        )
+        self.assertEquals(Worker(concurrency=1).requeue_stale(), 0)
+        task = Task.objects.get()
+        self.assertEquals(task.status, Task.FAILED)
+        self.assertIsNotNone(task.finished_at)
+
+    def test_housekeep_requeues_on_interval(self):
+        def stale_task():
+            return Task.objects.create(
+                name="tests.record",
+                status=Task.RUNNING,
+                run_at=timezone.now(),
+                started_at=timezone.now() - timedelta(hours=1),
+            )
+
+        worker = Worker(concurrency=1)
+        task = stale_task()
+        worker.housekeep()
+        task.refresh_from_db()
+        self.assertEquals(task.status, Task.PENDING)
+
+        task = stale_task()
+        worker.housekeep()
+        task.refresh_from_db()
+        self.assertEquals(task.status, Task.RUNNING)
+        worker.last_requeue -= 300
+        worker.housekeep()
+        task.refresh_from_db()
+        self.assertEquals(task.status, Task.PENDING)
+
+    def test_task_stats_command(self):
+        record.delay("hello")
+        out = StringIO()
+        call_command("task_stats", stdout=out)
+        self.assertIn("pending: 1", out.getvalue())
@@ -0,0 +1,154 @@
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Task
+from .registry import get_task, retry_delay
+
+logger = logging.getLogger(__name__)
+
+
+class Worker:
+    def __init__(self, concurrency=4, batch_size=20, poll_interval=1.0):
+        self.concurrency = concurrency
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.executor = None
+        if concurrency > 1:
+            self.executor = ThreadPoolExecutor(max_workers=concurrency)
+        # Monotonic times of the last housekeeping; None runs it right away.
+        self.last_requeue = None
+        self.last_prune = time.monotonic()
+
+    def claim(self):
+        now = timezone.now()
+        due = list(
+            Task.objects.filter(status=Task.PENDING, run_at__lte=now)
+            .order_by("run_at")
+            .values_list("pk", flat=True)[: self.batch_size]
+        )
+        claimed = []
+        for pk in due:
+            # The status filter makes the claim atomic across competing workers.
+            updated = Task.objects.filter(pk=pk, status=Task.PENDING).update(
+                status=Task.RUNNING, started_at=now, attempts=F("attempts") + 1
+            )
+            if updated:
+                claimed.append(pk)
+        return claimed
+
+    def execute(self, pk):
+        task = Task.objects.get(pk=pk)
+        try:
+            func = get_task(task.name)
+        except KeyError:
+            Task.objects.filter(pk=pk).update(
+                status=Task.FAILED,
+                finished_at=timezone.now(),
+                last_error=f"Unknown task: {task.name}",
+            )
+            logger.error("unknown task %s", task.name)
+            return
+        try:
+            func(*task.args, **task.kwargs)
+        except Exception as exc:
+            self.fail(task, exc)
+        else:
+            finished_at = timezone.now()
+            Task.objects.filter(pk=pk).update(
+                status=Task.DONE, finished_at=finished_at, last_error=""
+            )
+            logger.info(
+                "task %s done: waited %.3fs, ran %.3fs",
+                task.name,
+                (task.started_at - task.run_at).total_seconds(),
+                (finished_at - task.started_at).total_seconds(),
+            )
+
+    def fail(self, task, exc):
+        error = f"{type(exc).__name__}: {exc}"
+        if task.attempts < task.max_attempts:
+            Task.objects.filter(pk=task.pk).update(
+                status=Task.PENDING,
+                run_at=timezone.now() + retry_delay(task.attempts),
+                last_error=error,
+            )
+            logger.warning("task %s failed, retrying: %s", task.name, error)
+        else:
+            Task.objects.filter(pk=task.pk).update(
+                status=Task.FAILED, finished_at=timezone.now(), last_error=error
+            )
+            logger.error("task %s failed permanently: %s", task.name, error)
+
+    def _execute_in_thread(self, pk):
+        try:
+            self.execute(pk)
+        finally:
+            connection.close()
+
+    def run_once(self):
+        claimed = self.claim()
+        if self.executor is None:
+            for pk in claimed:
+                self.execute(pk)
+        else:
+            list(self.executor.map(self._execute_in_thread, claimed))
+        return len(claimed)
+
+    def requeue_stale(self):
+        """
+        Hand back tasks left RUNNING by a worker that died mid-task, or fail
+        them if that was their last attempt, so a task that kills its worker
+        is not retried forever.
+        """
+        timeout = getattr(settings, "TASKQUEUE_VISIBILITY_TIMEOUT", 300)
+        now = timezone.now()
+        stale = Task.objects.filter(
+            status=Task.RUNNING, started_at__lt=now - timedelta(seconds=timeout)
+        )
+        failed = stale.filter(attempts__gte=F("max_attempts")).update(
+            status=Task.FAILED,
+            finished_at=now,
+            last_error="Worker stopped before the task finished.",
+        )
+        if failed:
+            logger.error("%d stale task(s) failed permanently", failed)
+        return stale.update(status=Task.PENDING)
+
+    def prune_finished(self):
+        keep = getattr(settings, "TASKQUEUE_KEEP_FINISHED", 24 * 60 * 60)
+        return Task.objects.filter(
+            status=Task.DONE,
+            finished_at__lt=timezone.now() - timedelta(seconds=keep),
+        ).delete()[0]
+
+    def housekeep(self):
+        """
+        Requeue stale tasks every TASKQUEUE_VISIBILITY_TIMEOUT seconds, whether
+        or not the queue is busy, so a crashed worker's tasks are picked up
+        again within about two timeouts; prune finished tasks hourly.
+        """
+        now = time.monotonic()
+        timeout = getattr(settings, "TASKQUEUE_VISIBILITY_TIMEOUT", 300)
+        if self.last_requeue is None or now - self.last_requeue >= timeout:
+            self.requeue_stale()
+            self.last_requeue = now
+        if now - self.last_prune >= 60 * 60:
+            self.prune_finished()
+            self.last_prune = now
+
+    def run(self):
+        try:
+            while True:
+                self.housekeep()
+                if not self.run_once():
+                    time.sleep(self.poll_interval)
+        finally:
+            if self.executor is not None:
+                self.executor.shutdown()
@@ -1,7 +1,130 @@
-from django.contrib import admin
-
-from tweets.models import Like, Tweet
-
-# Register your models here.
-admin.site.register(Tweet)
-admin.site.register(Like)
+from django.contrib import admin
+from django.utils.text import Truncator
+
+from core.paginator import EstimatedCountPaginator
+
+from .models import (
+    ArchivedTweet,
+    FanOut,
+    Like,
+    Mention,
+    Retweet,
+    ScheduledTweet,
+    Tweet,
+    TweetTag,
+)
+
+
+@admin.register(Tweet)
+class TweetAdmin(admin.ModelAdmin):
+    list_display = (
+        "id",
+        "username",
+        "short_content",
+        "like_count",
+        "created_at",
+        "is_deleted",
+    )
+    list_select_related = ("user",)
+    list_filter = ("created_at", "is_deleted")
+    autocomplete_fields = ("user",)
+    search_fields = ("=user__username",)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    ordering = ("-id",)
+
+    def get_queryset(self, request):
+        return Tweet.all_objects.select_related("user")
+
+    @admin.display(description="ユーザー", ordering="user__username")
+    def username(self, obj):
+        return obj.user.username
+
+    @admin.display(description="内容")
+    def short_content(self, obj):
+        return Truncator(obj.content).chars(30)
+
+
+@admin.register(Like)
+class LikeAdmin(admin.ModelAdmin):
+    list_display = ("id", "username", "tweet_id", "created_at")
+    list_select_related = ("user",)
+    list_filter = ("created_at",)
+    autocomplete_fields = ("user",)
+    raw_id_fields = ("tweet",)
+    search_fields = ("=user__username",)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    ordering = ("-id",)
+
+    @admin.display(description="ユーザー", ordering="user__username")
+    def username(self, obj):
+        return obj.user.username
+
+
+@admin.register(Retweet)
+class RetweetAdmin(admin.ModelAdmin):
+    list_display = ("id", "user", "tweet_id", "created_at")
+    list_select_related = ("user",)
+    list_filter = ("created_at",)
+    raw_id_fields = ("tweet", "user")
+    search_fields = ("=user__username",)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    ordering = ("-id",)
+
+
+@admin.register(ScheduledTweet)
+class ScheduledTweetAdmin(admin.ModelAdmin):
+    list_display = ("id", "user", "publish_at", "created_at")
+    list_select_related = ("user",)
+    raw_id_fields = ("user",)
+    search_fields = ("=user__username",)
+    ordering = ("publish_at",)
+
+
+@admin.register(FanOut)
+class FanOutAdmin(admin.ModelAdmin):
+    list_display = (
+        "tweet_id",
+        "follower_count",
+        "pending_shards",
+        "created_at",
+        "finished_at",
+    )
+    search_fields = ("=tweet_id",)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    ordering = ("-id",)
+
+
+@admin.register(ArchivedTweet)
+class ArchivedTweetAdmin(admin.ModelAdmin):
+    list_display = ("id", "user", "created_at", "like_count", "archived_at")
+    list_select_related = ("user",)
+    raw_id_fields = ("user",)
+    search_fields = ("=user__username",)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    ordering = ("-id",)
+
+
+@admin.register(TweetTag)
+class TweetTagAdmin(admin.ModelAdmin):
+    list_display = ("id", "name", "tweet_id", "created_at")
+    raw_id_fields = ("tweet",)
+    search_fields = ("=name",)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    ordering = ("-id",)
+
+
+@admin.register(Mention)
+class MentionAdmin(admin.ModelAdmin):
+    list_display = ("id", "user", "tweet_id", "created_at")
+    list_select_related = ("user",)
+    raw_id_fields = ("tweet", "user")
+    search_fields = ("=user__username",)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    ordering = ("-id",)
@@ -0,0 +1,120 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import prefetch_related_objects
+
+from core.versioning import get_versions
+
+from .models import Tweet, like_count_key
+
+
+def get_like_counts(tweet_ids):
+    """Return {tweet_id: like_count} for live tweets, cached for a few seconds."""
+    keys = {like_count_key(tweet_id): tweet_id for tweet_id in tweet_ids}
+    counts = {keys[key]: count for key, count in cache.get_many(keys).items()}
+    missing = [tweet_id for tweet_id in tweet_ids if tweet_id not in counts]
+    if missing:
+        fetched = dict(
+            Tweet.objects.filter(pk__in=missing).values_list("pk", "like_count")
+        )
+        cache.set_many(
+            {like_count_key(pk): count for pk, count in fetched.items()},
+            getattr(settings, "LIKE_COUNT_CACHE_TIMEOUT", 5),
+        )
+        counts.update(fetched)
+    return counts
+
+
+def set_like_count(tweet_id, like_count):
+    cache.set(
+        like_count_key(tweet_id),
+        like_count,
+        getattr(settings, "LIKE_COUNT_CACHE_TIMEOUT", 5),
+    )
+
+
+def _tweet_key(tweet_id, version):
+    return f"tweets:tweet:{tweet_id}:{version}"
+
+
+def get_tweets(tweet_ids):
+    """
+    Return {tweet_id: Tweet} (with user loaded) for live tweets, reading
+    through a snapshot cache and fetching all misses in one query.
+
+    Keys carry the tweet's "tweet" version, which deletion and archiving
+    bump, and each snapshot records its author's "author" version, which
+    profile edits bump; snapshots with a stale author are refetched.
+    Attachments are prefetched into the snapshot for tweets that have any.
+    """
+    versions = get_versions("tweet", tweet_ids)
+    keys = {_tweet_key(pk, version): pk for pk, version in versions.items()}
+    found = {keys[key]: value for key, value in cache.get_many(keys).items()}
+    author_versions = get_versions(
+        "author", {tweet.user_id for _, tweet in found.values()}
+    )
+    tweets = {
+        pk: tweet
+        for pk, (author_version, tweet) in found.items()
+        if author_versions[tweet.user_id] == author_version
+    }
+    missing = [pk for pk in tweet_ids if pk not in tweets]
+    if missing:
+        fetched = Tweet.objects.select_related("user").in_bulk(missing)
+        prefetch_related_objects(
+            [tweet for tweet in fetched.values() if tweet.attachment_count],
+            "attachments",
+        )
+        author_versions.update(
+            get_versions(
+                "author",
+                {tweet.user_id for tweet in fetched.values()} - set(author_versions),
+            )
+        )
+        cache.set_many(
+            {
+                _tweet_key(pk, versions[pk]): (author_versions[tweet.user_id], tweet)
+                for pk, tweet in fetched.items()
+            },
+            getattr(settings, "TWEET_CACHE_TIMEOUT", 300),
+        )
+        tweets.update(fetched)
+    return tweets
+
+
+def _home_timeline_key(user_id):
+    return f"tweets:home_entries:{user_id}"
+
+
+def get_home_timeline(user_id):
+    """
+    Return the cached ((home_version, unretweet_version), (tweet_head,
+    retweet_head), entries) for a user, or None. Entries are (tweet_id,
+    retweeter_id, created_at) triples, newest first.
+    """
+    return cache.get(_home_timeline_key(user_id))
+
+
+def set_home_timeline(user_id, version, heads, entries):
+    cache.set(
+        _home_timeline_key(user_id),
+        (version, heads, entries),
+        getattr(settings, "HOME_TIMELINE_CACHE_TIMEOUT", 24 * 60 * 60),
+    )
+
+
+HOME_TIMELINE_EVENTS = ("hit", "merge", "miss")
+
+
+def record_home_timeline(event):
+    key = f"tweets:home_stats:{event}"
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 0, None)
+        cache.incr(key)
+
+
+def home_timeline_stats():
+    keys = {f"tweets:home_stats:{event}": event for event in HOME_TIMELINE_EVENTS}
+    found = cache.get_many(keys)
+    return {event: found.get(key, 0) for key, event in keys.items()}
@@ -0,0 +1,47 @@
+import re
+
+from accounts.models import User
+
+from .models import Mention, TweetTag
+
+re_hashtag = re.compile(r"(?:^|(?<=\W))#(\w{1,100})")
+re_mention = re.compile(r"(?:^|(?<=[^\w@]))@([\w.+-]{1,150})")
+
+
+def extract_hashtags(content):
+    """Return the distinct, case-folded hashtags in ``content`` in order."""
+    return list(dict.fromkeys(tag.casefold() for tag in re_hashtag.findall(content)))
+
+
+def extract_mentions(content):
+    """Return the distinct @usernames in ``content`` in order."""
+    return list(dict.fromkeys(name.rstrip(".") for name in re_mention.findall(content)))
+
+
+def index_tweets(tweets):
+    """
+    Write TweetTag and Mention rows for ``tweets``. Mentions of unknown
+    usernames are ignored and existing rows are left alone, so this is safe to
+    run again over the same tweets.
+    """
+    tags = []
+    mentions = {}
+    for tweet in tweets:
+        tags += [
+            TweetTag(tweet=tweet, name=name, created_at=tweet.created_at)
+            for name in extract_hashtags(tweet.content)
+        ]
+        for username in extract_mentions(tweet.content):
+            mentions.setdefault(username, []).append(tweet)
+    TweetTag.objects.bulk_create(tags, ignore_conflicts=True)
+    if not mentions:
+        return
+    users = User.objects.filter(username__in=mentions).values_list("pk", "username")
+    Mention.objects.bulk_create(
+        [
+            Mention(tweet=tweet, user_id=user_id, created_at=tweet.created_at)
+            for user_id, username in users
+            for tweet in mentions[username]
+        ],
+        ignore_conflicts=True,
+    )
@@ -0,0 +1,138 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from accounts.models import FriendShip
+
+from .models import FanOut, FanOutShard, FeedEntry, Tweet
+
+# Follower-count buckets that latency is reported for.
+BUCKETS = [(0, 99), (100, 999), (1000, 9999), (10000, None)]
+
+
+def plan(tweet_ids):
+    """
+    Split each tweet's followers into shards of FANOUT_SHARD_SIZE by follower
+    id and record them, delivering to the author's own feed directly. Return
+    the new FanOutShard rows; tweets already planned are skipped, so a task
+    retried after a crash does not deliver twice.
+    """
+    shard_size = getattr(settings, "FANOUT_SHARD_SIZE", 5000)
+    tweets = Tweet.objects.filter(pk__in=tweet_ids).exclude(
+        pk__in=FanOut.objects.filter(tweet_id__in=tweet_ids).values("tweet_id")
+    )
+    shards = []
+    with transaction.atomic():
+        for tweet in tweets.only("user_id", "created_at"):
+            follower_ids = list(
+                FriendShip.objects.filter(followee_id=tweet.user_id)
+                .order_by("follower_id")
+                .values_list("follower_id", flat=True)
+            )
+            ranges = [
+                (
+                    follower_ids[i],
+                    follower_ids[min(i + shard_size, len(follower_ids)) - 1],
+                )
+                for i in range(0, len(follower_ids), shard_size)
+            ]
+            fan_out = FanOut.objects.create(
+                tweet_id=tweet.pk,
+                follower_count=len(follower_ids),
+                pending_shards=len(ranges),
+                created_at=tweet.created_at,
+                finished_at=None if ranges else timezone.now(),
+            )
+            shards += [
+                FanOutShard(fan_out=fan_out, low=low, high=high) for low, high in ranges
+            ]
+            FeedEntry.objects.bulk_create(
+                [
+                    FeedEntry(
+                        user_id=tweet.user_id, tweet=tweet, created_at=tweet.created_at
+                    )
+                ],
+                ignore_conflicts=True,
+            )
+        return FanOutShard.objects.bulk_create(shards)
+
+
+def deliver(shard_id, batch_size=1000):
+    """
+    Insert the shard's tweet into the feed of every follower in its id range,
+    in batches, unless the tweet has since been deleted. Existing entries are
+    left alone, so a shard can be rerun safely; it only counts towards its
+    fan-out the first time.
+    """
+    shard = FanOutShard.objects.select_related("fan_out").get(pk=shard_id)
+    fan_out = shard.fan_out
+    tweet = Tweet.objects.only("user_id").filter(pk=fan_out.tweet_id).first()
+    with transaction.atomic():
+        if tweet is not None:
+            follower_ids = (
+                FriendShip.objects.filter(
+                    followee_id=tweet.user_id,
+                    follower_id__gte=shard.low,
+                    follower_id__lte=shard.high,
+                )
+                .order_by("follower_id")
+                .values_list("follower_id", flat=True)
+            )
+            FeedEntry.objects.bulk_create(
+                (
+                    FeedEntry(
+                        user_id=follower_id,
+                        tweet_id=fan_out.tweet_id,
+                        created_at=fan_out.created_at,
+                    )
+                    for follower_id in follower_ids.iterator(chunk_size=batch_size)
+                ),
+                batch_size=batch_size,
+                ignore_conflicts=True,
+            )
+        now = timezone.now()
+        if FanOutShard.objects.filter(pk=shard.pk, finished_at=None).update(
+            finished_at=now
+        ):
+            FanOut.objects.filter(pk=fan_out.pk).update(
+                pending_shards=F("pending_shards") - 1
+            )
+            FanOut.objects.filter(
+                pk=fan_out.pk, pending_shards=0, finished_at=None
+            ).update(finished_at=now)
+
+
+def _percentile(values, fraction):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def fan_out_latency(limit=1000):
+    """
+    Seconds from posting to the last follower's delivery for recently
+    finished fan-outs, as percentiles per follower-count bucket.
+    """
+    rows = (
+        FanOut.objects.filter(finished_at__isnull=False)
+        .order_by("-finished_at")
+        .values_list("follower_count", "created_at", "finished_at")[:limit]
+    )
+    latencies = {bucket: [] for bucket in BUCKETS}
+    for follower_count, created_at, finished_at in rows:
+        for low, high in BUCKETS:
+            if follower_count >= low and (high is None or follower_count <= high):
+                latencies[low, high].append((finished_at - created_at).total_seconds())
+                break
+    return {
+        bucket: {
+            "count": len(values),
+            "p50": _percentile(values, 0.5),
+            "p95": _percentile(values, 0.95),
+            "p99": _percentile(values, 0.99),
+            "max": max(values, default=None),
+        }
+        for bucket, values in latencies.items()
+    }
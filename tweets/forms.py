@@ -1,6 +1,10 @@
 from django import forms
+from django.conf import settings
 from django.forms import ModelForm
+from django.template.defaultfilters import filesizeformat
+from django.utils import timezone
 
+from . import media, spam
 from .models import Tweet
 
 
@@ -8,9 +12,72 @@ class TweetForm(ModelForm):
     content = forms.CharField(
         label="",
         max_length=140,
-        widget=forms.Textarea(attrs={"rows": 4, "cols": 35, "placeholder": "いまどうしてる？"}),
+        widget=forms.Textarea(
+            attrs={"rows": 4, "cols": 35, "placeholder": "いまどうしてる？"}
+        ),
+    )
+
+    image = forms.FileField(
+        label="画像",
+        required=False,
+        widget=forms.ClearableFileInput(attrs={"accept": "image/*"}),
     )
 
     class Meta:
         model = Tweet
         fields = ("content",)
+
+    def __init__(self, *args, user=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.user = user
+        self.spam_sketch = None
+
+    def clean_content(self):
+        content = self.cleaned_data["content"]
+        if self.user is not None:
+            verdict, self.spam_sketch = spam.check(self.user.pk, content)
+            if verdict == spam.DUPLICATE:
+                raise forms.ValidationError(
+                    "同じ内容のツイートは続けて投稿できません。"
+                )
+            if verdict == spam.SPAM:
+                raise forms.ValidationError(
+                    "同じ内容のツイートが多数投稿されているため、投稿できません。"
+                )
+        return content
+
+    def clean_image(self):
+        image = self.cleaned_data["image"]
+        if image is None:
+            return None
+        max_size = getattr(settings, "ATTACHMENT_MAX_SIZE", 5 * 1024 * 1024)
+        if image.size > max_size:
+            raise forms.ValidationError(
+                f"画像は{filesizeformat(max_size)}以下にしてください。"
+            )
+        image.image_type = media.sniff_image(image)
+        if image.image_type is None:
+            raise forms.ValidationError(
+                "PNG、JPEG、GIF、WebPの画像を選択してください。"
+            )
+        return image
+
+
+class ScheduledTweetForm(TweetForm):
+    publish_at = forms.DateTimeField(
+        label="予約投稿",
+        required=False,
+        widget=forms.DateTimeInput(attrs={"type": "datetime-local"}),
+    )
+
+    def clean_publish_at(self):
+        publish_at = self.cleaned_data["publish_at"]
+        if publish_at is not None and publish_at <= timezone.now():
+            raise forms.ValidationError("未来の日時を指定してください。")
+        return publish_at
+
+    def clean(self):
+        cleaned_data = super().clean()
+        if cleaned_data.get("publish_at") and cleaned_data.get("image"):
+            self.add_error("image", "予約投稿には画像を添付できません。")
+        return cleaned_data
@@ -0,0 +1,32 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from tweets.models import ArchivedTweet
+
+
+class Command(BaseCommand):
+    help = "Move old tweets from the hot table into the archive in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=settings.TWEET_ARCHIVE_AFTER_DAYS,
+            help="Archive tweets older than this many days.",
+        )
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options["days"])
+        archived = 0
+        while True:
+            moved = ArchivedTweet.objects.archive_before(
+                cutoff, batch_size=options["batch_size"]
+            )
+            if not moved:
+                break
+            archived += moved
+        self.stdout.write(f"Archived {archived} tweet(s).")
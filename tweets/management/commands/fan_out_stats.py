@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+
+from tweets.fanout import fan_out_latency
+from tweets.models import FanOut
+
+
+class Command(BaseCommand):
+    help = (
+        "Show fan-out latency percentiles by follower count for recently "
+        "finished fan-outs, and how many are still in progress."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--limit", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            f"in progress: {FanOut.objects.filter(finished_at=None).count()}"
+        )
+        self.stdout.write(write_latency_table(fan_out_latency(options["limit"])))
+
+
+def write_latency_table(latency):
+    lines = [
+        f"{'followers':<14}{'count':>7}{'p50':>10}{'p95':>10}{'p99':>10}{'max':>10}"
+    ]
+    for (low, high), stats in latency.items():
+        label = f"{low}+" if high is None else f"{low}-{high}"
+        values = [
+            "-" if stats[key] is None else f"{stats[key]:.3f}s"
+            for key in ("p50", "p95", "p99", "max")
+        ]
+        lines.append(
+            f"{label:<14}{stats['count']:>7}" + "".join(f"{v:>10}" for v in values)
+        )
+    return "\n".join(lines)
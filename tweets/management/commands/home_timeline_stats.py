@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from tweets.cache import home_timeline_stats
+
+
+class Command(BaseCommand):
+    help = "Show home timeline cache hit, merge and miss counts."
+
+    def handle(self, *args, **options):
+        stats = home_timeline_stats()
+        total = sum(stats.values())
+        for event, count in stats.items():
+            share = f" ({count / total:.0%})" if total else ""
+            self.stdout.write(f"{event}: {count}{share}")
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+
+from tweets.entities import index_tweets
+from tweets.models import Tweet
+
+
+class Command(BaseCommand):
+    help = "Backfill hashtag and mention rows for existing tweets in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument(
+            "--after", type=int, default=0, help="Resume after this tweet id."
+        )
+
+    def handle(self, *args, **options):
+        last_pk = options["after"]
+        indexed = 0
+        while True:
+            tweets = list(
+                Tweet.objects.filter(pk__gt=last_pk)
+                .only("content", "created_at")
+                .order_by("pk")[: options["batch_size"]]
+            )
+            if not tweets:
+                break
+            index_tweets(tweets)
+            indexed += len(tweets)
+            last_pk = tweets[-1].pk
+            if options["verbosity"] > 1:
+                self.stdout.write(f"Indexed up to tweet {last_pk}.")
+        self.stdout.write(f"Indexed {indexed} tweet(s).")
@@ -0,0 +1,42 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from tweets.scheduling import next_due, publish_due
+
+
+class Command(BaseCommand):
+    help = (
+        "Publish scheduled tweets as they fall due, sleeping until the next "
+        "one between batches."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument(
+            "--max-sleep",
+            type=float,
+            default=5.0,
+            help="Longest wait between checks, so new schedules are picked up.",
+        )
+        parser.add_argument(
+            "--once", action="store_true", help="Publish due tweets once and exit."
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        published = 0
+        while True:
+            count = len(publish_due(batch_size=batch_size))
+            published += count
+            if count == batch_size:
+                continue
+            if options["once"]:
+                break
+            due = next_due()
+            delay = options["max_sleep"]
+            if due is not None:
+                delay = min(delay, max((due - timezone.now()).total_seconds(), 0))
+            time.sleep(delay)
+        self.stdout.write(f"Published {published} scheduled tweet(s).")
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from tweets.models import Tweet
+
+
+class Command(BaseCommand):
+    help = "Purge soft-deleted tweets and their related rows in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        purged = 0
+        for tweet in Tweet.all_objects.filter(is_deleted=True).only("pk").iterator():
+            tweet.purge(batch_size=options["batch_size"])
+            purged += 1
+        self.stdout.write(f"Purged {purged} tweet(s).")
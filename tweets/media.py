@@ -0,0 +1,106 @@
+import os
+from io import BytesIO
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.db.models import F
+from django.http import FileResponse, HttpResponse
+
+from .models import Attachment, Tweet, invalidate_tweets
+
+try:
+    from PIL import Image
+except ImportError:  # pragma: no cover - Pillow is optional
+    Image = None
+
+_SIGNATURES = [
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+]
+
+
+def sniff_image(file):
+    """
+    The image content type of an uploaded ``file`` from its first bytes, or
+    None. Only the header is read, so large uploads stay on disk.
+    """
+    file.seek(0)
+    header = file.read(16)
+    file.seek(0)
+    if header[:4] == b"RIFF" and header[8:12] == b"WEBP":
+        return "image/webp"
+    for signature, content_type in _SIGNATURES:
+        if header.startswith(signature):
+            return content_type
+    return None
+
+
+def attach(tweet, file, content_type):
+    """
+    Store ``file`` as an attachment of ``tweet`` and count it on the tweet.
+    Uploads streamed to a temporary file are moved into the storage rather
+    than copied.
+    """
+    attachment = Attachment.objects.create(
+        tweet=tweet, file=file, content_type=content_type, size=file.size
+    )
+    Tweet.all_objects.filter(pk=tweet.pk).update(
+        attachment_count=F("attachment_count") + 1
+    )
+    tweet.attachment_count += 1
+    return attachment
+
+
+def make_thumbnail(attachment):
+    """
+    Save a thumbnail no larger than ATTACHMENT_THUMBNAIL_SIZE and record the
+    image's dimensions. Without Pillow, or for an unreadable image, the
+    attachment is left as is and pages show the original instead.
+    """
+    if Image is None or attachment.thumbnail:
+        return False
+    with attachment.file.open("rb") as file:
+        try:
+            with Image.open(file) as image:
+                width, height = image.size
+                image.thumbnail(
+                    getattr(settings, "ATTACHMENT_THUMBNAIL_SIZE", (400, 400))
+                )
+                if image.mode not in ("RGB", "L"):
+                    image = image.convert("RGB")
+                buffer = BytesIO()
+                image.save(buffer, "JPEG", quality=85)
+        except (OSError, Image.DecompressionBombError):
+            return False
+    name = os.path.splitext(os.path.basename(attachment.file.name))[0] + ".jpg"
+    with transaction.atomic():
+        attachment.thumbnail.save(name, ContentFile(buffer.getvalue()), save=False)
+        attachment.width, attachment.height = width, height
+        attachment.save(update_fields=["thumbnail", "width", "height"])
+        transaction.on_commit(lambda: invalidate_tweets([attachment.tweet_id]))
+    return True
+
+
+def file_response(field_file, content_type):
+    """
+    Serve a stored file. With SENDFILE_HEADER set the body is left to the
+    front-end server; otherwise the file is streamed in chunks, through the
+    server's wsgi.file_wrapper (and so sendfile()) where it has one.
+    """
+    header = getattr(settings, "SENDFILE_HEADER", None)
+    if header == "X-Accel-Redirect":
+        response = HttpResponse(content_type=content_type)
+        response[header] = quote(settings.SENDFILE_URL_PREFIX + field_file.name)
+    elif header:
+        response = HttpResponse(content_type=content_type)
+        response[header] = field_file.path
+    else:
+        response = FileResponse(field_file.open("rb"), content_type=content_type)
+    # Stored names never change, so clients may keep the file for a day.
+    response["Cache-Control"] = "private, max-age=86400"
+    response["X-Content-Type-Options"] = "nosniff"
+    return response
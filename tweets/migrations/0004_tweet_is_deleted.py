@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-19 11:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tweets", "0003_alter_like_created_at_alter_tweet_created_at"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="tweet",
+            name="is_deleted",
+            field=models.BooleanField(db_index=True, default=False),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 4.2.30 on 2026-10-19 12:19
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tweets", "0007_tweettag_mention"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="tweet",
+            name="conversation_id",
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="tweet",
+            name="in_reply_to",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="replies",
+                to="tweets.tweet",
+            ),
+        ),
+        migrations.AddField(
+            model_name="tweet",
+            name="reply_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name="tweet",
+            index=models.Index(
+                fields=["conversation_id", "created_at", "id"],
+                name="tweet_conversation",
+            ),
+        ),
+    ]
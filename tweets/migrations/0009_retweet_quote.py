@@ -0,0 +1,76 @@
+# Generated by Django 4.2.30 on 2026-10-19 12:23
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("tweets", "0008_tweet_replies"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="tweet",
+            name="quote_of",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="quotes",
+                to="tweets.tweet",
+            ),
+        ),
+        migrations.AddField(
+            model_name="tweet",
+            name="retweet_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.CreateModel(
+            name="Retweet",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True, db_index=True)),
+                (
+                    "tweet",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="retweets",
+                        to="tweets.tweet",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="retweets",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["user", "-created_at", "-id"], name="retweet_user"
+                    )
+                ],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="retweet",
+            constraint=models.UniqueConstraint(
+                fields=("tweet", "user"), name="retweet_unique"
+            ),
+        ),
+    ]
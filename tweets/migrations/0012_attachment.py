@@ -0,0 +1,51 @@
+# Generated by Django 4.2.30 on 2026-10-19 12:54
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tweets", "0011_fanout"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="tweet",
+            name="attachment_count",
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.CreateModel(
+            name="Attachment",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("file", models.FileField(upload_to="attachments/%Y/%m/%d/")),
+                (
+                    "thumbnail",
+                    models.FileField(blank=True, upload_to="thumbnails/%Y/%m/%d/"),
+                ),
+                ("content_type", models.CharField(max_length=50)),
+                ("size", models.PositiveIntegerField()),
+                ("width", models.PositiveIntegerField(blank=True, null=True)),
+                ("height", models.PositiveIntegerField(blank=True, null=True)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "tweet",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="attachments",
+                        to="tweets.tweet",
+                    ),
+                ),
+            ],
+        ),
+    ]
@@ -0,0 +1,83 @@
+# Generated by Django 4.2.30 on 2026-10-19 13:16
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tweets", "0012_attachment"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="archivedtweet",
+            name="attachment_count",
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AlterField(
+            model_name="attachment",
+            name="tweet",
+            field=models.ForeignKey(
+                db_constraint=False,
+                on_delete=django.db.models.deletion.DO_NOTHING,
+                related_name="attachments",
+                to="tweets.tweet",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="mention",
+            name="tweet",
+            field=models.ForeignKey(
+                db_constraint=False,
+                on_delete=django.db.models.deletion.DO_NOTHING,
+                related_name="mentions",
+                to="tweets.tweet",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="retweet",
+            name="tweet",
+            field=models.ForeignKey(
+                db_constraint=False,
+                on_delete=django.db.models.deletion.DO_NOTHING,
+                related_name="retweets",
+                to="tweets.tweet",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="tweet",
+            name="in_reply_to",
+            field=models.ForeignKey(
+                blank=True,
+                db_constraint=False,
+                null=True,
+                on_delete=django.db.models.deletion.DO_NOTHING,
+                related_name="replies",
+                to="tweets.tweet",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="tweet",
+            name="quote_of",
+            field=models.ForeignKey(
+                blank=True,
+                db_constraint=False,
+                null=True,
+                on_delete=django.db.models.deletion.DO_NOTHING,
+                related_name="quotes",
+                to="tweets.tweet",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="tweettag",
+            name="tweet",
+            field=models.ForeignKey(
+                db_constraint=False,
+                on_delete=django.db.models.deletion.DO_NOTHING,
+                related_name="tags",
+                to="tweets.tweet",
+            ),
+        ),
+    ]
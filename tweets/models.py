@@ -1,33 +1,569 @@
-from django.db import models
-from django.urls import reverse
-
-from accounts.models import User
-
-
-class Tweet(models.Model):
-    user = models.ForeignKey(User, on_delete=models.CASCADE)
-    content = models.TextField(verbose_name="内容", max_length=140)
-    created_at = models.DateTimeField(verbose_name="作成日", auto_now_add=True)
-
-    def __str__(self):
-        return self.content
-
-    def get_absolute_url(self):
-        return reverse("tweets:detail", kwargs={"pk": self.pk})
-
-
-class Like(models.Model):
-    tweet = models.ForeignKey(Tweet, on_delete=models.CASCADE)
-    user = models.ForeignKey(User, on_delete=models.CASCADE)
-    created_at = models.DateTimeField(auto_now_add=True)
-
-    class Meta:
-        constraints = [
-            models.UniqueConstraint(
-                fields=["tweet", "user"],
-                name="like_unique",
-            )
-        ]
-
-    def __str__(self):
-        return f"{self.user} likes {self.tweet}"
+from django.apps import apps
+from django.core.cache import cache
+from django.db import IntegrityError, models, transaction
+from django.db.models import F
+from django.db.models.signals import post_delete, pre_delete
+from django.dispatch import receiver
+from django.urls import reverse
+
+from accounts.models import User
+from core.versioning import bump_version
+
+
+def invalidate_tweets(tweet_ids):
+    """Retire cached snapshots of these tweets (see tweets.cache.get_tweets)."""
+    for tweet_id in tweet_ids:
+        bump_version("tweet", tweet_id)
+
+
+def like_count_key(tweet_id):
+    return f"tweets:like_count:{tweet_id}"
+
+
+def forget_like_counts(tweet_ids):
+    """
+    Drop cached like counts (see tweets.cache.get_like_counts) now, and again
+    on commit in case another request cached the old count in between.
+    """
+    keys = [like_count_key(tweet_id) for tweet_id in tweet_ids]
+    cache.delete_many(keys)
+    transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def _delete_in_batches(queryset, batch_size):
+    """Delete ``queryset``'s rows ``batch_size`` at a time."""
+    while True:
+        ids = list(queryset.values_list("pk", flat=True)[:batch_size])
+        if not ids:
+            return
+        queryset.model._base_manager.filter(pk__in=ids).delete()
+
+
+def _update_in_batches(queryset, values, batch_size):
+    """
+    Update ``queryset``'s rows ``batch_size`` at a time; ``values`` must take
+    updated rows out of the queryset.
+    """
+    while True:
+        ids = list(queryset.values_list("pk", flat=True)[:batch_size])
+        if not ids:
+            return
+        queryset.model._base_manager.filter(pk__in=ids).update(**values)
+
+
+def purge_related(tweet_ids, batch_size=1000):
+    """
+    Delete the likes, retweets, tags, mentions, attachments and notifications
+    of ``tweet_ids`` (a list or a values("pk") queryset) in batches, and clear
+    links to them from replies and quotes. Their foreign keys do not cascade,
+    so every hard delete of tweets runs this first.
+    """
+    # Looked up lazily: notifications.models imports this module.
+    notification = apps.get_model("notifications", "Notification")
+    for model in (Like, Retweet, TweetTag, Mention, Attachment, notification):
+        _delete_in_batches(model.objects.filter(tweet_id__in=tweet_ids), batch_size)
+    for field in ("in_reply_to", "quote_of"):
+        _update_in_batches(
+            Tweet.all_objects.filter(**{f"{field}__in": tweet_ids}),
+            {field: None},
+            batch_size,
+        )
+
+
+class TweetManager(models.Manager):
+    def get_queryset(self):
+        return super().get_queryset().filter(is_deleted=False)
+
+
+class Tweet(models.Model):
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    content = models.TextField(verbose_name="内容", max_length=140)
+    created_at = models.DateTimeField(
+        verbose_name="作成日", auto_now_add=True, db_index=True
+    )
+    is_deleted = models.BooleanField(default=False, db_index=True)
+    like_count = models.PositiveIntegerField(default=0)
+    # Links, like the rows below that point at tweets, have no constraint or
+    # cascade: archived tweets keep their ids, so the links stay valid after
+    # archive_before(), and purge_related() clears or deletes them.
+    in_reply_to = models.ForeignKey(
+        "self",
+        related_name="replies",
+        null=True,
+        blank=True,
+        db_constraint=False,
+        on_delete=models.DO_NOTHING,
+    )
+    # Id of the tweet that started the conversation; null for that tweet.
+    conversation_id = models.BigIntegerField(null=True, blank=True)
+    reply_count = models.PositiveIntegerField(default=0)
+    quote_of = models.ForeignKey(
+        "self",
+        related_name="quotes",
+        null=True,
+        blank=True,
+        db_constraint=False,
+        on_delete=models.DO_NOTHING,
+    )
+    retweet_count = models.PositiveIntegerField(default=0)
+    # Lets timelines skip the attachment query for text-only pages.
+    attachment_count = models.PositiveSmallIntegerField(default=0)
+
+    is_archived = False
+
+    objects = TweetManager()
+    all_objects = models.Manager()
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["conversation_id", "created_at", "id"],
+                name="tweet_conversation",
+            ),
+        ]
+
+    def __str__(self):
+        return self.content
+
+    def get_absolute_url(self):
+        return reverse("tweets:detail", kwargs={"pk": self.pk})
+
+    @property
+    def conversation_root_id(self):
+        return self.conversation_id or self.pk
+
+    def save(self, *args, **kwargs):
+        adding = self._state.adding
+        with transaction.atomic():
+            if adding and self.in_reply_to_id and self.conversation_id is None:
+                parent = Tweet.all_objects.only("conversation_id").get(
+                    pk=self.in_reply_to_id
+                )
+                self.conversation_id = parent.conversation_root_id
+            super().save(*args, **kwargs)
+            if adding and self.in_reply_to_id:
+                Tweet.all_objects.filter(pk=self.in_reply_to_id).update(
+                    reply_count=F("reply_count") + 1
+                )
+        if adding:
+            # Cached home timelines merge in tweets above their head once
+            # this version moves; see tweets.timelines.home_timeline().
+            transaction.on_commit(lambda: bump_version("timeline", "home"))
+            if self.in_reply_to_id:
+                transaction.on_commit(self._invalidate_thread)
+
+    def soft_delete(self):
+        with transaction.atomic():
+            updated = Tweet.all_objects.filter(pk=self.pk, is_deleted=False).update(
+                is_deleted=True
+            )
+            if updated and self.in_reply_to_id:
+                Tweet.all_objects.filter(pk=self.in_reply_to_id).update(
+                    reply_count=F("reply_count") - 1
+                )
+        self.is_deleted = True
+        transaction.on_commit(lambda: invalidate_tweets([self.pk]))
+        if self.in_reply_to_id:
+            transaction.on_commit(self._invalidate_thread)
+
+    def _invalidate_thread(self):
+        invalidate_tweets([self.in_reply_to_id])
+        bump_version("conversation", self.conversation_id)
+
+    def purge(self, batch_size=1000):
+        """
+        Delete a soft-deleted tweet's related rows in batches (see
+        purge_related()), then the tweet itself, so no single statement has
+        to delete a viral tweet's rows at once.
+        """
+        purge_related([self.pk], batch_size)
+        Tweet.all_objects.filter(pk=self.pk).delete()
+
+
+class LikeManager(models.Manager):
+    def set_state(self, user, tweet_id, liked):
+        """
+        Like or unlike a tweet without loading it. The Like row and the
+        tweet's like_count change in one transaction (Like.save() bumps the
+        counter on insert). Return (changed,
+        like_count, author_id); raise Tweet.DoesNotExist for missing or
+        deleted tweets.
+        """
+        with transaction.atomic():
+            if liked:
+                try:
+                    with transaction.atomic():
+                        self.create(tweet_id=tweet_id, user=user)
+                    changed = True
+                except IntegrityError:
+                    changed = False
+            else:
+                changed = self.filter(tweet_id=tweet_id, user=user).delete()[0] > 0
+            tweets = Tweet.objects.filter(pk=tweet_id)
+            if changed and not liked:
+                tweets.update(like_count=F("like_count") - 1)
+                forget_like_counts([tweet_id])
+            row = tweets.values_list("like_count", "user_id").first()
+            if row is None and not liked:
+                # Archived tweets keep their likes, which can still be undone.
+                archived = ArchivedTweet.objects.filter(pk=tweet_id)
+                if changed:
+                    archived.update(like_count=F("like_count") - 1)
+                row = archived.values_list("like_count", "user_id").first()
+            if row is None:
+                raise Tweet.DoesNotExist
+        return changed, row[0], row[1]
+
+
+class Like(models.Model):
+    tweet = models.ForeignKey(Tweet, db_constraint=False, on_delete=models.DO_NOTHING)
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    objects = LikeManager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["tweet", "user"],
+                name="like_unique",
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.user} likes {self.tweet_id}"
+
+    def save(self, *args, **kwargs):
+        adding = self._state.adding
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if adding:
+                Tweet.all_objects.filter(pk=self.tweet_id).update(
+                    like_count=F("like_count") + 1
+                )
+                forget_like_counts([self.tweet_id])
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            result = super().delete(*args, **kwargs)
+            if not Tweet.all_objects.filter(pk=self.tweet_id).update(
+                like_count=F("like_count") - 1
+            ):
+                ArchivedTweet.objects.filter(pk=self.tweet_id).update(
+                    like_count=F("like_count") - 1
+                )
+            forget_like_counts([self.tweet_id])
+        return result
+
+
+class RetweetManager(models.Manager):
+    def set_state(self, user, tweet_id, retweeted):
+        """
+        Retweet or undo a retweet, like LikeManager.set_state(). Return
+        (changed, retweet_count, author_id); raise Tweet.DoesNotExist for
+        missing or deleted tweets.
+        """
+        with transaction.atomic():
+            if retweeted:
+                try:
+                    with transaction.atomic():
+                        self.create(tweet_id=tweet_id, user=user)
+                    changed = True
+                except IntegrityError:
+                    changed = False
+            else:
+                changed = self.filter(tweet_id=tweet_id, user=user).delete()[0] > 0
+            tweets = Tweet.objects.filter(pk=tweet_id)
+            if changed and not retweeted:
+                tweets.update(retweet_count=F("retweet_count") - 1)
+                transaction.on_commit(lambda: invalidate_tweets([tweet_id]))
+                transaction.on_commit(lambda: bump_version("timeline", "unretweet"))
+            row = tweets.values_list("retweet_count", "user_id").first()
+            if row is None:
+                raise Tweet.DoesNotExist
+        return changed, row[0], row[1]
+
+
+class Retweet(models.Model):
+    """A user's retweet of a tweet; the content stays on the Tweet row."""
+
+    tweet = models.ForeignKey(
+        Tweet, related_name="retweets", db_constraint=False, on_delete=models.DO_NOTHING
+    )
+    user = models.ForeignKey(User, related_name="retweets", on_delete=models.CASCADE)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    objects = RetweetManager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["tweet", "user"], name="retweet_unique")
+        ]
+        indexes = [
+            models.Index(fields=["user", "-created_at", "-id"], name="retweet_user"),
+        ]
+
+    def __str__(self):
+        return f"{self.user} retweets {self.tweet_id}"
+
+    def save(self, *args, **kwargs):
+        adding = self._state.adding
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if adding:
+                Tweet.all_objects.filter(pk=self.tweet_id).update(
+                    retweet_count=F("retweet_count") + 1
+                )
+        if adding:
+            transaction.on_commit(lambda: invalidate_tweets([self.tweet_id]))
+            transaction.on_commit(lambda: bump_version("timeline", "home"))
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            result = super().delete(*args, **kwargs)
+            Tweet.all_objects.filter(pk=self.tweet_id).update(
+                retweet_count=F("retweet_count") - 1
+            )
+        transaction.on_commit(lambda: invalidate_tweets([self.tweet_id]))
+        transaction.on_commit(lambda: bump_version("timeline", "unretweet"))
+        return result
+
+
+class ScheduledTweet(models.Model):
+    """A tweet waiting to be posted at publish_at; see tweets.scheduling."""
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    content = models.TextField(verbose_name="内容", max_length=140)
+    publish_at = models.DateTimeField(verbose_name="公開日時", db_index=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.content
+
+
+class Attachment(models.Model):
+    """
+    An image attached to a tweet, stored through the default storage. The
+    thumbnail is filled in later by tweets.tasks.make_thumbnail.
+    """
+
+    tweet = models.ForeignKey(
+        Tweet,
+        related_name="attachments",
+        db_constraint=False,
+        on_delete=models.DO_NOTHING,
+    )
+    file = models.FileField(upload_to="attachments/%Y/%m/%d/")
+    thumbnail = models.FileField(upload_to="thumbnails/%Y/%m/%d/", blank=True)
+    content_type = models.CharField(max_length=50)
+    size = models.PositiveIntegerField()
+    width = models.PositiveIntegerField(null=True, blank=True)
+    height = models.PositiveIntegerField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.file.name
+
+    def get_absolute_url(self):
+        return reverse("tweets:attachment", kwargs={"pk": self.pk})
+
+    def get_thumbnail_url(self):
+        if not self.thumbnail:
+            return self.get_absolute_url()
+        return reverse("tweets:attachment_thumbnail", kwargs={"pk": self.pk})
+
+
+@receiver(post_delete, sender=Attachment)
+def delete_attachment_files(sender, instance, **kwargs):
+    """
+    Remove an attachment's files from storage once its row is gone, however
+    it was deleted (purge_related() deletes in bulk). Files are kept if the
+    deleting transaction rolls back.
+    """
+
+    def delete_files():
+        for field_file in (instance.file, instance.thumbnail):
+            if field_file:
+                field_file.storage.delete(field_file.name)
+
+    transaction.on_commit(delete_files)
+
+
+class FeedEntry(models.Model):
+    """
+    A tweet delivered to a follower's feed by fan-out; see tweets.fanout.
+    created_at is copied from the tweet so feeds page on one index.
+    """
+
+    user = models.ForeignKey(User, related_name="+", on_delete=models.CASCADE)
+    # No constraint or cascade: archiving and purging delete tweets in bulk,
+    # and collecting every follower's entry would make that as slow as the
+    # fan-out itself. Entries of missing tweets are dropped when hydrated.
+    tweet = models.ForeignKey(
+        Tweet, related_name="+", db_constraint=False, on_delete=models.DO_NOTHING
+    )
+    created_at = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["user", "tweet"], name="feed_entry_unique")
+        ]
+        indexes = [
+            models.Index(fields=["user", "-created_at", "-tweet"], name="feed_entry"),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id}: {self.tweet_id}"
+
+
+class FanOut(models.Model):
+    """Progress of delivering one tweet to its author's followers."""
+
+    tweet_id = models.BigIntegerField(unique=True)
+    follower_count = models.PositiveIntegerField()
+    pending_shards = models.PositiveIntegerField()
+    # The tweet's created_at, so latency covers the wait in the queue too.
+    created_at = models.DateTimeField()
+    finished_at = models.DateTimeField(null=True, blank=True, db_index=True)
+
+    def __str__(self):
+        return f"{self.tweet_id} to {self.follower_count}"
+
+
+class FanOutShard(models.Model):
+    """A range of follower ids one fan-out task delivers to."""
+
+    fan_out = models.ForeignKey(FanOut, related_name="shards", on_delete=models.CASCADE)
+    low = models.BigIntegerField()
+    high = models.BigIntegerField()
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.fan_out_id} [{self.low}, {self.high}]"
+
+
+class TweetTag(models.Model):
+    """
+    A #hashtag in a tweet. created_at is copied so tag timelines page on one
+    index.
+    """
+
+    tweet = models.ForeignKey(
+        Tweet, related_name="tags", db_constraint=False, on_delete=models.DO_NOTHING
+    )
+    name = models.CharField(max_length=100)
+    created_at = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["name", "tweet"], name="tweet_tag_unique")
+        ]
+        indexes = [
+            models.Index(fields=["name", "-created_at", "-tweet"], name="tweet_tag"),
+        ]
+
+    def __str__(self):
+        return f"#{self.name}"
+
+
+class Mention(models.Model):
+    """An @mention of a user in a tweet."""
+
+    tweet = models.ForeignKey(
+        Tweet, related_name="mentions", db_constraint=False, on_delete=models.DO_NOTHING
+    )
+    user = models.ForeignKey(User, related_name="mentions", on_delete=models.CASCADE)
+    created_at = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["user", "tweet"], name="mention_unique")
+        ]
+        indexes = [
+            models.Index(fields=["user", "-created_at", "-tweet"], name="mention_user"),
+        ]
+
+    def __str__(self):
+        return f"@{self.user}"
+
+
+class ArchivedTweetManager(models.Manager):
+    def archive_before(self, cutoff, batch_size=1000):
+        """
+        Move one batch of live tweets created before ``cutoff`` into the
+        archive. Likes, retweets, tags, mentions, attachments, notifications
+        and links from replies and quotes are left in place under the same
+        tweet id; pages that join them to live tweets no longer show them,
+        while likes can still be undone and attachments stay served for the
+        archived tweet. Return the number of tweets moved.
+        """
+        with transaction.atomic():
+            tweets = list(
+                Tweet.objects.filter(created_at__lt=cutoff)
+                .order_by("pk")
+                .select_for_update()[:batch_size]
+            )
+            if not tweets:
+                return 0
+            self.bulk_create(
+                [
+                    ArchivedTweet(
+                        id=tweet.pk,
+                        user_id=tweet.user_id,
+                        content=tweet.content,
+                        created_at=tweet.created_at,
+                        like_count=tweet.like_count,
+                        attachment_count=tweet.attachment_count,
+                    )
+                    for tweet in tweets
+                ],
+                ignore_conflicts=True,
+            )
+            ids = [tweet.pk for tweet in tweets]
+            Tweet.all_objects.filter(pk__in=ids).delete()
+            transaction.on_commit(lambda: invalidate_tweets(ids))
+        return len(tweets)
+
+
+class ArchivedTweet(models.Model):
+    """Read-only copy of an old tweet, keyed by the original tweet id."""
+
+    id = models.BigIntegerField(primary_key=True)
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    content = models.TextField(verbose_name="内容", max_length=140)
+    created_at = models.DateTimeField(verbose_name="作成日")
+    like_count = models.PositiveIntegerField(default=0)
+    attachment_count = models.PositiveSmallIntegerField(default=0)
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    is_archived = True
+
+    objects = ArchivedTweetManager()
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["user", "-created_at", "-id"], name="archived_tweet_user"
+            ),
+        ]
+
+    def __str__(self):
+        return self.content
+
+    def get_absolute_url(self):
+        return reverse("tweets:detail", kwargs={"pk": self.pk})
+
+    @property
+    def attachments(self):
+        """The attachments kept for the tweet's id; see archive_before()."""
+        return Attachment.objects.filter(tweet_id=self.pk)
+
+
+@receiver(pre_delete, sender=User)
+def purge_user_tweets(sender, instance, **kwargs):
+    """
+    Delete the rows pointing at a deleted user's live and archived tweets,
+    which the cascade to the tweets themselves leaves behind.
+    """
+    purge_related(Tweet.all_objects.filter(user=instance).values("pk"))
+    purge_related(ArchivedTweet.objects.filter(user=instance).values("pk"))
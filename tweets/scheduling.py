@@ -0,0 +1,54 @@
+from django.db import transaction
+from django.utils import timezone
+
+from core.versioning import bump_version
+
+from .entities import index_tweets
+from .models import ScheduledTweet, Tweet
+from .tasks import fan_out_tweets
+
+
+def publish_due(now=None, batch_size=1000):
+    """
+    Publish one batch of scheduled tweets whose publish_at has passed, oldest
+    first, reading the publish_at index. The scheduled rows are deleted and
+    the tweets created, tagged, indexed and queued for fan-out in one
+    transaction; competing workers skip rows locked by each other where the
+    database supports it.
+    Return the published tweets.
+    """
+    now = now or timezone.now()
+    with transaction.atomic():
+        scheduled = list(
+            ScheduledTweet.objects.filter(publish_at__lte=now)
+            .order_by("publish_at")
+            .select_for_update(skip_locked=True)[:batch_size]
+        )
+        if not scheduled:
+            return []
+        ScheduledTweet.objects.filter(pk__in=[item.pk for item in scheduled]).delete()
+        tweets = Tweet.objects.bulk_create(
+            [Tweet(user_id=item.user_id, content=item.content) for item in scheduled]
+        )
+        index_tweets(tweets)
+        fan_out_tweets.delay([tweet.pk for tweet in tweets])
+        # bulk_create skips Tweet.save(), so apply its side effects once per
+        # batch: home timelines merge and authors' profile ETags change.
+        author_ids = {tweet.user_id for tweet in tweets}
+
+        def bump_versions():
+            bump_version("timeline", "home")
+            for author_id in author_ids:
+                bump_version("user", author_id)
+
+        transaction.on_commit(bump_versions)
+    return tweets
+
+
+def next_due():
+    """The earliest pending publish_at, or None."""
+    return (
+        ScheduledTweet.objects.order_by("publish_at")
+        .values_list("publish_at", flat=True)
+        .first()
+    )
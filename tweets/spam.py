@@ -0,0 +1,100 @@
+import hashlib
+import re
+import unicodedata
+import zlib
+
+from django.conf import settings
+from django.core.cache import cache
+
+re_whitespace = re.compile(r"\s+")
+re_url = re.compile(r"https?://\S+")
+
+SHINGLE_SIZE = 3
+BANDS = 4
+ROWS = 4
+_MASK = (1 << 32) - 1
+# Fixed odd multipliers and offsets so signatures agree across processes.
+_PERMUTATIONS = [
+    ((0x9E3779B1 * (2 * i + 1)) & _MASK | 1, (0x7F4A7C15 * (i + 1)) & _MASK)
+    for i in range(BANDS * ROWS)
+]
+
+DUPLICATE = "duplicate"
+SPAM = "spam"
+
+
+def normalize(content):
+    """Fold width, case, URLs and whitespace so trivial edits still match."""
+    content = unicodedata.normalize("NFKC", content).casefold()
+    content = re_url.sub("http://", content)
+    return re_whitespace.sub(" ", content).strip()
+
+
+def minhash(text):
+    """A BANDS * ROWS MinHash signature of ``text``'s character shingles."""
+    if len(text) <= SHINGLE_SIZE:
+        shingles = {text}
+    else:
+        shingles = {
+            text[i : i + SHINGLE_SIZE] for i in range(len(text) - SHINGLE_SIZE + 1)
+        }
+    hashes = [zlib.crc32(shingle.encode()) for shingle in shingles]
+    return [min((a * h + b) & _MASK for h in hashes) for a, b in _PERMUTATIONS]
+
+
+class Sketch:
+    """
+    Cache keys for one tweet's content: its exact hash and one LSH band per
+    ROWS signature values. Tweets sharing a band are near duplicates with
+    high probability once their shingle overlap is around 70% or more.
+    """
+
+    def __init__(self, content):
+        text = normalize(content)
+        self.checks_near = len(text) >= getattr(settings, "SPAM_MIN_LENGTH", 20)
+        digest = hashlib.blake2b(text.encode(), digest_size=16).hexdigest()
+        self.keys = [f"tweets:spam:exact:{digest}"]
+        self.found = {}
+        if self.checks_near:
+            signature = minhash(text)
+            for band in range(BANDS):
+                rows = signature[band * ROWS : (band + 1) * ROWS]
+                self.keys.append(f"tweets:spam:band:{band}:{hash_rows(rows)}")
+
+
+def hash_rows(rows):
+    return zlib.crc32(",".join(map(str, rows)).encode())
+
+
+def check(user_id, content):
+    """
+    Classify ``content`` against recently recorded tweets in one cache
+    round trip. Return (verdict, sketch): DUPLICATE when ``user_id`` posted
+    the same or nearly the same text, SPAM when enough other users did, or
+    None. Short texts are only checked for exact repeats by the same user.
+    """
+    sketch = Sketch(content)
+    sketch.found = found = cache.get_many(sketch.keys)
+    exact = found.get(sketch.keys[0], [])
+    near = {user for users in found.values() for user in users}
+    if user_id in (near if sketch.checks_near else exact):
+        return DUPLICATE, sketch
+    if sketch.checks_near and len(near) >= getattr(settings, "SPAM_DUPLICATE_USERS", 5):
+        return SPAM, sketch
+    return None, sketch
+
+
+def record(user_id, sketch):
+    """
+    Remember that ``user_id`` posted the content ``sketch`` was checked for.
+    Each key keeps the most recent SPAM_DUPLICATE_USERS users for SPAM_WINDOW
+    seconds, so the index stays bounded by the cache's own size limits. The
+    entries read by check() are reused, so concurrent writers may drop each
+    other's users; this is a heuristic, not a lock.
+    """
+    limit = getattr(settings, "SPAM_DUPLICATE_USERS", 5)
+    updated = {}
+    for key in sketch.keys:
+        users = [user for user in sketch.found.get(key, []) if user != user_id]
+        updated[key] = ([user_id] + users)[:limit]
+    cache.set_many(updated, getattr(settings, "SPAM_WINDOW", 60 * 60))
@@ -0,0 +1,40 @@
+from django.db import transaction
+
+from taskqueue.registry import task
+
+from . import fanout, media
+from .models import ArchivedTweet, Attachment, Tweet, purge_related
+
+
+@task
+def purge_tweet(tweet_id):
+    tweet = Tweet.all_objects.filter(pk=tweet_id, is_deleted=True).first()
+    if tweet is not None:
+        tweet.purge()
+    elif not (
+        Tweet.all_objects.filter(pk=tweet_id).exists()
+        or ArchivedTweet.objects.filter(pk=tweet_id).exists()
+    ):
+        # Deleted from the archive.
+        purge_related([tweet_id])
+
+
+@task
+def fan_out_tweets(tweet_ids):
+    # Shard tasks are queued in the same transaction as the plan, so a crash
+    # leaves either both or neither and a retry picks up where this stopped.
+    with transaction.atomic():
+        for shard in fanout.plan(tweet_ids):
+            fan_out_shard.delay(shard.pk)
+
+
+@task
+def fan_out_shard(shard_id):
+    fanout.deliver(shard_id)
+
+
+@task
+def make_thumbnail(attachment_id):
+    attachment = Attachment.objects.filter(pk=attachment_id).first()
+    if attachment is not None:
+        media.make_thumbnail(attachment)
@@ -1,217 +1,1405 @@
-from django.test import TestCase
-from django.urls import reverse
-
-from accounts.models import User
-
-from .models import Like, Tweet
-
-
-class TestHomeView(TestCase):
-    def setUp(self):
-        self.user = User.objects.create_user(
-            username="testuser",
-            email="testemail@email.com",
-            password="testpassword",
-        )
-        self.client.login(username="testuser", password="testpassword")
-        Tweet.objects.create(
-            user=self.user,
-            content="test_tweet1",
-        )
-        Tweet.objects.create(
-            user=self.user,
-            content="test_tweet2",
-        )
-
-    def test_success_get(self):
-        response = self.client.get(reverse("tweets:home"))
-        self.assertEquals(response.status_code, 200)
-        self.assertTemplateUsed(response, "tweets/home.html")
-        self.assertQuerysetEqual(
-            response.context["tweets"], Tweet.objects.order_by("-created_at")
-        )
-
-
-class TestTweetCreateView(TestCase):
-    def setUp(self):
-        self.user = User.objects.create_user(
-            username="testuser",
-            email="testemail@email.com",
-            password="testpassword",
-        )
-        self.client.login(username="testuser", password="testpassword")
-        self.url = reverse("tweets:create")
-
-    def test_success_get(self):
-        response = self.client.get(self.url)
-        self.assertEquals(response.status_code, 200)
-        self.assertTemplateUsed(response, "tweets/tweet_create.html")
-
-    def test_success_post(self):
-        data = {"content": "test_tweet"}
-        response = self.client.post(self.url, data)
-        self.assertRedirects(
-            response,
-            reverse("tweets:home"),
-            status_code=302,
-            target_status_code=200,
-        )
-        self.assertTrue(Tweet.objects.filter(content=data["content"]).exists())
-
-    def test_failure_post_with_empty_content(self):
-        empty_content_data = {"content": ""}
-        response = self.client.post(self.url, empty_content_data)
-        self.assertEquals(response.status_code, 200)
-        self.assertFormError(
-            response,
-            "form",
-            "content",
-            "このフィールドは必須です。",
-        )
-        self.assertFalse(Tweet.objects.exists())
-
-    def test_failure_post_with_too_long_content(self):
-        too_long_content_data = {"content": "a" * 141}
-        response = self.client.post(self.url, too_long_content_data)
-        self.assertEquals(response.status_code, 200)
-        self.assertFormError(
-            response,
-            "form",
-            "content",
-            "この値は 140 文字以下でなければなりません( "
-            + str(len(too_long_content_data["content"]))
-            + " 文字になっています)。",
-        )
-        self.assertFalse(Tweet.objects.exists())
-
-
-class TestTweetDetailView(TestCase):
-    def setUp(self):
-        self.user = User.objects.create_user(
-            username="testuser",
-            email="testemail@email.com",
-            password="testpassword",
-        )
-        self.client.login(username="testuser", password="testpassword")
-        self.tweet = Tweet.objects.create(user=self.user, content="test_tweet")
-
-    def test_success_get(self):
-        response = self.client.get(
-            reverse("tweets:detail", kwargs={"pk": self.tweet.pk})
-        )
-        self.assertEquals(response.status_code, 200)
-        self.assertTemplateUsed(response, "tweets/tweet_detail.html")
-        self.assertEquals(self.tweet, response.context["tweet"])
-
-
-class TestTweetDeleteView(TestCase):
-    def setUp(self):
-        self.user = User.objects.create_user(
-            username="first_user",
-            email="firstemail@email.com",
-            password="first_password",
-        )
-        self.user2 = User.objects.create_user(
-            username="second_user",
-            email="secondemail@email.com",
-            password="second_password",
-        )
-        self.client.login(username="first_user", password="first_password")
-        self.tweet1 = Tweet.objects.create(user=self.user, content="test_tweet")
-        self.tweet2 = Tweet.objects.create(user=self.user2, content="test_tweet2")
-
-    def test_success_post(self):
-        response = self.client.post(
-            reverse("tweets:delete", kwargs={"pk": self.tweet1.pk})
-        )
-        self.assertRedirects(
-            response,
-            reverse("tweets:home"),
-            status_code=302,
-            target_status_code=200,
-        )
-        self.assertFalse(Tweet.objects.filter(content="test_tweet").exists())
-
-    def test_failure_post_with_not_exist_tweet(self):
-        response = self.client.post(reverse("tweets:delete", kwargs={"pk": 10}))
-        self.assertEquals(response.status_code, 404)
-        self.assertEquals(Tweet.objects.count(), 2)
-
-    def test_failure_post_with_incorrect_user(self):
-        response = self.client.post(
-            reverse("tweets:delete", kwargs={"pk": self.tweet2.pk})
-        )
-        self.assertEquals(response.status_code, 403)
-        self.assertEquals(Tweet.objects.count(), 2)
-
-
-class TestFavoriteView(TestCase):
-    def setUp(self):
-        self.user = User.objects.create_user(
-            username="first_user",
-            email="firstemail@email.com",
-            password="first_password",
-        )
-        self.user2 = User.objects.create_user(
-            username="second_user",
-            email="secondemail@email.com",
-            password="second_password",
-        )
-        self.client.login(username="first_user", password="first_password")
-        self.tweet = Tweet.objects.create(user=self.user2, content="test_tweet")
-
-    def test_success_post(self):
-        response = self.client.post(
-            reverse("tweets:like", kwargs={"pk": self.tweet.pk})
-        )
-        self.assertEquals(response.status_code, 200)
-        self.assertTrue(Like.objects.filter(tweet=self.tweet, user=self.user).exists())
-
-    def test_failure_post_with_not_exist_tweet(self):
-        response = self.client.post(reverse("tweets:like", kwargs={"pk": 7274}))
-        self.assertEquals(response.status_code, 404)
-        self.assertFalse(Like.objects.exists())
-
-    def test_failure_post_with_favorited_tweet(self):
-        Like.objects.create(tweet=self.tweet, user=self.user)
-        response = self.client.post(
-            reverse("tweets:like", kwargs={"pk": self.tweet.pk})
-        )
-        self.assertEquals(response.status_code, 200)
-        self.assertEquals(Like.objects.filter(tweet=self.tweet).count(), 1)
-
-
-class TestUnfavoriteView(TestCase):
-    def setUp(self):
-        self.user = User.objects.create_user(
-            username="first_user",
-            email="firstemail@email.com",
-            password="first_password",
-        )
-        self.user2 = User.objects.create_user(
-            username="second_user",
-            email="secondemail@email.com",
-            password="second_password",
-        )
-        self.client.login(username="first_user", password="first_password")
-        self.tweet = Tweet.objects.create(user=self.user2, content="test_tweet")
-        Like.objects.create(tweet=self.tweet, user=self.user)
-
-    def test_success_post(self):
-        response = self.client.post(
-            reverse("tweets:unlike", kwargs={"pk": self.tweet.pk})
-        )
-        self.assertEquals(response.status_code, 200)
-        self.assertFalse(Like.objects.filter(tweet=self.tweet, user=self.user).exists())
-
-    def test_failure_post_with_not_exist_tweet(self):
-        response = self.client.post(reverse("tweets:unlike", kwargs={"pk": 7274}))
-        self.assertEquals(response.status_code, 404)
-        self.assertTrue(Like.objects.filter(tweet=self.tweet, user=self.user).exists())
-
-    def test_failure_post_with_unfavorited_tweet(self):
-        self.client.post(reverse("tweets:unlike", kwargs={"pk": self.tweet.pk}))
-        response = self.client.post(
-            reverse("tweets:unlike", kwargs={"pk": self.tweet.pk})
-        )
-        self.assertEquals(response.status_code, 200)
+import json
+import os
+import shutil
+import tempfile
+import time
+from datetime import timedelta
+from io import BytesIO, StringIO
+from unittest import skipIf
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts import relationships
+from accounts.models import FriendShip, User
+from notifications.models import Notification
+from taskqueue.models import Task
+from taskqueue.worker import Worker
+
+from .cache import get_tweets, home_timeline_stats
+from .entities import extract_hashtags, extract_mentions
+from .fanout import deliver, plan
+from .media import Image, make_thumbnail
+from .models import (
+    ArchivedTweet,
+    Attachment,
+    FanOut,
+    FanOutShard,
+    FeedEntry,
+    Like,
+    Mention,
+    Retweet,
+    ScheduledTweet,
+    Tweet,
+    TweetTag,
+)
+from .scheduling import next_due, publish_due
+from .spam import check, normalize
+from .timelines import conversation, home_timeline, nest, tag_timeline, user_timeline
+
+
+class TestHomeView(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="testuser",
+            email="testemail@email.com",
+            password="testpassword",
+        )
+        self.client.login(username="testuser", password="testpassword")
+        Tweet.objects.create(
+            user=self.user,
+            content="test_tweet1",
+        )
+        Tweet.objects.create(
+            user=self.user,
+            content="test_tweet2",
+        )
+
+    def test_success_get(self):
+        response = self.client.get(reverse("tweets:home"))
+        self.assertEquals(response.status_code, 200)
+        self.assertTemplateUsed(response, "tweets/home.html")
+        self.assertQuerysetEqual(
+            response.context["tweets"], Tweet.objects.order_by("-created_at")
+        )
+
+
+class TestTweetCreateView(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username="testuser",
+            email="testemail@email.com",
+            password="testpassword",
+        )
+        self.client.login(username="testuser", password="testpassword")
+        self.url = reverse("tweets:create")
+
+    def test_success_get(self):
+        response = self.client.get(self.url)
+        self.assertEquals(response.status_code, 200)
+        self.assertTemplateUsed(response, "tweets/tweet_create.html")
+
+    def test_success_post(self):
+        data = {"content": "test_tweet"}
+        response = self.client.post(self.url, data)
+        self.assertRedirects(
+            response,
+            reverse("tweets:home"),
+            status_code=302,
+            target_status_code=200,
+        )
+        self.assertTrue(Tweet.objects.filter(content=data["content"]).exists())
+
+    def test_failure_post_with_empty_content(self):
+        empty_content_data = {"content": ""}
+        response = self.client.post(self.url, empty_content_data)
+        self.assertEquals(response.status_code, 200)
+        self.assertFormError(
+            response,
+            "form",
+            "content",
+            "このフィールドは必須です。",
+        )
+        self.assertFalse(Tweet.objects.exists())
+
+    def test_failure_post_with_too_long_content(self):
+        too_long_content_data = {"content": "a" * 141}
+        response = self.client.post(self.url, too_long_content_data)
+        self.assertEquals(response.status_code, 200)
+        self.assertFormError(
+            response,
+            "form",
+            "content",
+            "この値は 140 文字以下でなければなりません( "
+            + str(len(too_long_content_data["content"]))
+            + " 文字になっています)。",
+        )
+        self.assertFalse(Tweet.objects.exists())
+
+
+class TestTweetDetailView(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="testuser",
+            email="testemail@email.com",
+            password="testpassword",
+        )
+        self.client.login(username="testuser", password="testpassword")
+        self.tweet = Tweet.objects.create(user=self.user, content="test_tweet")
+
+    def test_success_get(self):
+        response = self.client.get(
+            reverse("tweets:detail", kwargs={"pk": self.tweet.pk})
+        )
+        self.assertEquals(response.status_code, 200)
+        self.assertTemplateUsed(response, "tweets/tweet_detail.html")
+        self.assertEquals(self.tweet, response.context["tweet"])
+
+
+class TestTweetDeleteView(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username="first_user",
+            email="firstemail@email.com",
+            password="first_password",
+        )
+        self.user2 = User.objects.create_user(
+            username="second_user",
+            email="secondemail@email.com",
+            password="second_password",
+        )
+        self.client.login(username="first_user", password="first_password")
+        self.tweet1 = Tweet.objects.create(user=self.user, content="test_tweet")
+        self.tweet2 = Tweet.objects.create(user=self.user2, content="test_tweet2")
+
+    def test_success_post(self):
+        response = self.client.post(
+            reverse("tweets:delete", kwargs={"pk": self.tweet1.pk})
+        )
+        self.assertRedirects(
+            response,
+            reverse("tweets:home"),
+            status_code=302,
+            target_status_code=200,
+        )
+        self.assertFalse(Tweet.objects.filter(content="test_tweet").exists())
+        self.assertTrue(
+            Tweet.all_objects.filter(pk=self.tweet1.pk, is_deleted=True).exists()
+        )
+
+    def test_success_post_with_liked_tweet(self):
+        Like.objects.create(tweet=self.tweet1, user=self.user2)
+        self.client.post(reverse("tweets:delete", kwargs={"pk": self.tweet1.pk}))
+        response = self.client.get(reverse("tweets:home"))
+        self.assertNotIn(self.tweet1, response.context["tweets"])
+        self.assertTrue(Like.objects.filter(tweet=self.tweet1).exists())
+
+    @override_settings(TASKQUEUE_ALWAYS_EAGER=True)
+    def test_success_post_purges_tweet(self):
+        Like.objects.create(tweet=self.tweet1, user=self.user2)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse("tweets:delete", kwargs={"pk": self.tweet1.pk}))
+        self.assertFalse(Tweet.all_objects.filter(pk=self.tweet1.pk).exists())
+        self.assertFalse(Like.objects.filter(tweet_id=self.tweet1.pk).exists())
+
+    def test_failure_post_with_deleted_tweet(self):
+        self.tweet1.soft_delete()
+        response = self.client.post(
+            reverse("tweets:delete", kwargs={"pk": self.tweet1.pk})
+        )
+        self.assertEquals(response.status_code, 404)
+
+    def test_failure_post_with_not_exist_tweet(self):
+        response = self.client.post(reverse("tweets:delete", kwargs={"pk": 10}))
+        self.assertEquals(response.status_code, 404)
+        self.assertEquals(Tweet.objects.count(), 2)
+
+    def test_failure_post_with_incorrect_user(self):
+        response = self.client.post(
+            reverse("tweets:delete", kwargs={"pk": self.tweet2.pk})
+        )
+        self.assertEquals(response.status_code, 403)
+        self.assertEquals(Tweet.objects.count(), 2)
+
+
+class TestFavoriteView(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="first_user",
+            email="firstemail@email.com",
+            password="first_password",
+        )
+        self.user2 = User.objects.create_user(
+            username="second_user",
+            email="secondemail@email.com",
+            password="second_password",
+        )
+        self.client.login(username="first_user", password="first_password")
+        self.tweet = Tweet.objects.create(user=self.user2, content="test_tweet")
+
+    def test_success_post(self):
+        response = self.client.post(
+            reverse("tweets:like", kwargs={"pk": self.tweet.pk})
+        )
+        self.assertEquals(response.status_code, 200)
+        self.assertTrue(Like.objects.filter(tweet=self.tweet, user=self.user).exists())
+        self.assertEquals(response.json()["like_counter"], 1)
+
+    def test_failure_post_with_not_exist_tweet(self):
+        response = self.client.post(reverse("tweets:like", kwargs={"pk": 7274}))
+        self.assertEquals(response.status_code, 404)
+        self.assertFalse(Like.objects.exists())
+
+    def test_failure_post_with_favorited_tweet(self):
+        Like.objects.create(tweet=self.tweet, user=self.user)
+        response = self.client.post(
+            reverse("tweets:like", kwargs={"pk": self.tweet.pk})
+        )
+        self.assertEquals(response.status_code, 200)
+        self.assertEquals(Like.objects.filter(tweet=self.tweet).count(), 1)
+
+
+class TestUnfavoriteView(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="first_user",
+            email="firstemail@email.com",
+            password="first_password",
+        )
+        self.user2 = User.objects.create_user(
+            username="second_user",
+            email="secondemail@email.com",
+            password="second_password",
+        )
+        self.client.login(username="first_user", password="first_password")
+        self.tweet = Tweet.objects.create(user=self.user2, content="test_tweet")
+        Like.objects.create(tweet=self.tweet, user=self.user)
+
+    def test_success_post(self):
+        response = self.client.post(
+            reverse("tweets:unlike", kwargs={"pk": self.tweet.pk})
+        )
+        self.assertEquals(response.status_code, 200)
+        self.assertFalse(Like.objects.filter(tweet=self.tweet, user=self.user).exists())
+
+    def test_failure_post_with_not_exist_tweet(self):
+        response = self.client.post(reverse("tweets:unlike", kwargs={"pk": 7274}))
+        self.assertEquals(response.status_code, 404)
+        self.assertTrue(Like.objects.filter(tweet=self.tweet, user=self.user).exists())
+
+    def test_failure_post_with_unfavorited_tweet(self):
+        self.client.post(reverse("tweets:unlike", kwargs={"pk": self.tweet.pk}))
+        response = self.client.post(
+            reverse("tweets:unlike", kwargs={"pk": self.tweet.pk})
+        )
+        self.assertEquals(response.status_code, 200)
+
+
+class TestTweetAdmin(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_superuser(
+            username="admin",
+            email="admin@email.com",
+            password="adminpassword",
+        )
+        self.client.login(username="admin", password="adminpassword")
+        self.tweet = Tweet.objects.create(user=self.user, content="test_tweet")
+        Like.objects.create(tweet=self.tweet, user=self.user)
+
+    def test_success_get_tweet_changelist(self):
+        response = self.client.get(reverse("admin:tweets_tweet_changelist"))
+        self.assertEquals(response.status_code, 200)
+        self.assertContains(response, "test_tweet")
+
+    def test_success_get_like_changelist(self):
+        response = self.client.get(reverse("admin:tweets_like_changelist"))
+        self.assertEquals(response.status_code, 200)
+        self.assertContains(response, "admin")
+
+
+class TestPurgeDeletedTweetsCommand(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="testuser",
+            email="testemail@email.com",
+            password="testpassword",
+        )
+        self.user2 = User.objects.create_user(
+            username="testuser2",
+            email="testemail2@email.com",
+            password="testpassword2",
+        )
+        self.tweet = Tweet.objects.create(user=self.user, content="deleted_tweet")
+        self.tweet2 = Tweet.objects.create(user=self.user, content="alive_tweet")
+        Like.objects.create(tweet=self.tweet, user=self.user)
+        Like.objects.create(tweet=self.tweet, user=self.user2)
+        Like.objects.create(tweet=self.tweet2, user=self.user2)
+        self.tweet.soft_delete()
+
+    def test_purge(self):
+        call_command("purge_deleted_tweets", batch_size=1, stdout=StringIO())
+        self.assertFalse(Tweet.all_objects.filter(pk=self.tweet.pk).exists())
+        self.assertFalse(Like.objects.filter(tweet_id=self.tweet.pk).exists())
+        self.assertTrue(Tweet.objects.filter(pk=self.tweet2.pk).exists())
+        self.assertEquals(Like.objects.filter(tweet=self.tweet2).count(), 1)
+
+    def test_purge_related_rows(self):
+        created_at = self.tweet.created_at
+        Retweet.objects.create(tweet=self.tweet, user=self.user2)
+        TweetTag.objects.create(tweet=self.tweet, name="tag", created_at=created_at)
+        Mention.objects.create(tweet=self.tweet, user=self.user2, created_at=created_at)
+        Notification.objects.record(
+            self.user.pk, self.user2.pk, Notification.LIKE, self.tweet.pk
+        )
+        reply = Tweet.objects.create(
+            user=self.user2, content="reply", in_reply_to=self.tweet
+        )
+        quote = Tweet.objects.create(
+            user=self.user2, content="quote", quote_of=self.tweet
+        )
+        call_command("purge_deleted_tweets", batch_size=1, stdout=StringIO())
+        self.assertFalse(Tweet.all_objects.filter(pk=self.tweet.pk).exists())
+        for model in (Retweet, TweetTag, Mention, Notification):
+            self.assertFalse(model.objects.exists())
+        reply.refresh_from_db()
+        quote.refresh_from_db()
+        self.assertIsNone(reply.in_reply_to_id)
+        self.assertIsNone(quote.quote_of_id)
+
+
+class TestLikeStateView(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="first_user",
+            email="firstemail@email.com",
+            password="first_password",
+        )
+        self.user2 = User.objects.create_user(
+            username="second_user",
+            email="secondemail@email.com",
+            password="second_password",
+        )
+        self.client.login(username="first_user", password="first_password")
+        self.tweet = Tweet.objects.create(user=self.user2, content="test_tweet")
+        self.url = reverse("tweets:like_state", kwargs={"pk": self.tweet.pk})
+
+    def post(self, liked, **extra):
+        return self.client.post(
+            self.url,
+            json.dumps({"liked": liked}),
+            content_type="application/json",
+            **extra,
+        )
+
+    def test_success_post_like(self):
+        response = self.post(True)
+        self.assertEquals(response.status_code, 200)
+        self.assertEquals(
+            response.json(),
+            {"tweet_pk": self.tweet.pk, "liked": True, "like_counter": 1},
+        )
+        self.assertTrue(Like.objects.filter(tweet=self.tweet, user=self.user).exists())
+        self.tweet.refresh_from_db()
+        self.assertEquals(self.tweet.like_count, 1)
+
+    def test_success_post_unlike(self):
+        self.post(True)
+        response = self.post(False)
+        self.assertEquals(response.json()["like_counter"], 0)
+        self.assertFalse(Like.objects.exists())
+        self.tweet.refresh_from_db()
+        self.assertEquals(self.tweet.like_count, 0)
+
+    def test_success_post_is_idempotent(self):
+        self.post(True)
+        self.post(True)
+        self.tweet.refresh_from_db()
+        self.assertEquals(self.tweet.like_count, 1)
+
+    def test_success_post_with_retried_idempotency_key(self):
+        self.post(True, HTTP_IDEMPOTENCY_KEY="key1")
+        self.post(False, HTTP_IDEMPOTENCY_KEY="key2")
+        response = self.post(True, HTTP_IDEMPOTENCY_KEY="key1")
+        self.assertEquals(response.json()["liked"], True)
+        self.assertFalse(Like.objects.exists())
+
+    def test_failure_post_with_reused_idempotency_key(self):
+        self.post(True, HTTP_IDEMPOTENCY_KEY="key1")
+        response = self.post(False, HTTP_IDEMPOTENCY_KEY="key1")
+        self.assertEquals(response.status_code, 422)
+        other = Tweet.objects.create(user=self.user2, content="other")
+        response = self.client.post(
+            reverse("tweets:like_state", kwargs={"pk": other.pk}),
+            {"liked": "true"},
+            HTTP_IDEMPOTENCY_KEY="key1",
+        )
+        self.assertEquals(response.status_code, 422)
+        self.assertEquals(
+            list(Like.objects.values_list("tweet", flat=True)), [self.tweet.pk]
+        )
+
+    def test_success_post_with_form_data(self):
+        response = self.client.post(self.url, {"liked": "true"})
+        self.assertEquals(response.json()["liked"], True)
+
+    def test_failure_post_with_invalid_state(self):
+        response = self.post("hoge")
+        self.assertEquals(response.status_code, 400)
+        self.assertFalse(Like.objects.exists())
+
+    def test_failure_post_with_not_exist_tweet(self):
+        response = self.client.post(
+            reverse("tweets:like_state", kwargs={"pk": 7274}), {"liked": "true"}
+        )
+        self.assertEquals(response.status_code, 404)
+        self.assertFalse(Like.objects.exists())
+
+
+class TestLikeStatesView(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="first_user",
+            email="firstemail@email.com",
+            password="first_password",
+        )
+        self.client.login(username="first_user", password="first_password")
+        self.tweets = [
+            Tweet.objects.create(user=self.user, content=f"test_tweet{i}")
+            for i in range(3)
+        ]
+        Like.objects.create(tweet=self.tweets[0], user=self.user)
+        self.url = reverse("tweets:like_states")
+        cache.clear()
+
+    def test_success_get(self):
+        ids = ",".join(str(tweet.pk) for tweet in self.tweets)
+        with self.assertNumQueries(4):
+            response = self.client.get(self.url, {"ids": ids + ",7274"})
+        self.assertEquals(response.status_code, 200)
+        tweets = response.json()["tweets"]
+        self.assertEquals(
+            tweets[str(self.tweets[0].pk)], {"like_counter": 1, "liked": True}
+        )
+        self.assertEquals(
+            tweets[str(self.tweets[1].pk)], {"like_counter": 0, "liked": False}
+        )
+        self.assertNotIn("7274", tweets)
+
+    def test_success_get_with_cached_counts(self):
+        ids = ",".join(str(tweet.pk) for tweet in self.tweets)
+        self.client.get(self.url, {"ids": ids})
+        with self.assertNumQueries(3):
+            self.client.get(self.url, {"ids": ids})
+
+    def test_failure_get_with_too_many_ids(self):
+        ids = ",".join(str(i) for i in range(101))
+        response = self.client.get(self.url, {"ids": ids})
+        self.assertEquals(response.status_code, 400)
+
+    def test_failure_get_with_invalid_ids(self):
+        response = self.client.get(self.url, {"ids": "1,hoge"})
+        self.assertEquals(response.status_code, 400)
+
+
+class TestTweetArchive(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username="testuser",
+            email="testemail@email.com",
+            password="testpassword",
+        )
+        self.user2 = User.objects.create(username="testuser2")
+        self.client.login(username="testuser", password="testpassword")
+        self.old_tweets = [
+            Tweet.objects.create(user=self.user, content=f"old_tweet{i}")
+            for i in range(3)
+        ]
+        Like.objects.create(tweet=self.old_tweets[0], user=self.user2)
+        Tweet.objects.filter(pk__in=[t.pk for t in self.old_tweets]).update(
+            created_at=timezone.now() - timedelta(days=400)
+        )
+        self.new_tweet = Tweet.objects.create(user=self.user, content="new_tweet")
+        self.reply = Tweet.objects.create(
+            user=self.user2, content="reply", in_reply_to=self.old_tweets[0]
+        )
+        self.quote = Tweet.objects.create(
+            user=self.user2, content="quote", quote_of=self.old_tweets[0]
+        )
+        call_command("archive_tweets", days=365, batch_size=2, stdout=StringIO())
+
+    def test_archive(self):
+        self.assertEquals(list(Tweet.objects.filter(user=self.user)), [self.new_tweet])
+        self.assertEquals(ArchivedTweet.objects.count(), 3)
+        archived = ArchivedTweet.objects.get(pk=self.old_tweets[0].pk)
+        self.assertEquals(archived.content, "old_tweet0")
+        self.assertEquals(archived.like_count, 1)
+        self.assertEquals(Like.objects.get().tweet_id, archived.pk)
+
+    def test_unlike_archived_tweet(self):
+        self.client.force_login(self.user2)
+        url = reverse("tweets:like", kwargs={"pk": self.old_tweets[0].pk})
+        self.assertEquals(self.client.post(url).status_code, 404)
+        response = self.client.post(
+            reverse("tweets:unlike", kwargs={"pk": self.old_tweets[0].pk})
+        )
+        self.assertEquals(response.status_code, 200)
+        self.assertFalse(Like.objects.exists())
+        self.assertEquals(
+            ArchivedTweet.objects.get(pk=self.old_tweets[0].pk).like_count, 0
+        )
+
+    @override_settings(TASKQUEUE_ALWAYS_EAGER=True)
+    def test_success_post_deletes_archived_tweet(self):
+        url = reverse("tweets:delete", kwargs={"pk": self.old_tweets[0].pk})
+        self.assertContains(self.client.get(url), "old_tweet0")
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(url)
+        self.assertRedirects(response, reverse("tweets:home"))
+        self.assertFalse(
+            ArchivedTweet.objects.filter(pk=self.old_tweets[0].pk).exists()
+        )
+        self.assertFalse(Like.objects.exists())
+        self.reply.refresh_from_db()
+        self.assertIsNone(self.reply.in_reply_to_id)
+
+    def test_archive_keeps_related_rows(self):
+        tweet = Tweet.objects.create(user=self.user, content="#tag @testuser2")
+        created_at = tweet.created_at
+        Retweet.objects.create(tweet=tweet, user=self.user2)
+        TweetTag.objects.create(tweet=tweet, name="tag", created_at=created_at)
+        Mention.objects.create(tweet=tweet, user=self.user2, created_at=created_at)
+        Notification.objects.record(
+            self.user.pk, self.user2.pk, Notification.LIKE, tweet.pk
+        )
+        Tweet.objects.filter(pk=tweet.pk).update(
+            created_at=timezone.now() - timedelta(days=400)
+        )
+        call_command("archive_tweets", days=365, stdout=StringIO())
+        self.assertTrue(ArchivedTweet.objects.filter(pk=tweet.pk).exists())
+        for model in (Retweet, TweetTag, Mention, Notification):
+            self.assertEquals(model.objects.get().tweet_id, tweet.pk)
+        self.reply.refresh_from_db()
+        self.quote.refresh_from_db()
+        self.assertEquals(self.reply.in_reply_to_id, self.old_tweets[0].pk)
+        self.assertEquals(self.quote.quote_of_id, self.old_tweets[0].pk)
+
+        self.assertEquals(list(tag_timeline("tag")), [])
+        response = self.client.get(reverse("notifications:inbox"))
+        self.assertContains(response, tweet.get_absolute_url())
+        response = self.client.get(
+            reverse("accounts:user_profile", kwargs={"username": "testuser2"})
+        )
+        self.assertEquals(response.status_code, 200)
+
+    def test_success_get_archived_detail(self):
+        response = self.client.get(
+            reverse("tweets:detail", kwargs={"pk": self.old_tweets[1].pk})
+        )
+        self.assertEquals(response.status_code, 200)
+        self.assertEquals(response.context["tweet"].content, "old_tweet1")
+        self.assertContains(
+            response, reverse("tweets:delete", kwargs={"pk": self.old_tweets[1].pk})
+        )
+
+    def test_user_timeline_reads_through_to_archive(self):
+        page = user_timeline(self.user, per_page=2)
+        self.assertEquals(
+            [tweet.content for tweet in page], ["new_tweet", "old_tweet2"]
+        )
+        page = user_timeline(self.user, page.next_cursor, per_page=2)
+        self.assertEquals(
+            [tweet.content for tweet in page], ["old_tweet1", "old_tweet0"]
+        )
+        self.assertIsNone(page.next_cursor)
+
+    def test_success_get_profile_with_archived_tweets(self):
+        response = self.client.get(
+            reverse("accounts:user_profile", kwargs={"username": self.user.username})
+        )
+        self.assertEquals(response.status_code, 200)
+        self.assertEquals(len(response.context["tweets"]), 4)
+
+
+class TestTweetDetailConditionalGet(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username="testuser",
+            email="testemail@email.com",
+            password="testpassword",
+        )
+        self.user2 = User.objects.create(username="testuser2")
+        self.client.login(username="testuser", password="testpassword")
+        self.tweet = Tweet.objects.create(user=self.user, content="test_tweet")
+        self.url = reverse("tweets:detail", kwargs={"pk": self.tweet.pk})
+
+    def test_success_get_not_modified(self):
+        # The first response sets the CSRF cookie, which is part of the ETag.
+        self.client.get(self.url)
+        response = self.client.get(self.url)
+        self.assertTrue(response["ETag"].startswith('W/"'))
+        self.assertIn("private", response["Cache-Control"])
+        self.assertIn("Cookie", response["Vary"])
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEquals(response.status_code, 304)
+
+    def test_success_get_modified_after_like(self):
+        etag = self.client.get(self.url)["ETag"]
+        Like.objects.set_state(self.user2, self.tweet.pk, True)
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEquals(response.status_code, 200)
+        self.assertNotEquals(response["ETag"], etag)
+
+
+class TestTweetEntities(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username="testuser",
+            email="testemail@email.com",
+            password="testpassword",
+        )
+        self.user2 = User.objects.create(username="testuser2")
+        self.client.login(username="testuser", password="testpassword")
+
+    def test_extract(self):
+        content = "#Django と #日本語 #django @testuser2. mail@example.com a#b"
+        self.assertEquals(extract_hashtags(content), ["django", "日本語"])
+        self.assertEquals(extract_mentions(content), ["testuser2"])
+
+    def test_success_post_indexes_tweet(self):
+        self.client.post(
+            reverse("tweets:create"), {"content": "#hello @testuser2 @nobody"}
+        )
+        tweet = Tweet.objects.get()
+        self.assertEquals(list(tweet.tags.values_list("name", flat=True)), ["hello"])
+        self.assertEquals(
+            list(tweet.mentions.values_list("user", flat=True)), [self.user2.pk]
+        )
+
+    def test_success_get_tag_timeline(self):
+        for i in range(3):
+            self.client.post(reverse("tweets:create"), {"content": f"#hello {i}"})
+        self.client.post(reverse("tweets:create"), {"content": "#other"})
+        Tweet.objects.get(content="#hello 1").soft_delete()
+
+        page = tag_timeline("hello", per_page=1)
+        self.assertEquals([tweet.content for tweet in page], ["#hello 2"])
+        page = tag_timeline("hello", page.next_cursor, per_page=1)
+        self.assertEquals([tweet.content for tweet in page], ["#hello 0"])
+
+        response = self.client.get(reverse("tweets:tag", kwargs={"tag": "Hello"}))
+        self.assertEquals(response.status_code, 200)
+        self.assertTemplateUsed(response, "tweets/timeline.html")
+        self.assertEquals(
+            [tweet.content for tweet in response.context["tweets"]],
+            ["#hello 2", "#hello 0"],
+        )
+
+    def test_success_get_mention_timeline(self):
+        self.client.post(reverse("tweets:create"), {"content": "@testuser2 hi"})
+        response = self.client.get(
+            reverse("tweets:mentions", kwargs={"username": "testuser2"})
+        )
+        self.assertEquals(response.status_code, 200)
+        self.assertEquals(len(response.context["tweets"]), 1)
+
+    def test_failure_get_with_invalid_cursor(self):
+        response = self.client.get(
+            reverse("tweets:tag", kwargs={"tag": "hello"}), {"cursor": "hoge"}
+        )
+        self.assertEquals(response.status_code, 404)
+
+    def test_index_tweets_command(self):
+        for i in range(5):
+            Tweet.objects.create(user=self.user, content=f"#tag{i % 2} @testuser2")
+        out = StringIO()
+        call_command("index_tweets", batch_size=2, stdout=out)
+        call_command("index_tweets", batch_size=2, stdout=out)
+        self.assertIn("Indexed 5 tweet(s).", out.getvalue())
+        self.assertEquals(TweetTag.objects.filter(name="tag0").count(), 3)
+        self.assertEquals(Mention.objects.filter(user=self.user2).count(), 5)
+
+
+class TestHomeTimelineCache(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username="testuser",
+            email="testemail@email.com",
+            password="testpassword",
+        )
+        self.client.login(username="testuser", password="testpassword")
+        self.tweet = Tweet.objects.create(user=self.user, content="test_tweet1")
+
+    def create_tweet(self, content):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Tweet.objects.create(user=self.user, content=content)
+
+    def test_hit_without_queries(self):
+        home_timeline(self.user)
+        with self.assertNumQueries(0):
+            tweets = home_timeline(self.user)
+        self.assertEquals(tweets, [self.tweet])
+        self.assertEquals(home_timeline_stats(), {"hit": 1, "merge": 0, "miss": 1})
+
+    def test_hit_without_queries_at_default_length(self):
+        Tweet.objects.bulk_create(
+            Tweet(user=self.user, content=f"test_tweet{i}")
+            for i in range(settings.HOME_TIMELINE_LENGTH)
+        )
+        home_timeline(self.user)
+        with self.assertNumQueries(0):
+            tweets = home_timeline(self.user)
+        self.assertEquals(len(tweets), settings.HOME_TIMELINE_LENGTH)
+        self.assertEquals(home_timeline_stats(), {"hit": 1, "merge": 0, "miss": 1})
+
+    def test_merge_new_tweets(self):
+        home_timeline(self.user)
+        tweet = self.create_tweet("test_tweet2")
+        # Tweets and retweets above the heads, then the new tweet's row and
+        # like count.
+        with self.assertNumQueries(4):
+            tweets = home_timeline(self.user)
+        self.assertEquals(tweets, [tweet, self.tweet])
+        self.assertEquals(home_timeline_stats()["merge"], 1)
+
+    @override_settings(HOME_TIMELINE_LENGTH=2)
+    def test_bounded_length(self):
+        home_timeline(self.user)
+        tweets = [self.create_tweet(f"test_tweet{i}") for i in range(2, 5)]
+        self.assertEquals(home_timeline(self.user), tweets[:0:-1])
+        response = self.client.get(reverse("tweets:home"))
+        self.assertContains(response, "最新2件まで表示しています。")
+
+    def test_drop_deleted_tweets(self):
+        tweet = self.create_tweet("test_tweet2")
+        self.client.get(reverse("tweets:home"))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse("tweets:delete", kwargs={"pk": tweet.pk}))
+        response = self.client.get(reverse("tweets:home"))
+        self.assertEquals(list(response.context["tweets"]), [self.tweet])
+
+    def test_like_count_is_fresh(self):
+        home_timeline(self.user)
+        self.client.post(reverse("tweets:like", kwargs={"pk": self.tweet.pk}))
+        self.assertEquals(home_timeline(self.user)[0].like_count, 1)
+
+    def test_home_timeline_stats_command(self):
+        home_timeline(self.user)
+        out = StringIO()
+        call_command("home_timeline_stats", stdout=out)
+        self.assertIn("miss: 1 (100%)", out.getvalue())
+
+
+class TestTweetCache(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username="testuser",
+            email="testemail@email.com",
+            password="testpassword",
+        )
+        self.client.login(username="testuser", password="testpassword")
+        self.tweets = [
+            Tweet.objects.create(user=self.user, content=f"test_tweet{i}")
+            for i in range(3)
+        ]
+        self.ids = [tweet.pk for tweet in self.tweets]
+
+    def test_get_many(self):
+        with self.assertNumQueries(1):
+            tweets = get_tweets(self.ids)
+        self.assertEquals(set(tweets), set(self.ids))
+        with self.assertNumQueries(0):
+            tweets = get_tweets(self.ids)
+            self.assertEquals(tweets[self.ids[0]].user, self.user)
+
+    def test_invalidated_by_delete(self):
+        get_tweets(self.ids)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.tweets[0].soft_delete()
+        with self.assertNumQueries(1):
+            tweets = get_tweets(self.ids)
+        self.assertEquals(set(tweets), set(self.ids[1:]))
+
+    def test_invalidated_by_profile_edit(self):
+        get_tweets(self.ids)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.username = "renamed"
+            self.user.save()
+        tweets = get_tweets(self.ids)
+        self.assertEquals(tweets[self.ids[0]].user.username, "renamed")
+
+    def test_detail_from_cache(self):
+        url = reverse("tweets:detail", kwargs={"pk": self.ids[0]})
+        self.client.get(url)
+        # Session, user, the unread count for the ETag and the badge, the
+        # viewer's retweet and the thread; the tweet itself comes from cache.
+        with self.assertNumQueries(6):
+            response = self.client.get(url)
+        self.assertEquals(response.context["tweet"], self.tweets[0])
+
+
+class TestReplies(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username="testuser",
+            email="testemail@email.com",
+            password="testpassword",
+        )
+        self.client.login(username="testuser", password="testpassword")
+        self.root = Tweet.objects.create(user=self.user, content="root")
+
+    def reply(self, tweet, content):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(
+                reverse("tweets:reply", kwargs={"pk": tweet.pk}), {"content": content}
+            )
+        return Tweet.objects.get(content=content)
+
+    def test_success_post(self):
+        response = self.client.post(
+            reverse("tweets:reply", kwargs={"pk": self.root.pk}), {"content": "reply"}
+        )
+        self.assertRedirects(response, self.root.get_absolute_url())
+        reply = Tweet.objects.get(content="reply")
+        self.assertEquals(reply.in_reply_to, self.root)
+        self.assertEquals(reply.conversation_id, self.root.pk)
+        self.root.refresh_from_db()
+        self.assertEquals(self.root.reply_count, 1)
+
+    def test_failure_post_to_missing_tweet(self):
+        response = self.client.post(
+            reverse("tweets:reply", kwargs={"pk": 100}), {"content": "reply"}
+        )
+        self.assertEquals(response.status_code, 404)
+
+    def test_thread(self):
+        reply1 = self.reply(self.root, "reply1")
+        reply2 = self.reply(self.root, "reply2")
+        reply3 = self.reply(reply1, "reply3")
+        self.assertEquals(reply3.conversation_id, self.root.pk)
+
+        with self.assertNumQueries(1):
+            page = conversation(self.root.pk)
+            self.assertEquals(
+                [(tweet.content, depth) for tweet, depth in nest(page.object_list)],
+                [("reply1", 0), ("reply3", 1), ("reply2", 0)],
+            )
+
+        page = conversation(self.root.pk, per_page=2)
+        self.assertEquals(list(page), [reply1, reply2])
+        page = conversation(self.root.pk, page.next_cursor, per_page=2)
+        self.assertEquals(list(page), [reply3])
+
+        response = self.client.get(reverse("tweets:detail", kwargs={"pk": reply3.pk}))
+        self.assertEquals(response.context["root"], self.root)
+        self.assertEquals(len(response.context["thread"]), 3)
+
+    def test_detail_modified_after_reply(self):
+        url = reverse("tweets:detail", kwargs={"pk": self.root.pk})
+        etag = self.client.get(url)["ETag"]
+        self.reply(self.root, "reply")
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEquals(response.status_code, 200)
+        self.assertEquals(response.context["tweet"].reply_count, 1)
+
+    def test_detail_modified_after_reply_author_renamed(self):
+        other = User.objects.create(username="other")
+        Tweet.objects.create(user=other, content="reply", in_reply_to=self.root)
+        url = reverse("tweets:detail", kwargs={"pk": self.root.pk})
+        self.client.get(url)
+        etag = self.client.get(url)["ETag"]
+        # Users not shown on the page leave it unmodified.
+        with self.captureOnCommitCallbacks(execute=True):
+            User.objects.create(username="newcomer")
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEquals(response.status_code, 304)
+        other.username = "renamed"
+        with self.captureOnCommitCallbacks(execute=True):
+            other.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEquals(response.status_code, 200)
+        self.assertContains(response, "renamed")
+
+    def test_delete_reply(self):
+        reply = self.reply(self.root, "reply")
+        reply.soft_delete()
+        reply.soft_delete()
+        self.root.refresh_from_db()
+        self.assertEquals(self.root.reply_count, 0)
+        self.assertEquals(list(conversation(self.root.pk)), [])
+
+
+class TestRetweets(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username="testuser",
+            email="testemail@email.com",
+            password="testpassword",
+        )
+        self.user2 = User.objects.create(username="testuser2")
+        self.user3 = User.objects.create(username="testuser3")
+        self.client.login(username="testuser", password="testpassword")
+        self.tweet = Tweet.objects.create(user=self.user2, content="original")
+        self.other = Tweet.objects.create(user=self.user3, content="other")
+
+    def retweet(self, user, tweet):
+        with self.captureOnCommitCallbacks(execute=True):
+            Retweet.objects.set_state(user, tweet.pk, True)
+
+    def test_success_post(self):
+        url = reverse("tweets:retweet", kwargs={"pk": self.tweet.pk})
+        response = self.client.post(url)
+        self.assertRedirects(response, self.tweet.get_absolute_url())
+        self.client.post(url)
+        self.tweet.refresh_from_db()
+        self.assertEquals(self.tweet.retweet_count, 1)
+
+        self.client.post(reverse("tweets:unretweet", kwargs={"pk": self.tweet.pk}))
+        self.tweet.refresh_from_db()
+        self.assertEquals(self.tweet.retweet_count, 0)
+        self.assertFalse(Retweet.objects.exists())
+
+    def test_failure_post_to_missing_tweet(self):
+        response = self.client.post(reverse("tweets:retweet", kwargs={"pk": 100}))
+        self.assertEquals(response.status_code, 404)
+
+    def test_home_dedupes_retweets(self):
+        home_timeline(self.user)
+        self.retweet(self.user2, self.tweet)
+        self.retweet(self.user3, self.tweet)
+        # Tweets and retweets above the heads, the retweeted tweet whose
+        # snapshot was retired by its new retweet count, and retweeter names.
+        with self.assertNumQueries(4):
+            tweets = home_timeline(self.user)
+        self.assertEquals(tweets, [self.tweet, self.other])
+        self.assertEquals(tweets[0].retweeted_by, self.user3)
+        self.assertEquals(tweets[0].retweet_count, 2)
+        self.assertIsNone(tweets[1].retweeted_by)
+
+    def test_home_drops_removed_retweets(self):
+        self.retweet(self.user2, self.tweet)
+        self.retweet(self.user3, self.tweet)
+        self.assertEquals(home_timeline(self.user)[0].retweeted_by, self.user3)
+        with self.captureOnCommitCallbacks(execute=True):
+            Retweet.objects.set_state(self.user3, self.tweet.pk, False)
+        # Moved back to the remaining retweet.
+        tweets = home_timeline(self.user)
+        self.assertEquals(tweets, [self.tweet, self.other])
+        self.assertEquals(tweets[0].retweeted_by, self.user2)
+        with self.captureOnCommitCallbacks(execute=True):
+            Retweet.objects.set_state(self.user2, self.tweet.pk, False)
+        # Moved back to the tweet's own post.
+        tweets = home_timeline(self.user)
+        self.assertEquals(tweets, [self.other, self.tweet])
+        self.assertIsNone(tweets[1].retweeted_by)
+        self.assertEquals(home_timeline_stats(), {"hit": 0, "merge": 2, "miss": 1})
+
+    def test_home_shows_tweets_retweeted_by_hidden_users(self):
+        self.retweet(self.user3, self.tweet)
+        relationships.mute(self.user, self.user3)
+        tweets = home_timeline(self.user)
+        self.assertEquals(tweets, [self.tweet])
+        self.assertIsNone(tweets[0].retweeted_by)
+
+    def test_profile_includes_retweets(self):
+        own = Tweet.objects.create(user=self.user3, content="own")
+        self.retweet(self.user3, self.tweet)
+        page = user_timeline(self.user3, per_page=2)
+        self.assertEquals(list(page), [self.tweet, own])
+        self.assertEquals(page.object_list[0].retweeted_by, self.user3)
+        page = user_timeline(self.user3, page.next_cursor, per_page=2)
+        self.assertEquals(list(page), [self.other])
+        self.assertIsNone(page.next_cursor)
+
+    def test_quote(self):
+        self.client.post(
+            reverse("tweets:quote", kwargs={"pk": self.tweet.pk}), {"content": "quote"}
+        )
+        quote = Tweet.objects.get(content="quote")
+        self.assertEquals(quote.quote_of, self.tweet)
+        response = self.client.get(reverse("tweets:home"))
+        self.assertEquals(response.context["tweets"][0].quoted, self.tweet)
+        self.assertContains(response, "original", count=2)
+
+
+class TestScheduledTweets(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username="testuser",
+            email="testemail@email.com",
+            password="testpassword",
+        )
+        self.client.login(username="testuser", password="testpassword")
+        self.url = reverse("tweets:create")
+
+    def schedule(self, content, seconds):
+        return ScheduledTweet.objects.create(
+            user=self.user,
+            content=content,
+            publish_at=timezone.now() + timedelta(seconds=seconds),
+        )
+
+    def test_success_post(self):
+        publish_at = timezone.localtime() + timedelta(days=1)
+        data = {
+            "content": "scheduled",
+            "publish_at": publish_at.strftime("%Y-%m-%dT%H:%M"),
+        }
+        response = self.client.post(self.url, data)
+        self.assertRedirects(response, reverse("tweets:home"))
+        self.assertFalse(Tweet.objects.exists())
+        self.assertEquals(ScheduledTweet.objects.get().content, "scheduled")
+
+    def test_failure_post_with_past_publish_at(self):
+        publish_at = timezone.localtime() - timedelta(days=1)
+        data = {
+            "content": "scheduled",
+            "publish_at": publish_at.strftime("%Y-%m-%dT%H:%M"),
+        }
+        response = self.client.post(self.url, data)
+        self.assertEquals(response.status_code, 200)
+        self.assertFormError(
+            response, "form", "publish_at", "未来の日時を指定してください。"
+        )
+        self.assertFalse(ScheduledTweet.objects.exists())
+
+    def test_publish_due(self):
+        self.schedule("#later", 60)
+        self.schedule("#second", -10)
+        self.schedule("#first", -20)
+        home_timeline(self.user)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            tweets = publish_due(batch_size=1)
+        self.assertEquals([tweet.content for tweet in tweets], ["#first"])
+        self.assertEquals(
+            list(TweetTag.objects.values_list("name", flat=True)), ["first"]
+        )
+        self.assertEquals(home_timeline(self.user), tweets)
+
+        out = StringIO()
+        call_command("publish_scheduled_tweets", once=True, stdout=out)
+        self.assertIn("Published 1 scheduled tweet(s).", out.getvalue())
+        self.assertEquals(
+            list(ScheduledTweet.objects.values_list("content", flat=True)), ["#later"]
+        )
+        self.assertEquals(next_due(), ScheduledTweet.objects.get().publish_at)
+
+    def test_publish_throughput(self):
+        now = timezone.now()
+        ScheduledTweet.objects.bulk_create(
+            ScheduledTweet(
+                user=self.user,
+                content=f"#tag{i % 10}",
+                publish_at=now - timedelta(seconds=i),
+            )
+            for i in range(20000)
+        )
+        start = time.perf_counter()
+        while publish_due():
+            pass
+        elapsed = time.perf_counter() - start
+        self.assertEquals(Tweet.objects.count(), 20000)
+        self.assertFalse(ScheduledTweet.objects.exists())
+        # Tens of thousands per minute with a wide margin; see
+        # benchmark_scheduled_tweets for the actual rate.
+        self.assertLess(elapsed, 60)
+
+
+class TestTweetSpam(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username="testuser",
+            email="testemail@email.com",
+            password="testpassword",
+        )
+        self.client.login(username="testuser", password="testpassword")
+        self.url = reverse("tweets:create")
+        self.content = (
+            "期間限定のキャンペーン実施中！今すぐこちらをチェック http://example.com/a"
+        )
+
+    def test_normalize(self):
+        self.assertEquals(
+            normalize("ＨＥＬＬＯ   World https://example.com/x?y=1"),
+            "hello world http://",
+        )
+
+    def test_failure_post_same_content_twice(self):
+        for content in ("おはよう", "おはよう"):
+            response = self.client.post(self.url, {"content": content})
+        self.assertEquals(response.status_code, 200)
+        self.assertFormError(
+            response, "form", "content", "同じ内容のツイートは続けて投稿できません。"
+        )
+        self.assertEquals(Tweet.objects.count(), 1)
+
+    def test_failure_post_near_duplicate(self):
+        self.client.post(self.url, {"content": self.content})
+        response = self.client.post(
+            self.url, {"content": self.content.replace("/a", "/b") + "!!"}
+        )
+        self.assertEquals(response.status_code, 200)
+        self.assertEquals(Tweet.objects.count(), 1)
+
+    def test_short_content_from_other_users_is_allowed(self):
+        for i in range(6):
+            self.client.force_login(User.objects.create(username=f"user{i}"))
+            self.client.post(self.url, {"content": "おはよう"})
+        self.assertEquals(Tweet.objects.count(), 6)
+
+    @override_settings(SPAM_DUPLICATE_USERS=3)
+    def test_failure_post_content_spread_by_many_users(self):
+        for i in range(3):
+            self.client.force_login(User.objects.create(username=f"user{i}"))
+            self.client.post(self.url, {"content": f"{self.content}{i}"})
+        self.client.force_login(self.user)
+        response = self.client.post(self.url, {"content": self.content})
+        self.assertFormError(
+            response,
+            "form",
+            "content",
+            "同じ内容のツイートが多数投稿されているため、投稿できません。",
+        )
+        self.assertEquals(Tweet.objects.count(), 3)
+
+    def test_check_is_fast(self):
+        start = time.perf_counter()
+        for i in range(1000):
+            check(self.user.pk, f"{self.content}{i}")
+        # Well under a millisecond each with the local memory cache.
+        self.assertLess(time.perf_counter() - start, 1)
+
+
+@override_settings(FANOUT_SHARD_SIZE=2)
+class TestFanOut(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username="testuser",
+            email="testemail@email.com",
+            password="testpassword",
+        )
+        self.client.login(username="testuser", password="testpassword")
+        self.followers = [User.objects.create(username=f"fan{i}") for i in range(5)]
+        FriendShip.objects.bulk_create(
+            FriendShip(followee=self.user, follower=fan) for fan in self.followers
+        )
+
+    def post(self, content="test_tweet"):
+        self.client.post(reverse("tweets:create"), {"content": content})
+        return Tweet.objects.latest("pk")
+
+    def test_fan_out_is_sharded_by_follower_id(self):
+        tweet = self.post()
+        self.assertEquals(Task.objects.get().name, "tweets.tasks.fan_out_tweets")
+        self.assertFalse(FeedEntry.objects.exists())
+
+        worker = Worker(concurrency=1)
+        while worker.run_once():
+            pass
+        self.assertEquals(
+            Task.objects.filter(name="tweets.tasks.fan_out_shard").count(), 3
+        )
+        self.assertEquals(
+            set(FeedEntry.objects.values_list("user_id", flat=True)),
+            {self.user.pk} | {fan.pk for fan in self.followers},
+        )
+        fan_out = FanOut.objects.get(tweet_id=tweet.pk)
+        self.assertEquals(fan_out.follower_count, 5)
+        self.assertEquals(fan_out.pending_shards, 0)
+        self.assertIsNotNone(fan_out.finished_at)
+
+    def test_rerun_is_idempotent(self):
+        tweet = self.post()
+        shards = plan([tweet.pk])
+        ids = [fan.pk for fan in self.followers]
+        self.assertEquals(
+            [(shard.low, shard.high) for shard in shards],
+            [(ids[0], ids[1]), (ids[2], ids[3]), (ids[4], ids[4])],
+        )
+        self.assertEquals(plan([tweet.pk]), [])
+        for shard in shards + shards[:1]:
+            deliver(shard.pk)
+        self.assertEquals(FeedEntry.objects.count(), 6)
+        self.assertEquals(FanOut.objects.get().pending_shards, 0)
+        self.assertFalse(FanOutShard.objects.filter(finished_at=None).exists())
+
+    @override_settings(TASKQUEUE_ALWAYS_EAGER=True)
+    def test_following_timeline(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            tweet = self.post()
+        other = User.objects.create(username="other")
+        Tweet.objects.create(user=other, content="unfollowed")
+        fan = self.followers[0]
+        self.client.force_login(fan)
+        response = self.client.get(reverse("tweets:following"))
+        self.assertEquals(response.status_code, 200)
+        self.assertEquals(list(response.context["tweets"]), [tweet])
+
+        relationships.mute(fan, self.user)
+        response = self.client.get(reverse("tweets:following"))
+        self.assertEquals(list(response.context["tweets"]), [])
+
+    @override_settings(TASKQUEUE_ALWAYS_EAGER=True)
+    def test_fan_out_stats(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post()
+        out = StringIO()
+        call_command("fan_out_stats", stdout=out)
+        self.assertIn("in progress: 0", out.getvalue())
+        self.assertRegex(out.getvalue(), r"0-99\s+1\s")
+
+
+PNG = b"\x89PNG\r\n\x1a\n" + b"\0" * 100
+
+
+class TestAttachments(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        settings = override_settings(MEDIA_ROOT=self.media_root)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.user = User.objects.create_user(
+            username="testuser",
+            email="testemail@email.com",
+            password="testpassword",
+        )
+        self.client.login(username="testuser", password="testpassword")
+        self.url = reverse("tweets:create")
+
+    def post(self, content="test_tweet", data=PNG, **extra):
+        image = SimpleUploadedFile("image.png", data)
+        return self.client.post(self.url, {"content": content, "image": image, **extra})
+
+    def test_success_post(self):
+        # Larger than FILE_UPLOAD_MAX_MEMORY_SIZE, so streamed to a temp file.
+        data = PNG + b"\0" * 300 * 1024
+        response = self.post(data=data)
+        self.assertRedirects(response, reverse("tweets:home"))
+        tweet = Tweet.objects.get()
+        self.assertEquals(tweet.attachment_count, 1)
+        attachment = Attachment.objects.get()
+        self.assertEquals(attachment.tweet, tweet)
+        self.assertEquals(attachment.content_type, "image/png")
+        self.assertEquals(attachment.size, len(data))
+        self.assertTrue(attachment.file.path.startswith(self.media_root))
+        self.assertEquals(
+            Task.objects.filter(name="tweets.tasks.make_thumbnail").count(), 1
+        )
+
+    def test_failure_post_with_non_image(self):
+        response = self.post(data=b"not an image")
+        self.assertFormError(
+            response, "form", "image", "PNG、JPEG、GIF、WebPの画像を選択してください。"
+        )
+        self.assertFalse(Tweet.objects.exists())
+
+    @override_settings(ATTACHMENT_MAX_SIZE=10)
+    def test_failure_post_with_too_large_image(self):
+        response = self.post()
+        self.assertFormError(
+            response, "form", "image", "画像は10\xa0バイト以下にしてください。"
+        )
+        self.assertFalse(Attachment.objects.exists())
+
+    def test_failure_post_scheduled_with_image(self):
+        publish_at = timezone.localtime() + timedelta(days=1)
+        response = self.post(publish_at=publish_at.strftime("%Y-%m-%dT%H:%M"))
+        self.assertFormError(
+            response, "form", "image", "予約投稿には画像を添付できません。"
+        )
+        self.assertFalse(ScheduledTweet.objects.exists())
+
+    def test_success_get_attachment(self):
+        self.post()
+        attachment = Attachment.objects.get()
+        response = self.client.get(attachment.get_absolute_url())
+        self.assertEquals(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertEquals(b"".join(response.streaming_content), PNG)
+        self.assertEquals(response["Content-Type"], "image/png")
+        self.assertEquals(
+            self.client.get(
+                reverse("tweets:attachment_thumbnail", kwargs={"pk": attachment.pk})
+            ).status_code,
+            404,
+        )
+
+    def test_sendfile_headers(self):
+        self.post()
+        attachment = Attachment.objects.get()
+        with override_settings(SENDFILE_HEADER="X-Accel-Redirect"):
+            response = self.client.get(attachment.get_absolute_url())
+        self.assertEquals(
+            response["X-Accel-Redirect"], f"/protected-media/{attachment.file.name}"
+        )
+        self.assertEquals(response.content, b"")
+        with override_settings(SENDFILE_HEADER="X-Sendfile"):
+            response = self.client.get(attachment.get_absolute_url())
+        self.assertEquals(response["X-Sendfile"], attachment.file.path)
+
+    def test_deleted_tweet_attachment_is_not_served(self):
+        self.post()
+        attachment = Attachment.objects.get()
+        attachment.tweet.soft_delete()
+        response = self.client.get(attachment.get_absolute_url())
+        self.assertEquals(response.status_code, 404)
+
+    def test_purge_deletes_files(self):
+        self.post()
+        attachment = Attachment.objects.get()
+        path = attachment.file.path
+        attachment.tweet.soft_delete()
+        with self.captureOnCommitCallbacks(execute=True):
+            attachment.tweet.purge()
+        self.assertFalse(Attachment.objects.exists())
+        self.assertFalse(os.path.exists(path))
+
+    def test_user_delete_deletes_related_rows_and_files(self):
+        self.post()
+        attachment = Attachment.objects.get()
+        path = attachment.file.path
+        fan = User.objects.create(username="fan")
+        Retweet.objects.create(tweet=attachment.tweet, user=fan)
+        Like.objects.create(tweet=attachment.tweet, user=fan)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.delete()
+        for model in (Attachment, Retweet, Like):
+            self.assertFalse(model.objects.exists())
+        self.assertFalse(os.path.exists(path))
+
+    def test_archived_tweet_keeps_attachments(self):
+        self.post()
+        attachment = Attachment.objects.get()
+        ArchivedTweet.objects.archive_before(timezone.now() + timedelta(days=1))
+        response = self.client.get(attachment.get_absolute_url())
+        self.assertEquals(response.status_code, 200)
+        response = self.client.get(
+            reverse("tweets:detail", kwargs={"pk": attachment.tweet_id})
+        )
+        self.assertContains(response, attachment.get_absolute_url())
+
+    def test_home_loads_attachments_in_one_query(self):
+        for i in range(2):
+            self.post(f"tweet{i}")
+        url = reverse("tweets:home")
+        self.client.get(url)
+        cache.clear()
+        # Cold caches; attachments of both tweets come in one query.
+        with self.assertNumQueries(12) as context:
+            response = self.client.get(url)
+        self.assertEquals(len(response.context["tweets"]), 2)
+        self.assertContains(response, "<img", count=2)
+        queries = [query["sql"] for query in context.captured_queries]
+        self.assertEquals(
+            len([sql for sql in queries if "tweets_attachment" in sql]), 1
+        )
+
+    @skipIf(Image is None, "Pillow is not installed")
+    def test_make_thumbnail(self):
+        buffer = BytesIO()
+        Image.new("RGB", (800, 600)).save(buffer, "PNG")
+        self.post(data=buffer.getvalue())
+        attachment = Attachment.objects.get()
+        self.assertTrue(make_thumbnail(attachment))
+        self.assertEquals((attachment.width, attachment.height), (800, 600))
+        with Image.open(attachment.thumbnail.path) as thumbnail:
+            self.assertEquals(thumbnail.size, (400, 300))
@@ -0,0 +1,302 @@
+from django.conf import settings
+
+from accounts import relationships
+from accounts.models import User
+from core.paginator import CursorPage, CursorPaginator, MergedCursorPaginator
+from core.versioning import get_versions
+
+from .cache import (
+    get_home_timeline,
+    get_like_counts,
+    get_tweets,
+    record_home_timeline,
+    set_home_timeline,
+)
+from .models import ArchivedTweet, FeedEntry, Mention, Retweet, Tweet, TweetTag
+
+
+def hydrate(tweet_ids):
+    """
+    Live tweets for ``tweet_ids`` in the same order, from the snapshot cache
+    with like counts overlaid from their short-lived cache. Ids of deleted or
+    archived tweets are dropped. Quoted tweets are loaded in one more round
+    and set as ``quoted``.
+    """
+    tweets = get_tweets(tweet_ids)
+    quoted_ids = {tweet.quote_of_id for tweet in tweets.values()} - {None}
+    quoted = get_tweets([pk for pk in quoted_ids if pk not in tweets])
+    quoted.update(tweets)
+    like_counts = get_like_counts(list(tweets))
+    hydrated = []
+    for pk in tweet_ids:
+        if pk in tweets and pk in like_counts:
+            tweet = tweets[pk]
+            tweet.like_count = like_counts[pk]
+            tweet.quoted = quoted.get(tweet.quote_of_id)
+            hydrated.append(tweet)
+    return hydrated
+
+
+def _with_retweeters(entries, tweets):
+    """
+    Pair hydrated ``tweets`` with (tweet_id, retweeter_id, ...) ``entries``,
+    setting ``retweeted_by`` and keeping the first entry for each tweet.
+    """
+    tweets = {tweet.pk: tweet for tweet in tweets}
+    retweeter_ids = {entry[1] for entry in entries} - {None}
+    retweeters = User.objects.only("username").in_bulk(retweeter_ids)
+    timeline = []
+    seen = set()
+    for tweet_id, user_id, *_ in entries:
+        if tweet_id in tweets and tweet_id not in seen:
+            seen.add(tweet_id)
+            tweet = tweets[tweet_id]
+            tweet.retweeted_by = retweeters.get(user_id)
+            timeline.append(tweet)
+    return timeline
+
+
+def user_timeline(user, cursor=None, per_page=20, viewer=None):
+    """
+    A user's tweets and retweets, newest first. Tweets moved to ArchivedTweet
+    are merged in as a third source, so the page reads through to the archive
+    once the hot table runs out. Retweets of authors hidden from ``viewer``
+    are left out.
+    """
+    retweets = Retweet.objects.filter(user=user)
+    if viewer is not None:
+        retweets = retweets.filter(relationships.hidden_q(viewer.pk, "tweet__user_id"))
+    page = MergedCursorPaginator(
+        [
+            CursorPaginator(
+                Tweet.objects.filter(user=user).only("created_at"), per_page
+            ),
+            CursorPaginator(
+                ArchivedTweet.objects.select_related("user").filter(user=user),
+                per_page,
+            ),
+            CursorPaginator(retweets.only("tweet", "created_at"), per_page),
+        ]
+    ).page(cursor)
+    entries = [
+        (obj.tweet_id, user.pk) if source == 2 else (obj.pk, None)
+        for obj, source in page.object_list
+    ]
+    archived = [obj for obj, source in page.object_list if source == 1]
+    live = hydrate(
+        list(
+            dict.fromkeys(
+                obj.tweet_id if source == 2 else obj.pk
+                for obj, source in page.object_list
+                if source != 1
+            )
+        )
+    )
+    return CursorPage(_with_retweeters(entries, live + archived), page.next_cursor)
+
+
+def _entity_timeline(queryset, cursor, per_page, viewer):
+    queryset = queryset.filter(tweet__is_deleted=False)
+    if viewer is not None:
+        queryset = queryset.filter(relationships.hidden_q(viewer.pk, "tweet__user_id"))
+    page = CursorPaginator(
+        queryset.only("tweet", "created_at"),
+        per_page,
+        ordering=("-created_at", "-tweet"),
+    ).page(cursor)
+    return CursorPage(hydrate([row.tweet_id for row in page]), page.next_cursor)
+
+
+def tag_timeline(name, cursor=None, per_page=20, viewer=None):
+    """Live tweets tagged #name, newest first, paged on the TweetTag index."""
+    return _entity_timeline(
+        TweetTag.objects.filter(name=name), cursor, per_page, viewer
+    )
+
+
+def mention_timeline(user, cursor=None, per_page=20, viewer=None):
+    """Live tweets mentioning ``user``, newest first."""
+    return _entity_timeline(Mention.objects.filter(user=user), cursor, per_page, viewer)
+
+
+def following_timeline(user, cursor=None, per_page=20):
+    """
+    Tweets delivered to ``user``'s feed by fan-out (their own and those of
+    accounts they follow), newest first.
+    """
+    return _entity_timeline(FeedEntry.objects.filter(user=user), cursor, per_page, user)
+
+
+def conversation(root_id, cursor=None, per_page=50, viewer=None):
+    """
+    Replies in the conversation started by ``root_id``, oldest first, read
+    with one query on the (conversation_id, created_at, id) index.
+    """
+    replies = Tweet.objects.select_related("user").filter(conversation_id=root_id)
+    if viewer is not None:
+        replies = replies.filter(relationships.hidden_q(viewer.pk, "user_id"))
+    return CursorPaginator(
+        replies,
+        per_page,
+        ordering=("created_at", "pk"),
+    ).page(cursor)
+
+
+def nest(tweets):
+    """
+    Order ``tweets`` depth first by in_reply_to and return (tweet, depth)
+    pairs. Tweets whose parent is not in ``tweets`` start at depth 0.
+    """
+    ids = {tweet.pk for tweet in tweets}
+    children = {}
+    roots = []
+    for tweet in tweets:
+        if tweet.in_reply_to_id in ids:
+            children.setdefault(tweet.in_reply_to_id, []).append(tweet)
+        else:
+            roots.append(tweet)
+    nested = []
+    stack = [(tweet, 0) for tweet in reversed(roots)]
+    while stack:
+        tweet, depth = stack.pop()
+        nested.append((tweet, depth))
+        stack += [(child, depth + 1) for child in reversed(children.get(tweet.pk, []))]
+    return nested
+
+
+def author_ids(tweets):
+    """
+    Ids of the users shown with hydrated ``tweets``: their authors, quoted
+    authors and retweeters. Pages key their ETags on these authors' versions.
+    """
+    ids = set()
+    for tweet in tweets:
+        ids.add(tweet.user_id)
+        quoted = getattr(tweet, "quoted", None)
+        if quoted is not None:
+            ids.add(quoted.user_id)
+        retweeted_by = getattr(tweet, "retweeted_by", None)
+        if retweeted_by is not None:
+            ids.add(retweeted_by.pk)
+    return ids
+
+
+def _home_entries(tweets, retweets):
+    """
+    Merge (pk, created_at) tweet rows and (tweet_id, user_id, created_at)
+    retweet rows, newest first, into (tweet_id, retweeter_id, created_at)
+    entries.
+    """
+    entries = [(pk, None, created_at) for pk, created_at in tweets]
+    entries += retweets
+    return sorted(entries, key=lambda entry: entry[2], reverse=True)
+
+
+def _dedupe(entries):
+    seen = set()
+    deduped = []
+    for entry in entries:
+        if entry[0] not in seen:
+            seen.add(entry[0])
+            deduped.append(entry)
+    return deduped
+
+
+def _drop_unretweets(entries, length):
+    """
+    Drop ``entries`` whose retweet has been undone. Each tweet that lost its
+    entry goes back in at its latest remaining retweet or its own post,
+    unless that falls below a full timeline's oldest entry.
+    """
+    retweeted = {tweet_id for tweet_id, user_id, _ in entries if user_id is not None}
+    retweets = list(
+        Retweet.objects.filter(tweet_id__in=retweeted).values_list(
+            "tweet_id", "user_id", "created_at"
+        )
+    )
+    existing = {(tweet_id, user_id) for tweet_id, user_id, _ in retweets}
+    kept = [entry for entry in entries if entry[1] is None or entry[:2] in existing]
+    lost = {entry[0] for entry in entries} - {entry[0] for entry in kept}
+    if not lost:
+        return kept
+    returned = _home_entries(
+        Tweet.objects.filter(pk__in=lost).values_list("pk", "created_at"),
+        [row for row in retweets if row[0] in lost],
+    )
+    if len(entries) >= length:
+        oldest = entries[-1][2]
+        returned = [entry for entry in returned if entry[2] >= oldest]
+    return _dedupe(sorted(kept + returned, key=lambda e: e[2], reverse=True))
+
+
+def home_timeline(user):
+    """
+    The newest HOME_TIMELINE_LENGTH tweets and retweets for ``user``'s home
+    page, one entry per tweet at its latest tweet or retweet.
+
+    Entries are cached per user with the highest tweet and retweet ids seen
+    (the heads) and the "timeline" versions current when they were read. While
+    they are unchanged the page is served from cache alone; after new tweets
+    or retweets are saved ("home" bumped) only rows above the heads are
+    fetched and merged in, and after a retweet is removed ("unretweet"
+    bumped) the cached retweet entries are checked in one query and those
+    undone are dropped or moved back; see _drop_unretweets().
+    Rows come from hydrate(); tweets by users hidden from ``user`` are
+    filtered out against the cached hidden-id array, and retweets by them
+    are shown as the plain tweet.
+    """
+    length = getattr(settings, "HOME_TIMELINE_LENGTH", 200)
+    # Read the version before querying so a tweet committed meanwhile bumps
+    # it past the version stored with this read.
+    versions = get_versions("timeline", ["home", "unretweet"])
+    version = (versions["home"], versions["unretweet"])
+    cached = get_home_timeline(user.pk)
+    if cached is not None and cached[0] == version:
+        record_home_timeline("hit")
+        _, heads, entries = cached
+    else:
+        if cached is None:
+            record_home_timeline("miss")
+            heads, entries = (0, 0), []
+        else:
+            record_home_timeline("merge")
+            _, heads, entries = cached
+            if cached[0][1] != version[1]:
+                entries = _drop_unretweets(entries, length)
+        tweets = list(
+            Tweet.objects.filter(pk__gt=heads[0])
+            .order_by("-created_at", "-pk")
+            .values_list("pk", "created_at")[:length]
+        )
+        retweets = list(
+            Retweet.objects.filter(pk__gt=heads[1])
+            .order_by("-created_at", "-pk")
+            .values_list("pk", "tweet_id", "user_id", "created_at")[:length]
+        )
+        entries = _dedupe(
+            sorted(
+                _home_entries(tweets, [row[1:] for row in retweets]) + entries,
+                key=lambda entry: entry[2],
+                reverse=True,
+            )
+        )[:length]
+        heads = (
+            max([pk for pk, _ in tweets], default=heads[0]),
+            max([row[0] for row in retweets], default=heads[1]),
+        )
+        set_home_timeline(user.pk, version, heads, entries)
+
+    hidden = set(relationships.hidden_ids(user.pk))
+    if hidden:
+        # A retweet by a hidden user shows the tweet as posted instead; the
+        # tweet itself is only left out for hidden authors, below.
+        entries = [
+            (tweet_id, None if user_id in hidden else user_id)
+            for tweet_id, user_id, _ in entries
+        ]
+    tweets = [
+        tweet
+        for tweet in hydrate([entry[0] for entry in entries])
+        if tweet.user_id not in hidden
+    ]
+    return _with_retweeters(entries, tweets)
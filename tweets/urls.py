@@ -1,14 +1,33 @@
-from django.urls import path
-
-from . import views
-
-app_name = "tweets"
-
-urlpatterns = [
-    path("home/", views.HomeView.as_view(), name="home"),
-    path("create/", views.TweetCreateView.as_view(), name="create"),
-    path("<int:pk>/", views.TweetDetailView.as_view(), name="detail"),
-    path("<int:pk>/delete/", views.TweetDeleteView.as_view(), name="delete"),
-    path("<int:pk>/like/", views.LikeView.as_view(), name="like"),
-    path("<int:pk>/unlike/", views.UnlikeView.as_view(), name="unlike"),
-]
+from django.urls import path
+
+from . import views
+
+app_name = "tweets"
+
+urlpatterns = [
+    path("home/", views.HomeView.as_view(), name="home"),
+    path("likes/", views.LikeStatesView.as_view(), name="like_states"),
+    path("create/", views.TweetCreateView.as_view(), name="create"),
+    path("following/", views.FollowingTimelineView.as_view(), name="following"),
+    path("tags/<str:tag>/", views.TagTimelineView.as_view(), name="tag"),
+    path(
+        "mentions/<str:username>/",
+        views.MentionTimelineView.as_view(),
+        name="mentions",
+    ),
+    path("<int:pk>/", views.TweetDetailView.as_view(), name="detail"),
+    path("<int:pk>/reply/", views.ReplyView.as_view(), name="reply"),
+    path("<int:pk>/quote/", views.QuoteView.as_view(), name="quote"),
+    path("<int:pk>/retweet/", views.RetweetView.as_view(), name="retweet"),
+    path("<int:pk>/unretweet/", views.UnretweetView.as_view(), name="unretweet"),
+    path("media/<int:pk>/", views.AttachmentView.as_view(), name="attachment"),
+    path(
+        "media/<int:pk>/thumbnail/",
+        views.AttachmentView.as_view(thumbnail=True),
+        name="attachment_thumbnail",
+    ),
+    path("<int:pk>/delete/", views.TweetDeleteView.as_view(), name="delete"),
+    path("<int:pk>/like/", views.LikeView.as_view(), name="like"),
+    path("<int:pk>/unlike/", views.UnlikeView.as_view(), name="unlike"),
+    path("<int:pk>/like_state/", views.LikeStateView.as_view(), name="like_state"),
+]
@@ -1,78 +1,515 @@
-from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
-from django.http import JsonResponse
-from django.shortcuts import get_object_or_404
-from django.urls import reverse_lazy
-from django.views.generic import CreateView, DeleteView, DetailView, ListView, View
-
-from .forms import TweetForm
-from .models import Like, Tweet
-
-# Create your views here.
-
-
-class HomeView(LoginRequiredMixin, ListView):
-    model = Tweet
-    template_name = "tweets/home.html"
-    context_object_name = "tweets"
-
-    def get_queryset(self):
-        return Tweet.objects.select_related("user").order_by("-created_at")
-
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        context["liked_list"] = Like.objects.filter(user=self.request.user).values_list(
-            "tweet", flat=True
-        )
-        return context
-
-
-class TweetCreateView(LoginRequiredMixin, CreateView):
-    template_name = "tweets/tweet_create.html"
-    form_class = TweetForm
-    success_url = reverse_lazy("tweets:home")
-
-    def form_valid(self, form):
-        form.instance.user = self.request.user
-        return super().form_valid(form)
-
-
-class TweetDetailView(LoginRequiredMixin, DetailView):
-    model = Tweet
-    template_name = "tweets/tweet_detail.html"
-
-
-class TweetDeleteView(LoginRequiredMixin, UserPassesTestMixin, DeleteView):
-    model = Tweet
-    template_name = "tweets/tweet_delete.html"
-    success_url = reverse_lazy("tweets:home")
-
-    def test_func(self):
-        tweet = self.get_object()
-        return self.request.user == tweet.user
-
-
-class LikeView(LoginRequiredMixin, View):
-    def post(self, request, **kwargs):
-        pk = self.kwargs["pk"]
-        tweet = get_object_or_404(Tweet, pk=pk)
-        user = self.request.user
-        Like.objects.get_or_create(tweet=tweet, user=user)
-        context = {
-            "tweet_pk": tweet.pk,
-            "like_counter": tweet.like_set.count(),
-        }
-        return JsonResponse(context)
-
-
-class UnlikeView(LoginRequiredMixin, View):
-    def post(self, request, **kwargs):
-        pk = self.kwargs["pk"]
-        tweet = get_object_or_404(Tweet, pk=pk)
-        user = self.request.user
-        like = Like.objects.filter(tweet=tweet, user=user)
-        like.delete()
-        context = {
-            "tweet_pk": tweet.pk,
-            "like_counter": tweet.like_set.count(),
-        }
-        return JsonResponse(context)
+import json
+
+from django.conf import settings
+from django.contrib import messages
+from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
+from django.core.cache import cache
+from django.core.exceptions import PermissionDenied
+from django.db import transaction
+from django.db.models import Q
+from django.http import Http404, HttpResponseRedirect, JsonResponse
+from django.shortcuts import get_object_or_404
+from django.urls import reverse, reverse_lazy
+from django.utils.decorators import method_decorator
+from django.views.generic import (
+    CreateView,
+    DeleteView,
+    DetailView,
+    ListView,
+    TemplateView,
+    View,
+)
+
+from accounts import relationships
+from accounts.models import User
+from core.conditional import conditional_page, viewer_etag
+from core.paginator import InvalidCursor
+from core.ratelimit import ratelimit
+from core.versioning import bump_version, get_version, get_versions
+from notifications.models import Notification, NotificationCounter
+from notifications.tasks import record_notification
+
+from . import media, spam
+from .cache import get_like_counts, get_tweets, set_like_count
+from .entities import index_tweets
+from .forms import ScheduledTweetForm, TweetForm
+from .models import (
+    ArchivedTweet,
+    Attachment,
+    Like,
+    Retweet,
+    ScheduledTweet,
+    Tweet,
+)
+from .tasks import fan_out_tweets, make_thumbnail, purge_tweet
+from .timelines import (
+    author_ids,
+    conversation,
+    following_timeline,
+    home_timeline,
+    hydrate,
+    mention_timeline,
+    nest,
+    tag_timeline,
+)
+
+# Create your views here.
+
+
+class HomeView(LoginRequiredMixin, ListView):
+    """
+    The cached home timeline: the newest HOME_TIMELINE_LENGTH tweets and
+    retweets, on one page. Older tweets are not paged in; they stay reachable
+    from profiles and the following timeline.
+    """
+
+    model = Tweet
+    template_name = "tweets/home.html"
+    context_object_name = "tweets"
+
+    def get_queryset(self):
+        return home_timeline(self.request.user)
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["liked_list"] = Like.objects.filter(
+            user=self.request.user,
+            tweet_id__in=[tweet.pk for tweet in context["tweets"]],
+        ).values_list("tweet", flat=True)
+        context["home_timeline_length"] = getattr(settings, "HOME_TIMELINE_LENGTH", 200)
+        return context
+
+
+@method_decorator(ratelimit("tweets:create"), name="post")
+class TweetCreateView(LoginRequiredMixin, CreateView):
+    template_name = "tweets/tweet_create.html"
+    form_class = ScheduledTweetForm
+    success_url = reverse_lazy("tweets:home")
+
+    def get_form_kwargs(self):
+        kwargs = super().get_form_kwargs()
+        kwargs["user"] = self.request.user
+        return kwargs
+
+    def form_valid(self, form):
+        spam.record(self.request.user.pk, form.spam_sketch)
+        publish_at = form.cleaned_data.get("publish_at")
+        if publish_at is not None:
+            ScheduledTweet.objects.create(
+                user=self.request.user,
+                content=form.cleaned_data["content"],
+                publish_at=publish_at,
+            )
+            messages.success(self.request, "予約投稿を登録しました。")
+            return HttpResponseRedirect(self.success_url)
+        form.instance.user = self.request.user
+        with transaction.atomic():
+            response = super().form_valid(form)
+            index_tweets([self.object])
+            image = form.cleaned_data.get("image")
+            if image is not None:
+                attachment = media.attach(self.object, image, image.image_type)
+                make_thumbnail.delay(attachment.pk)
+            fan_out_tweets.delay([self.object.pk])
+        bump_version("user", self.request.user.pk)
+        return response
+
+
+class ReplyView(TweetCreateView):
+    form_class = TweetForm
+
+    def get_in_reply_to(self):
+        if not hasattr(self, "_in_reply_to"):
+            self._in_reply_to = get_object_or_404(Tweet, pk=self.kwargs["pk"])
+        return self._in_reply_to
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["in_reply_to"] = self.get_in_reply_to()
+        return context
+
+    def form_valid(self, form):
+        in_reply_to = self.get_in_reply_to()
+        form.instance.in_reply_to = in_reply_to
+        form.instance.conversation_id = in_reply_to.conversation_root_id
+        return super().form_valid(form)
+
+    def get_success_url(self):
+        return self.get_in_reply_to().get_absolute_url()
+
+
+class QuoteView(TweetCreateView):
+    form_class = TweetForm
+
+    def get_quote_of(self):
+        if not hasattr(self, "_quote_of"):
+            self._quote_of = get_object_or_404(Tweet, pk=self.kwargs["pk"])
+        return self._quote_of
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["quote_of"] = self.get_quote_of()
+        return context
+
+    def form_valid(self, form):
+        form.instance.quote_of = self.get_quote_of()
+        return super().form_valid(form)
+
+
+class AttachmentView(LoginRequiredMixin, View):
+    thumbnail = False
+
+    def get(self, request, **kwargs):
+        attachment = get_object_or_404(
+            Attachment.objects.filter(
+                Q(tweet_id__in=Tweet.objects.values("pk"))
+                | Q(tweet_id__in=ArchivedTweet.objects.values("pk"))
+            ),
+            pk=self.kwargs["pk"],
+        )
+        if self.thumbnail:
+            if not attachment.thumbnail:
+                raise Http404
+            return media.file_response(attachment.thumbnail, "image/jpeg")
+        return media.file_response(attachment.file, attachment.content_type)
+
+
+def _check_not_blocked(user, tweet_pk):
+    tweet = get_tweets([tweet_pk]).get(tweet_pk)
+    if tweet is None:
+        raise Http404
+    if relationships.blocked_between(user.pk, tweet.user_id):
+        raise PermissionDenied
+
+
+def _set_retweet_state(request, tweet_pk, retweeted):
+    if retweeted:
+        _check_not_blocked(request.user, tweet_pk)
+    try:
+        changed, _, author_id = Retweet.objects.set_state(
+            request.user, tweet_pk, retweeted
+        )
+    except Tweet.DoesNotExist:
+        raise Http404
+    if changed:
+        bump_version("user", author_id)
+        bump_version("user", request.user.pk)
+    return HttpResponseRedirect(reverse("tweets:detail", kwargs={"pk": tweet_pk}))
+
+
+@method_decorator(ratelimit("tweets:retweet"), name="post")
+class RetweetView(LoginRequiredMixin, View):
+    def post(self, request, **kwargs):
+        return _set_retweet_state(request, self.kwargs["pk"], True)
+
+
+@method_decorator(ratelimit("tweets:retweet"), name="post")
+class UnretweetView(LoginRequiredMixin, View):
+    def post(self, request, **kwargs):
+        return _set_retweet_state(request, self.kwargs["pk"], False)
+
+
+class EntityTimelineView(LoginRequiredMixin, TemplateView):
+    """
+    One page of ``timeline``, a function from the timelines module called
+    with the request's cursor and the keyword arguments from
+    get_timeline_kwargs().
+    """
+
+    template_name = "tweets/timeline.html"
+    timeline = None
+
+    def get_timeline_kwargs(self):
+        return {}
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        try:
+            page = self.timeline(
+                cursor=self.request.GET.get("cursor"), **self.get_timeline_kwargs()
+            )
+        except InvalidCursor:
+            raise Http404
+        context["tweets"] = page.object_list
+        context["next_cursor"] = page.next_cursor
+        context["liked_list"] = Like.objects.filter(
+            user=self.request.user, tweet_id__in=[tweet.pk for tweet in page]
+        ).values_list("tweet", flat=True)
+        return context
+
+
+class FollowingTimelineView(EntityTimelineView):
+    timeline = staticmethod(following_timeline)
+
+    def get_timeline_kwargs(self):
+        return {"user": self.request.user}
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["heading"] = "フォロー中"
+        return context
+
+
+class TagTimelineView(EntityTimelineView):
+    timeline = staticmethod(tag_timeline)
+
+    def get_timeline_kwargs(self):
+        return {"name": self.kwargs["tag"].casefold(), "viewer": self.request.user}
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["heading"] = f"#{self.kwargs['tag']}"
+        return context
+
+
+class MentionTimelineView(EntityTimelineView):
+    timeline = staticmethod(mention_timeline)
+
+    def get_timeline_kwargs(self):
+        self.user = get_object_or_404(User, username=self.kwargs["username"])
+        return {"user": self.user, "viewer": self.request.user}
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["heading"] = f"@{self.user.username}へのメンション"
+        return context
+
+
+def _conversation_page(request, root_id):
+    """
+    The detail page's thread, read once per request: the ETag covers its
+    authors and the view renders it. Raises InvalidCursor.
+    """
+    if not hasattr(request, "_conversation_page"):
+        request._conversation_page = conversation(
+            root_id, request.GET.get("cursor"), viewer=request.user
+        )
+    return request._conversation_page
+
+
+def tweet_detail_etag(request, pk):
+    tweets = hydrate([pk])
+    archived = not tweets
+    conversation_version = None
+    if tweets:
+        tweet = tweets[0]
+        row = (tweet.like_count, tweet.user_id)
+        root_id = tweet.conversation_root_id
+        conversation_version = get_version("conversation", root_id)
+        try:
+            page = _conversation_page(request, root_id)
+        except InvalidCursor:
+            return None
+        # The thread shows replies, the root and quotes by other authors.
+        authors = author_ids(tweets + hydrate([root_id]) + list(page.object_list))
+    else:
+        row = (
+            ArchivedTweet.objects.filter(pk=pk)
+            .values_list("like_count", "user_id")
+            .first()
+        )
+        if row is None:
+            return None
+        authors = {row[1]}
+    like_count, author_id = row
+    return viewer_etag(
+        request,
+        "tweet",
+        pk,
+        archived,
+        like_count,
+        get_version("user", author_id),
+        sorted(get_versions("author", authors).items()),
+        conversation_version,
+        # Blocks and mutes change which replies the viewer sees.
+        get_version("user", request.user.pk),
+        NotificationCounter.unread_for(request.user.pk),
+        request.GET.get("cursor", ""),
+    )
+
+
+@method_decorator(conditional_page(tweet_detail_etag), name="get")
+class TweetDetailView(LoginRequiredMixin, DetailView):
+    model = Tweet
+    template_name = "tweets/tweet_detail.html"
+    context_object_name = "tweet"
+
+    def get_object(self, queryset=None):
+        tweets = hydrate([self.kwargs["pk"]])
+        if tweets:
+            return tweets[0]
+        return get_object_or_404(
+            ArchivedTweet.objects.select_related("user"), pk=self.kwargs["pk"]
+        )
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        tweet = self.object
+        if tweet.is_archived:
+            return context
+        root_id = tweet.conversation_root_id
+        if root_id != tweet.pk:
+            context["root"] = next(iter(hydrate([root_id])), None)
+        context["retweeted"] = Retweet.objects.filter(
+            user=self.request.user, tweet_id=tweet.pk
+        ).exists()
+        try:
+            page = _conversation_page(self.request, root_id)
+        except InvalidCursor:
+            raise Http404
+        context["thread"] = nest(page.object_list)
+        context["next_cursor"] = page.next_cursor
+        return context
+
+
+class TweetDeleteView(LoginRequiredMixin, UserPassesTestMixin, DeleteView):
+    model = Tweet
+    template_name = "tweets/tweet_delete.html"
+    context_object_name = "tweet"
+    success_url = reverse_lazy("tweets:home")
+
+    def get_object(self, queryset=None):
+        if not hasattr(self, "_tweet"):
+            try:
+                self._tweet = super().get_object(queryset)
+            except Http404:
+                self._tweet = get_object_or_404(ArchivedTweet, pk=self.kwargs["pk"])
+        return self._tweet
+
+    def test_func(self):
+        tweet = self.get_object()
+        return self.request.user.pk == tweet.user_id
+
+    def form_valid(self, form):
+        # Archived tweets are deleted outright; either way purge_tweet
+        # deletes the related rows.
+        pk = self.object.pk
+        if self.object.is_archived:
+            self.object.delete()
+        else:
+            self.object.soft_delete()
+        bump_version("user", self.object.user_id)
+        purge_tweet.delay(pk)
+        return HttpResponseRedirect(self.get_success_url())
+
+
+def _like_response(tweet_pk, liked, like_count):
+    return {"tweet_pk": tweet_pk, "liked": liked, "like_counter": like_count}
+
+
+def _set_like_state(user, tweet_pk, liked):
+    if liked:
+        _check_not_blocked(user, tweet_pk)
+    try:
+        changed, like_count, author_id = Like.objects.set_state(user, tweet_pk, liked)
+    except Tweet.DoesNotExist:
+        raise Http404
+    set_like_count(tweet_pk, like_count)
+    if changed:
+        bump_version("user", author_id)
+    if changed and liked:
+        record_notification.delay(
+            author_id, user.pk, Notification.LIKE, tweet_id=tweet_pk
+        )
+    return _like_response(tweet_pk, liked, like_count)
+
+
+@method_decorator(ratelimit("tweets:like"), name="post")
+class LikeView(LoginRequiredMixin, View):
+    def post(self, request, **kwargs):
+        return JsonResponse(_set_like_state(request.user, self.kwargs["pk"], True))
+
+
+@method_decorator(ratelimit("tweets:like"), name="post")
+class UnlikeView(LoginRequiredMixin, View):
+    def post(self, request, **kwargs):
+        return JsonResponse(_set_like_state(request.user, self.kwargs["pk"], False))
+
+
+@method_decorator(ratelimit("tweets:like"), name="post")
+class LikeStateView(LoginRequiredMixin, View):
+    """
+    Set the viewer's like state for a tweet to ``liked``. Clients may send an
+    Idempotency-Key header; a retried request with the same key gets the
+    original response instead of being applied again, and reusing a key for
+    another tweet or state is rejected with 422.
+    """
+
+    idempotency_timeout = 24 * 60 * 60
+
+    def post(self, request, **kwargs):
+        try:
+            liked = self.get_liked(request)
+        except ValueError:
+            return JsonResponse({"detail": "liked must be true or false."}, status=400)
+
+        key = request.headers.get("Idempotency-Key")
+        cache_key = None
+        if key:
+            cache_key = f"idempotency:like:{request.user.pk}:{key[:64]}"
+            cached = cache.get(cache_key)
+            if cached is not None:
+                target, context = cached
+                if target != (self.kwargs["pk"], liked):
+                    return JsonResponse(
+                        {"detail": "Idempotency-Key was used for another request."},
+                        status=422,
+                    )
+                return JsonResponse(context)
+
+        context = _set_like_state(request.user, self.kwargs["pk"], liked)
+        if cache_key:
+            cache.set(
+                cache_key,
+                ((self.kwargs["pk"], liked), context),
+                self.idempotency_timeout,
+            )
+        return JsonResponse(context)
+
+    def get_liked(self, request):
+        if request.content_type == "application/json":
+            data = json.loads(request.body or b"{}")
+            if not isinstance(data, dict):
+                raise ValueError(data)
+            value = data.get("liked")
+        else:
+            value = request.POST.get("liked")
+        if value in (True, "true", "1"):
+            return True
+        if value in (False, "false", "0"):
+            return False
+        raise ValueError(value)
+
+
+class LikeStatesView(LoginRequiredMixin, View):
+    """
+    Like counts and the viewer's liked state for up to ``max_ids`` tweets, so
+    a client can refresh a whole timeline page in one request.
+    """
+
+    max_ids = 100
+
+    def get(self, request, **kwargs):
+        try:
+            ids = [int(pk) for pk in request.GET.get("ids", "").split(",") if pk]
+        except ValueError:
+            return JsonResponse({"detail": "ids must be integers."}, status=400)
+        ids = list(dict.fromkeys(ids))
+        if len(ids) > self.max_ids:
+            return JsonResponse(
+                {"detail": f"At most {self.max_ids} ids are allowed."}, status=400
+            )
+        counts = get_like_counts(ids)
+        liked = set(
+            Like.objects.filter(user=request.user, tweet_id__in=counts).values_list(
+                "tweet_id", flat=True
+            )
+        )
+        context = {
+            "tweets": {
+                str(pk): {"like_counter": counts[pk], "liked": pk in liked}
+                for pk in ids
+                if pk in counts
+            }
+        }
+        return JsonResponse(context)
@@ -1,6 +1,6 @@
-from django.apps import AppConfig
-
-
-class WelcomeConfig(AppConfig):
-    default_auto_field = "django.db.models.BigAutoField"
-    name = "welcome"
+from django.apps import AppConfig
+
+
+class WelcomeConfig(AppConfig):
+    default_auto_field = "django.db.models.BigAutoField"
+    name = "welcome"
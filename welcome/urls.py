@@ -1,8 +1,8 @@
-from django.urls import path
-
-from . import views
-
-app_name = "welcome"
-urlpatterns = [
-    path("", views.WelcomeView.as_view(), name="index")
-]
+from django.urls import path
+
+from . import views
+
+app_name = "welcome"
+urlpatterns = [
+    path("", views.WelcomeView.as_view(), name="index")
+]
@@ -1,5 +1,5 @@
-from django.views.generic import TemplateView
-
-
-class WelcomeView(TemplateView):
-    template_name = "welcome/index.html"
+from django.views.generic import TemplateView
+
+
+class WelcomeView(TemplateView):
+    template_name = "welcome/index.html"